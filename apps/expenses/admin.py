@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Expense
+from .models import Expense, ExpenseMonthlyRollup
 
 @admin.register(Expense)
 class ExpenseAdmin(admin.ModelAdmin):
@@ -14,3 +14,10 @@ class ExpenseAdmin(admin.ModelAdmin):
             "fields": ("expense_uuid", "date", "nature_of_expense", "amount")
         }),
     )
+
+
+@admin.register(ExpenseMonthlyRollup)
+class ExpenseMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ("building", "year", "month", "nature_of_expense", "total_amount", "expense_count", "updated_at")
+    list_filter = ("year", "month", "nature_of_expense")
+    ordering = ("-year", "-month")
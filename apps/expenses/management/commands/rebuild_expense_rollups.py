@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models.functions import TruncMonth
+
+from apps.expenses.models import Expense, ExpenseMonthlyRollup
+from apps.expenses.rollups import refresh_expense_rollup
+
+
+class Command(BaseCommand):
+    help = "Rebuild ExpenseMonthlyRollup rows from Expense history."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--building", help="Only rebuild rollups for this building_id")
+
+    def handle(self, *args, **options):
+        expenses = Expense.objects.filter(building__isnull=False)
+        rollups = ExpenseMonthlyRollup.objects.all()
+        if options["building"]:
+            expenses = expenses.filter(building_id=options["building"])
+            rollups = rollups.filter(building_id=options["building"])
+
+        # Months that have expenses now, plus any that only have stale rollups
+        months = set(
+            expenses.annotate(month=TruncMonth("date"))
+            .values_list("building_id", "month")
+            .distinct()
+            .order_by()
+        )
+        months = {(building_id, month.year, month.month) for building_id, month in months}
+        months.update(rollups.values_list("building_id", "year", "month").distinct().order_by())
+
+        rows = 0
+        for building_id, year, month in sorted(months, key=str):
+            rows += refresh_expense_rollup(building_id, year, month)
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} expense rollups across {len(months)} months."))
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0005_hot_filter_indexes'),
+        ('hostelmanagement', '0010_owner_scoping_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('nature_of_expense', models.CharField(max_length=255)),
+                ('total_amount', models.BigIntegerField(default=0)),
+                ('expense_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('building', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_rollups', to='hostelmanagement.building')),
+            ],
+            options={
+                'unique_together': {('building', 'year', 'month', 'nature_of_expense')},
+            },
+        ),
+    ]
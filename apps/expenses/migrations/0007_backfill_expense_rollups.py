@@ -0,0 +1,43 @@
+from django.db import migrations
+from django.db.models import Count, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+
+def backfill_expense_rollups(apps, schema_editor):
+    """Build the rollup rows for every month that already had expenses."""
+    Expense = apps.get_model("expenses", "Expense")
+    ExpenseMonthlyRollup = apps.get_model("expenses", "ExpenseMonthlyRollup")
+
+    totals = (
+        Expense.objects.filter(building__isnull=False)
+        .annotate(year=ExtractYear("date"), month=ExtractMonth("date"))
+        .values("building_id", "year", "month", "nature_of_expense")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+    ExpenseMonthlyRollup.objects.bulk_create(
+        (
+            ExpenseMonthlyRollup(
+                building_id=row["building_id"],
+                year=row["year"],
+                month=row["month"],
+                nature_of_expense=row["nature_of_expense"],
+                total_amount=row["total"] or 0,
+                expense_count=row["count"],
+            )
+            for row in totals.iterator()
+        ),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0006_expensemonthlyrollup'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_expense_rollups, migrations.RunPython.noop),
+    ]
@@ -10,5 +10,27 @@ class Expense(models.Model):
     nature_of_expense = models.CharField(max_length=255)
     amount = models.IntegerField()
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["building", "-date"], name="expense_building_date_idx"),
+        ]
+
     def __str__(self):
         return f"{self.nature_of_expense} - {self.amount}"
+
+
+class ExpenseMonthlyRollup(models.Model):
+    """Expense totals for one building, month and nature of expense."""
+    building = models.ForeignKey(Building, on_delete=models.CASCADE, related_name="expense_rollups")
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    nature_of_expense = models.CharField(max_length=255)
+    total_amount = models.BigIntegerField(default=0)
+    expense_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("building", "year", "month", "nature_of_expense")
+
+    def __str__(self):
+        return f"{self.building_id} - {self.month:02d}/{self.year} - {self.nature_of_expense}"
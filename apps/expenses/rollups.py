@@ -0,0 +1,62 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, Sum
+
+from apps.hostelmanagement.models import Building
+from core.settings.celery import enqueue_on_commit
+
+from .models import Expense, ExpenseMonthlyRollup
+
+
+def month_dates(year, month):
+    """
+    First day of the month and of the next one.
+
+    Filtering date on this half-open range, instead of __year and __month,
+    lets the database use expense_building_date_idx.
+    """
+    return date(year, month, 1), date(year + month // 12, month % 12 + 1, 1)
+
+
+def refresh_expense_rollup(building_id, year, month):
+    """
+    Recompute one building's rollup rows for a month from Expense.
+
+    There is one row per nature_of_expense; natures with no expenses left
+    that month are removed. Returns the number of rows written.
+    """
+    if not Building.objects.filter(building_id=building_id).exists():
+        return 0
+
+    start, end = month_dates(year, month)
+    totals = (
+        Expense.objects.filter(building_id=building_id, date__gte=start, date__lt=end)
+        .values("nature_of_expense")
+        .annotate(total=Sum("amount"), count=Count("id"))
+        .order_by()
+    )
+
+    with transaction.atomic():
+        rollups = ExpenseMonthlyRollup.objects.filter(building_id=building_id, year=year, month=month)
+        rollups.delete()
+        ExpenseMonthlyRollup.objects.bulk_create(
+            ExpenseMonthlyRollup(
+                building_id=building_id,
+                year=year,
+                month=month,
+                nature_of_expense=row["nature_of_expense"],
+                total_amount=row["total"] or 0,
+                expense_count=row["count"],
+            )
+            for row in totals
+        )
+    return len(totals)
+
+
+def schedule_expense_rollup(building_id, year, month):
+    """Refresh a month's rollups on a worker once the transaction commits."""
+    if not building_id:
+        return
+    from .tasks import refresh_expense_rollup_task
+    enqueue_on_commit(refresh_expense_rollup_task, building_id, year, month)
@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Expense
+from .rollups import schedule_expense_rollup
+
+
+@receiver(pre_save, sender=Expense)
+def remember_expense_month(sender, instance, **kwargs):
+    """Keep the stored building and date so an edit refreshes the month it left."""
+    if instance._state.adding:
+        instance._previous_expense_month = None
+    else:
+        instance._previous_expense_month = (
+            Expense.objects.filter(pk=instance.pk).values_list("building_id", "date").first()
+        )
+
+
+@receiver(post_save, sender=Expense)
+def update_expense_rollup(sender, instance, **kwargs):
+    current = (instance.building_id, instance.date.year, instance.date.month)
+    schedule_expense_rollup(*current)
+
+    previous = getattr(instance, "_previous_expense_month", None)
+    if previous:
+        building_id, previous_date = previous
+        if (building_id, previous_date.year, previous_date.month) != current:
+            schedule_expense_rollup(building_id, previous_date.year, previous_date.month)
+
+
+@receiver(post_delete, sender=Expense)
+def remove_expense_from_rollup(sender, instance, **kwargs):
+    schedule_expense_rollup(instance.building_id, instance.date.year, instance.date.month)
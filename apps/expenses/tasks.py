@@ -0,0 +1,8 @@
+from celery import shared_task
+
+from .rollups import refresh_expense_rollup
+
+
+@shared_task(ignore_result=True, autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def refresh_expense_rollup_task(building_id, year, month):
+    refresh_expense_rollup(building_id, year, month)
@@ -1,3 +1,117 @@
-from django.test import TestCase
+import importlib
+from datetime import date
 
-# Create your tests here.
+import pytest
+from django.apps import apps as django_apps
+
+from apps.expenses.models import Expense, ExpenseMonthlyRollup
+from apps.hostelinfo.models import User
+from apps.hostelinfo.tokens import issue_tokens
+from apps.hostelmanagement.models import Building, Hostel
+
+
+@pytest.fixture
+def building():
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    hostel = Hostel.objects.create(owner=owner, hostel_name="Expense Hostel")
+    return Building.objects.create(
+        hostel=hostel, building_name="Block A", total_floors=1, building_type="boys"
+    )
+
+
+def rollup_totals(building):
+    return {
+        (r.year, r.month, r.nature_of_expense): (r.total_amount, r.expense_count)
+        for r in ExpenseMonthlyRollup.objects.filter(building=building)
+    }
+
+
+@pytest.mark.django_db
+def test_rollups_follow_expense_saves_and_deletes(building, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        Expense.objects.create(building=building, date=date(2025, 1, 5), nature_of_expense="Power", amount=900)
+        moved = Expense.objects.create(building=building, date=date(2025, 1, 20), nature_of_expense="Power", amount=100)
+        Expense.objects.create(building=building, date=date(2025, 1, 31), nature_of_expense="Food", amount=500)
+    assert rollup_totals(building) == {
+        (2025, 1, "Power"): (1000, 2),
+        (2025, 1, "Food"): (500, 1),
+    }
+
+    # Moving an expense to another month refreshes both months
+    with django_capture_on_commit_callbacks(execute=True):
+        moved.date = date(2025, 2, 1)
+        moved.save()
+    assert rollup_totals(building) == {
+        (2025, 1, "Power"): (900, 1),
+        (2025, 1, "Food"): (500, 1),
+        (2025, 2, "Power"): (100, 1),
+    }
+
+    with django_capture_on_commit_callbacks(execute=True):
+        moved.delete()
+    assert (2025, 2, "Power") not in rollup_totals(building)
+
+
+@pytest.mark.django_db
+def test_migration_backfills_rollups_for_existing_expenses(building):
+    migration = importlib.import_module("apps.expenses.migrations.0007_backfill_expense_rollups")
+    # Rows saved before the rollup table existed, without the signals that maintain it
+    Expense.objects.bulk_create([
+        Expense(building=building, date=date(2024, 12, 31), nature_of_expense="Power", amount=900),
+        Expense(building=building, date=date(2024, 12, 1), nature_of_expense="Power", amount=100),
+        Expense(building=building, date=date(2025, 1, 1), nature_of_expense="Food", amount=500),
+        Expense(building=None, date=date(2025, 1, 1), nature_of_expense="Food", amount=50),
+    ])
+
+    migration.backfill_expense_rollups(django_apps, None)
+
+    assert rollup_totals(building) == {
+        (2024, 12, "Power"): (1000, 2),
+        (2025, 1, "Food"): (500, 1),
+    }
+
+
+@pytest.mark.django_db
+def test_summary_returns_month_series_and_categories(client, building, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        Expense.objects.create(building=building, date=date(2025, 1, 5), nature_of_expense="Power", amount=900)
+        Expense.objects.create(building=building, date=date(2025, 3, 9), nature_of_expense="Food", amount=500)
+        Expense.objects.create(building=building, date=date(2025, 3, 10), nature_of_expense="Power", amount=300)
+        Expense.objects.create(building=building, date=date(2025, 4, 1), nature_of_expense="Food", amount=50)
+
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {issue_tokens(building.hostel.owner)['access']}"}
+    response = client.get(f"/api/expenses/{building.building_id}/summary/?from=2025-01&to=2025-03", **auth)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_amount"] == 1700
+    assert data["months"] == [
+        {"month": "2025-01", "total_amount": 900, "expense_count": 1},
+        {"month": "2025-02", "total_amount": 0, "expense_count": 0},
+        {"month": "2025-03", "total_amount": 800, "expense_count": 2},
+    ]
+    assert data["categories"] == [
+        {"nature_of_expense": "Power", "total_amount": 1200, "expense_count": 2},
+        {"nature_of_expense": "Food", "total_amount": 500, "expense_count": 1},
+    ]
+
+    listing = client.get(f"/api/expenses/{building.building_id}/?month=2025-03", **auth).json()
+    assert listing["total_amount"] == 800
+    assert listing["total_records"] == 2
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("path", ["", "summary/"])
+def test_expense_views_hide_other_owners_buildings(client, building, path):
+    stranger = User.objects.create(
+        full_name="Stranger", gender="male", phone="+911234567899",
+        email="stranger@example.com", password="password", role="owner",
+    )
+    url = f"/api/expenses/{building.building_id}/{path}"
+
+    assert client.get(url).status_code == 404
+    assert client.get(url, HTTP_AUTHORIZATION=f"Bearer {issue_tokens(stranger)['access']}").status_code == 404
+    assert client.get(url, HTTP_AUTHORIZATION=f"Bearer {issue_tokens(building.hostel.owner)['access']}").status_code == 200
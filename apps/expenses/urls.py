@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     ExpenseCreateAPIView,
     ExpenseByBuildingAPIView,
+    ExpenseSummaryAPIView,
     ExpenseUpdateAPIView,
     ExpenseDeleteAPIView,
 )
@@ -9,6 +10,7 @@ from .views import (
 urlpatterns = [
     path("expenses/<uuid:building_id>/create/", ExpenseCreateAPIView.as_view(), name="create_expense"),
     path("expenses/<uuid:building_id>/", ExpenseByBuildingAPIView.as_view(), name="list_expenses"),
+    path("expenses/<uuid:building_id>/summary/", ExpenseSummaryAPIView.as_view(), name="expense_summary"),
     path("expenses/update/", ExpenseUpdateAPIView.as_view(), name="update_expense"),
     path("expenses/delete/", ExpenseDeleteAPIView.as_view(), name="delete_expense"),
 ]
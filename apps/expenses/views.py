@@ -2,16 +2,20 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.core.paginator import Paginator
-from .models import Expense
+from django.db.models import Q, Sum
+from .models import Expense, ExpenseMonthlyRollup
+from .rollups import month_dates
 from .serializers import ExpenseSerializer
 from apps.hostelmanagement.models import Building
+from core.settings.tenancy import OwnerScopedMixin
 import uuid
+from datetime import date
 
 # ---------------- CREATE MULTIPLE EXPENSES FOR A BUILDING ----------------
-class ExpenseCreateAPIView(APIView):
+class ExpenseCreateAPIView(OwnerScopedMixin, APIView):
     def post(self, request, building_id):
         try:
-            building = Building.objects.get(building_id=building_id)
+            building = self.scoped(Building.objects.all()).get(building_id=building_id)
         except Building.DoesNotExist:
             return Response({"error": "Building not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -33,12 +37,11 @@ class ExpenseCreateAPIView(APIView):
 
 
 # ---------------- GET ALL EXPENSES FOR A BUILDING (PAGINATED) ----------------
-class ExpenseByBuildingAPIView(APIView):
+class ExpenseByBuildingAPIView(OwnerScopedMixin, APIView):
     def get(self, request, building_id):
-        # Get building
-        try:
-            building = Building.objects.get(building_id=building_id)
-        except Building.DoesNotExist:
+        # Another owner's building reads as missing
+        building = self.scoped(Building.objects.filter(building_id=building_id)).first()
+        if building is None:
             return Response({"error": "Building not found"}, status=status.HTTP_404_NOT_FOUND)
 
         # Query params
@@ -54,7 +57,8 @@ class ExpenseByBuildingAPIView(APIView):
         if month:
             try:
                 year, month_num = map(int, month.split("-"))
-                expenses = expenses.filter(date__year=year, date__month=month_num)
+                start, end = month_dates(year, month_num)
+                expenses = expenses.filter(date__gte=start, date__lt=end)
             except ValueError:
                 return Response({"error": "Invalid month format. Use YYYY-MM"}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -66,7 +70,7 @@ class ExpenseByBuildingAPIView(APIView):
         paginated_data = paginator.get_page(page)
 
         serializer = ExpenseSerializer(paginated_data, many=True)
-        total_amount = sum(e.amount for e in expenses)
+        total_amount = expenses.aggregate(total=Sum("amount"))["total"] or 0
 
         return Response(
             {
@@ -82,8 +86,87 @@ class ExpenseByBuildingAPIView(APIView):
             status=status.HTTP_200_OK,
         )
 
+# ---------------- MONTHLY EXPENSE SERIES AND CATEGORY BREAKDOWN ----------------
+class ExpenseSummaryAPIView(OwnerScopedMixin, APIView):
+    def get(self, request, building_id):
+        # Another owner's building reads as missing
+        building = self.scoped(Building.objects.filter(building_id=building_id)).first()
+        if building is None:
+            return Response({"error": "Building not found"}, status=status.HTTP_404_NOT_FOUND)
+
+        # Query params: "from" and "to" as YYYY-MM, defaulting to the last 12 months
+        try:
+            if request.query_params.get("to"):
+                end_year, end_month = map(int, request.query_params["to"].split("-"))
+            else:
+                today = date.today()
+                end_year, end_month = today.year, today.month
+            if request.query_params.get("from"):
+                start_year, start_month = map(int, request.query_params["from"].split("-"))
+            else:
+                start_year, start_month = divmod(end_year * 12 + end_month - 12, 12)
+                start_month += 1
+            month_dates(start_year, start_month)
+            month_dates(end_year, end_month)
+        except ValueError:
+            return Response({"error": "Invalid month format. Use YYYY-MM"}, status=status.HTTP_400_BAD_REQUEST)
+
+        span = (end_year - start_year) * 12 + end_month - start_month + 1
+        if span < 1:
+            return Response({"error": "from must not be after to"}, status=status.HTTP_400_BAD_REQUEST)
+        if span > 120:
+            return Response({"error": "Range cannot exceed 120 months"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Read from the rollups, which hold one row per month and nature of expense
+        rollups = ExpenseMonthlyRollup.objects.filter(
+            Q(year__gt=start_year) | Q(year=start_year, month__gte=start_month),
+            Q(year__lt=end_year) | Q(year=end_year, month__lte=end_month),
+            building=building,
+        )
+        monthly = {
+            (row["year"], row["month"]): row
+            for row in rollups.values("year", "month").annotate(
+                total=Sum("total_amount"), count=Sum("expense_count")
+            ).order_by()
+        }
+        categories = rollups.values("nature_of_expense").annotate(
+            total=Sum("total_amount"), count=Sum("expense_count")
+        ).order_by("-total", "nature_of_expense")
+
+        # Fill months without expenses so the series has no gaps
+        series = []
+        year, month = start_year, start_month
+        while (year, month) <= (end_year, end_month):
+            row = monthly.get((year, month), {})
+            series.append({
+                "month": f"{year}-{month:02d}",
+                "total_amount": row.get("total", 0),
+                "expense_count": row.get("count", 0),
+            })
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+        return Response(
+            {
+                "building_id": building_id,
+                "building_name": building.building_name,
+                "from": f"{start_year}-{start_month:02d}",
+                "to": f"{end_year}-{end_month:02d}",
+                "total_amount": sum(entry["total_amount"] for entry in series),
+                "months": series,
+                "categories": [
+                    {
+                        "nature_of_expense": row["nature_of_expense"],
+                        "total_amount": row["total"],
+                        "expense_count": row["count"],
+                    }
+                    for row in categories
+                ],
+            },
+            status=status.HTTP_200_OK,
+        )
+
 # ---------------- UPDATE EXPENSE FOR A BUILDING BY EXPENSE UUID ----------------
-class ExpenseUpdateAPIView(APIView):
+class ExpenseUpdateAPIView(OwnerScopedMixin, APIView):
 
     def put(self, request):
         building_id = request.query_params.get("building_id")
@@ -95,7 +178,7 @@ class ExpenseUpdateAPIView(APIView):
             )
 
         try:
-            building = Building.objects.get(building_id=building_id)
+            building = self.scoped(Building.objects.all()).get(building_id=building_id)
         except Building.DoesNotExist:
             return Response({"error": "Building not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -136,7 +219,7 @@ class ExpenseUpdateAPIView(APIView):
 
 
 # ---------------- DELETE EXPENSE FOR A BUILDING BY EXPENSE UUID ----------------
-class ExpenseDeleteAPIView(APIView):
+class ExpenseDeleteAPIView(OwnerScopedMixin, APIView):
     def delete(self, request):
         building_id = request.query_params.get("building_id")
         expense_id = request.query_params.get("expense_id")
@@ -148,7 +231,7 @@ class ExpenseDeleteAPIView(APIView):
             )
 
         try:
-            building = Building.objects.get(building_id=building_id)
+            building = self.scoped(Building.objects.all()).get(building_id=building_id)
         except Building.DoesNotExist:
             return Response({"error": "Building not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CollectFee
+from .models import CollectFee, FeeMonthlyRollup
 
 @admin.register(CollectFee)
 class CollectFeeAdmin(admin.ModelAdmin):
@@ -39,3 +39,20 @@ class CollectFeeAdmin(admin.ModelAdmin):
 
     # Optional: show a date hierarchy
     date_hierarchy = "payment_date"
+
+
+@admin.register(FeeMonthlyRollup)
+class FeeMonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = (
+        "building",
+        "year",
+        "month",
+        "expected_rent",
+        "total_collected",
+        "paid_students",
+        "total_students",
+        "overdue_students",
+        "updated_at",
+    )
+    list_filter = ("year", "month")
+    ordering = ("-year", "-month")
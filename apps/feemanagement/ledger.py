@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from django.db.models import Case, F, OuterRef, Q, Subquery, Value, When
+from django.utils import timezone
+
+from .models import CollectFee
+
+
+def month_range(year, month):
+    """
+    Start and end of a calendar month in the current timezone.
+
+    Filtering payment_date on this half-open range, instead of __year and
+    __month, lets the database use the payment_date indexes.
+    """
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+    return start, end
+
+
+def fee_ledger(building_id, year, month, search=None, student_id=None):
+    """
+    Return the month's payments for a building as one flat, ordered queryset.
+
+    Every row is a CollectFee joined to its student, bed and room, with the
+    display columns annotated on, so a paginator can count and slice it in SQL
+    without any per-student follow-up queries.
+    """
+    start, end = month_range(year, month)
+    fees = CollectFee.objects.filter(
+        student__building_id=building_id,
+        payment_date__gte=start,
+        payment_date__lt=end,
+    )
+
+    if student_id:
+        fees = fees.filter(student_id=student_id)
+
+    if search:
+        fees = fees.filter(
+            Q(student__student_name__icontains=search)
+            | Q(student__allocated_bed__room__room_number__icontains=search)
+        )
+
+    # Students without a bed are listed as "N/A", as the per-student loop did
+    unallocated = Q(student__allocated_bed__isnull=True)
+    return fees.annotate(
+        student_name=F("student__student_name"),
+        room_number=Case(When(unallocated, then=Value("N/A")), default=F("student__allocated_bed__room__room_number")),
+        bed_number=Case(When(unallocated, then=Value("N/A")), default=F("student__allocated_bed__bed_number")),
+    ).order_by("student__student_name", "student_id", "-payment_date", "-updated_at")
+
+
+def with_last_payment(students):
+    """
+    Annotate each student with the date and amount of their latest payment.
+
+    Both values come from correlated subqueries on CollectFee, so a page of
+    students is fetched in one query instead of one lookup per row and field.
+    """
+    latest = CollectFee.objects.filter(student=OuterRef("pk")).order_by("-payment_date")
+    return students.annotate(
+        last_payment_date=Subquery(latest.values("payment_date")[:1]),
+        last_payment_amount=Subquery(latest.values("amount")[:1]),
+    )
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from apps.feemanagement.models import CollectFee
+from apps.feemanagement.rollups import refresh_fee_rollup
+from apps.hostelmanagement.models import Building
+
+
+class Command(BaseCommand):
+    help = "Rebuild FeeMonthlyRollup rows from CollectFee history; closed months keep their rent and student totals."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--building", help="Only rebuild rollups for this building_id")
+        parser.add_argument("--month", help="Only rebuild this month, e.g. 'Oct-2025'")
+
+    def handle(self, *args, **options):
+        buildings = Building.objects.all()
+        if options["building"]:
+            buildings = buildings.filter(building_id=options["building"])
+
+        if options["month"]:
+            try:
+                month_start = datetime.strptime(options["month"][:3].title(), "%b")
+                months = {(int(options["month"][-4:]), month_start.month)}
+            except ValueError:
+                raise CommandError("Invalid month format. Use 'Oct-2025'.")
+        else:
+            now = timezone.now()
+            months = {(now.year, now.month)}
+            fee_months = (
+                CollectFee.objects.annotate(month=TruncMonth("payment_date"))
+                .values_list("month", flat=True)
+                .distinct()
+            )
+            months.update((month.year, month.month) for month in fee_months)
+
+        rebuilt = 0
+        for building_id in buildings.values_list("building_id", flat=True):
+            for year, month in sorted(months):
+                refresh_fee_rollup(building_id, year, month)
+                rebuilt += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} fee rollups."))
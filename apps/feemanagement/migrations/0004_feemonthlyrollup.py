@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feemanagement', '0003_remove_collectfee_created_at_alter_collectfee_amount_and_more'),
+        ('hostelmanagement', '0002_remove_hostel_address_remove_hostel_hostel_type_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeeMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('expected_rent', models.IntegerField(default=0)),
+                ('total_collected', models.IntegerField(default=0)),
+                ('total_students', models.IntegerField(default=0)),
+                ('paid_students', models.IntegerField(default=0)),
+                ('overdue_students', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('building', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fee_rollups', to='hostelmanagement.building')),
+            ],
+            options={
+                'unique_together': {('building', 'year', 'month')},
+            },
+        ),
+    ]
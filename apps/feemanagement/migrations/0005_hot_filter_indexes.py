@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feemanagement', '0004_feemonthlyrollup'),
+        ('hostelmanagement', '0007_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='collectfee',
+            index=models.Index(fields=['student', '-payment_date'], name='fee_student_paid_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='collectfee',
+            index=models.Index(fields=['payment_date'], name='fee_payment_date_idx'),
+        ),
+    ]
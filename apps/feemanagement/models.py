@@ -1,6 +1,6 @@
 import uuid
 from django.db import models, transaction
-from apps.hostelmanagement.models import Student
+from apps.hostelmanagement.models import Building, Student
 
 # Create your models here.
 
@@ -26,6 +26,31 @@ class CollectFee(models.Model):
     remarks = models.TextField(null=True, blank=True)
     payment_date = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["student", "-payment_date"], name="fee_student_paid_idx"),
+            models.Index(fields=["payment_date"], name="fee_payment_date_idx"),
+        ]
+
+    def __str__(self):
+        return str(self.fee_id)
+
+
+class FeeMonthlyRollup(models.Model):
+    """Precomputed fee dashboard figures for one building and month."""
+    building = models.ForeignKey(Building, on_delete=models.CASCADE, related_name="fee_rollups")
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    expected_rent = models.IntegerField(default=0)
+    total_collected = models.IntegerField(default=0)
+    total_students = models.IntegerField(default=0)
+    paid_students = models.IntegerField(default=0)
+    overdue_students = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("building", "year", "month")
+
     def __str__(self):
-        return str(self.fee_id)
\ No newline at end of file
+        return f"{self.building_id} - {self.month:02d}/{self.year}"
@@ -0,0 +1,88 @@
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.hostelmanagement.models import Bed, Building, Student
+from core.settings.celery import enqueue_on_commit
+
+from .ledger import month_range
+from .models import CollectFee, FeeMonthlyRollup
+
+
+def _expected_rent(beds):
+    """Sum of the configured rents of these beds."""
+    total = beds.aggregate(total=Sum("monthly_rent"))["total"]
+    return int(total or 0)
+
+
+def refresh_fee_rollup(building_id, year, month):
+    """
+    Recompute the rollup row for one building and month from source tables.
+
+    Payments are dated, so the collected and paid figures are always rebuilt.
+    Rent and student totals have no history: they follow the live rows while
+    the month is open and are frozen once it has ended. A closed month built
+    for the first time counts only the beds and students created before its
+    end, at today's rents.
+
+    Returns the saved FeeMonthlyRollup, or None if the building no longer exists.
+    """
+    if not Building.objects.filter(building_id=building_id).exists():
+        return None
+
+    start, end = month_range(year, month)
+    totals = CollectFee.objects.filter(
+        student__building_id=building_id,
+        payment_date__gte=start,
+        payment_date__lt=end,
+    ).aggregate(
+        collected=Sum("amount"),
+        paid=Count("student", distinct=True, filter=Q(amount__gt=0)),
+    )
+    paid_students = totals["paid"] or 0
+
+    beds = Bed.objects.filter(building_id=building_id)
+    students = Student.objects.filter(building_id=building_id)
+    closed = end <= timezone.now()
+    if closed:
+        snapshot = (
+            FeeMonthlyRollup.objects.filter(building_id=building_id, year=year, month=month)
+            .values("expected_rent", "total_students")
+            .first()
+        )
+        if snapshot is None:
+            snapshot = {
+                "expected_rent": _expected_rent(beds.filter(created_at__lt=end)),
+                "total_students": students.filter(created_at__lt=end).count(),
+            }
+    else:
+        snapshot = {"expected_rent": _expected_rent(beds), "total_students": students.count()}
+
+    rollup, _ = FeeMonthlyRollup.objects.update_or_create(
+        building_id=building_id,
+        year=year,
+        month=month,
+        defaults={
+            **snapshot,
+            "total_collected": int(totals["collected"] or 0),
+            "paid_students": paid_students,
+            "overdue_students": max(snapshot["total_students"] - paid_students, 0),
+        },
+    )
+    return rollup
+
+
+def schedule_fee_rollup(building_id, year=None, month=None):
+    """
+    Refresh a rollup on a worker once the surrounding transaction commits.
+
+    Defaults to the current month, the only one whose rent and student
+    totals still follow bed and student changes. Deferring to commit keeps cascaded deletes from
+    recreating rows for a building that is being removed.
+    """
+    if not building_id:
+        return
+    if year is None or month is None:
+        now = timezone.now()
+        year, month = now.year, now.month
+    from .tasks import refresh_fee_rollup_task
+    enqueue_on_commit(refresh_fee_rollup_task, building_id, year, month)
@@ -11,7 +11,7 @@ class CollectFeeSerializer(serializers.ModelSerializer):
         student_id = data.get("student_id")
         if student_id:
             try:
-                student = Student.objects.get(pk=student_id)
+                student = self.context.get("students", Student.objects.all()).get(pk=student_id)
                 data["student"] = student
             except Student.DoesNotExist:
                 raise serializers.ValidationError({"student_id": "Student not found"})
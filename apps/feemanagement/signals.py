@@ -1,10 +1,61 @@
-from django.db.models.signals import post_save
+import logging
+
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
+
+from apps.hostelmanagement.models import Bed, Student
+from apps.hostelmanagement.placement import building_id_for_student
+from apps.reports.cache import schedule_invalidation
+
 from .models import CollectFee
+from .rollups import schedule_fee_rollup
+
+logger = logging.getLogger(__name__)
 
 
 @receiver(post_save, sender=CollectFee)
 def update_fee_dashboard(sender, instance, created, **kwargs):
     if created:
-        # Here you could update a cache or recompute summary
-        print(f"✅ Fee collected for {instance.student.student_name}: ₹{instance.amount}")
+        logger.info("Fee of %s collected for student %s", instance.amount, instance.student_id)
+    building_id = building_id_for_student(instance.student_id)
+    schedule_fee_rollup(building_id, instance.payment_date.year, instance.payment_date.month)
+    schedule_invalidation(building_id)
+
+
+@receiver(post_delete, sender=CollectFee)
+def remove_fee_from_dashboard(sender, instance, **kwargs):
+    building_id = building_id_for_student(instance.student_id)
+    schedule_fee_rollup(building_id, instance.payment_date.year, instance.payment_date.month)
+    schedule_invalidation(building_id)
+
+
+@receiver(pre_save, sender=Bed)
+def remember_bed_rent(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored rent so post_save can tell whether it changed."""
+    if instance._state.adding:
+        instance._previous_monthly_rent = None
+    elif update_fields is not None and "monthly_rent" not in update_fields:
+        instance._previous_monthly_rent = instance.monthly_rent
+    else:
+        instance._previous_monthly_rent = (
+            Bed.objects.filter(pk=instance.pk).values_list("monthly_rent", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Bed)
+def update_expected_rent(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_monthly_rent", None)
+    if (instance.monthly_rent or None) != (previous or None):
+        schedule_fee_rollup(instance.building_id)
+
+
+@receiver(post_delete, sender=Bed)
+def remove_bed_rent(sender, instance, **kwargs):
+    if instance.monthly_rent:
+        schedule_fee_rollup(instance.building_id)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def update_student_totals(sender, instance, **kwargs):
+    schedule_fee_rollup(instance.building_id)
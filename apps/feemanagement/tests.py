@@ -1,3 +1,132 @@
-from django.test import TestCase
+from datetime import datetime
 
-# Create your tests here.
+import pytest
+from django.utils import timezone
+
+from apps.feemanagement.ledger import fee_ledger
+from apps.feemanagement.models import CollectFee, FeeMonthlyRollup
+from apps.feemanagement.rollups import refresh_fee_rollup, schedule_fee_rollup
+from apps.feemanagement.tasks import refresh_fee_rollup_task
+from apps.hostelinfo.models import User
+from apps.hostelinfo.tokens import issue_tokens
+from apps.hostelmanagement.models import Bed, Building, Hostel, Room, Student
+
+
+def make_building(name="Block A"):
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone=f"+91{User.objects.count():010d}",
+        email=f"owner{User.objects.count()}@example.com", password="password", role="owner",
+    )
+    hostel = Hostel.objects.create(owner=owner, hostel_name="Fee Hostel")
+    return Building.objects.create(hostel=hostel, building_name=name, total_floors=1, building_type="boys")
+
+
+def make_students(building, count, monthly_rent=5000):
+    room = Room.objects.create(
+        floor=building.floors.get(), room_number="101", total_beds=count, monthly_rent=monthly_rent
+    )
+    return [
+        Student.objects.create(student_name=f"Student {bed.bed_number}", allocated_bed=bed)
+        for bed in room.beds.order_by("bed_number")
+    ]
+
+
+@pytest.mark.django_db
+def test_ledger_lists_the_month_payments_with_room_and_bed(client):
+    building = make_building()
+    students = make_students(building, 2)
+    for student in students:
+        CollectFee.objects.create(student=student, payment_type="Monthly_Rent", amount=5000, payment_method="cash")
+
+    response = client.get(
+        f"/api/collect-fee/?building_id={building.building_id}",
+        HTTP_AUTHORIZATION=f"Bearer {issue_tokens(building.hostel.owner)['access']}",
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["count"] == 2
+    assert [(row["student_name"], row["room_number"]) for row in data["data"]] == [
+        (students[0].student_name, "101"),
+        (students[1].student_name, "101"),
+    ]
+    assert {row["bed_number"] for row in data["data"]} == {s.allocated_bed.bed_number for s in students}
+
+
+def backdate(queryset, year, month, field="created_at"):
+    queryset.update(**{field: timezone.make_aware(datetime(year, month, 1))})
+
+
+@pytest.mark.django_db
+def test_closed_month_rollup_keeps_its_rent_and_student_totals():
+    building = make_building()
+    students = make_students(building, 2)
+    Bed.objects.filter(building=building).update(monthly_rent=5000)
+    backdate(Bed.objects.filter(building=building), 2024, 1)
+    backdate(Student.objects.filter(building=building), 2024, 1)
+
+    rollup = refresh_fee_rollup(building.building_id, 2024, 3)
+    assert (rollup.expected_rent, rollup.total_students, rollup.total_collected) == (10000, 2, 0)
+
+    # Later rent and student changes only reach the open month
+    Bed.objects.filter(building=building).update(monthly_rent=9000)
+    students[1].delete()
+    fee = CollectFee.objects.create(
+        student=students[0], payment_type="Monthly_Rent", amount=5000, payment_method="cash"
+    )
+    backdate(CollectFee.objects.filter(pk=fee.pk), 2024, 3, field="payment_date")
+
+    rollup = refresh_fee_rollup(building.building_id, 2024, 3)
+    assert (rollup.expected_rent, rollup.total_students) == (10000, 2)
+    assert (rollup.total_collected, rollup.paid_students, rollup.overdue_students) == (5000, 1, 1)
+
+    now = timezone.now()
+    current = refresh_fee_rollup(building.building_id, now.year, now.month)
+    assert (current.expected_rent, current.total_students) == (18000, 1)
+
+
+@pytest.mark.django_db
+def test_first_build_of_a_closed_month_counts_rows_that_existed_then():
+    building = make_building()
+    early, _ = make_students(building, 2)
+    Bed.objects.filter(building=building).update(monthly_rent=4000)
+    backdate(Bed.objects.filter(pk=early.allocated_bed_id), 2024, 1)
+    backdate(Student.objects.filter(pk=early.pk), 2024, 1)
+
+    rollup = refresh_fee_rollup(building.building_id, 2024, 3)
+
+    assert (rollup.expected_rent, rollup.total_students, rollup.overdue_students) == (4000, 1, 1)
+
+
+@pytest.mark.django_db
+def test_ledger_month_range_includes_the_last_instant_and_excludes_the_next_month():
+    building = make_building()
+    student = make_students(building, 1)[0]
+    fees = [
+        CollectFee.objects.create(student=student, payment_type="Monthly_Rent", amount=amount, payment_method="cash")
+        for amount in (100, 200, 300)
+    ]
+    for fee, moment in zip(fees, [datetime(2025, 1, 1), datetime(2025, 1, 31, 23, 59, 59), datetime(2025, 2, 1)]):
+        CollectFee.objects.filter(pk=fee.pk).update(payment_date=timezone.make_aware(moment))
+
+    amounts = sorted(fee_ledger(building.building_id, 2025, 1).values_list("amount", flat=True))
+
+    assert amounts == [100, 200]
+
+
+@pytest.mark.django_db
+def test_rollup_refresh_runs_inline_when_the_broker_is_down(settings, monkeypatch, django_capture_on_commit_callbacks):
+    settings.TASK_WORKER_ENABLED = True
+    settings.CELERY_TASK_ALWAYS_EAGER = False
+
+    def broker_down(*args, **kwargs):
+        raise ConnectionError("broker unreachable")
+
+    monkeypatch.setattr(refresh_fee_rollup_task, "apply_async", broker_down)
+    building = make_building()
+    make_students(building, 2)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        schedule_fee_rollup(building.building_id)
+
+    assert FeeMonthlyRollup.objects.get(building=building).total_students == 2
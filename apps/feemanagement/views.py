@@ -4,16 +4,18 @@ from rest_framework import status
 from django.utils import timezone
 from datetime import datetime
 from django.db import models
-from django.db.models import Q, Sum
+from apps.hostelmanagement.models import Building, Student
+from core.settings.tenancy import OwnerScopedMixin
+from .ledger import fee_ledger
 from .serializers import CollectFeeSerializer
-from .models import CollectFee
-from apps.hostelmanagement.models import Student, Bed
+from .models import CollectFee, FeeMonthlyRollup
+from .rollups import refresh_fee_rollup
 from rest_framework.pagination import PageNumberPagination
 
 
-class CollectFeeView(APIView):
+class CollectFeeView(OwnerScopedMixin, APIView):
     def post(self, request):
-        serializer = CollectFeeSerializer(data=request.data)
+        serializer = CollectFeeSerializer(data=request.data, context={"students": self.scoped(Student.objects.all())})
         if serializer.is_valid():
             collect_fee = serializer.save()
             student = collect_fee.student
@@ -33,12 +35,7 @@ class CollectFeeView(APIView):
             }
 
             # Calculate next_due_amount dynamically
-            monthly_rent = 0
-            if bed and room and room.monthly_rent:
-                try:
-                    monthly_rent = int(float(room.monthly_rent))
-                except (ValueError, TypeError):
-                    monthly_rent = 0
+            monthly_rent = int(room.monthly_rent) if bed and room and room.monthly_rent else 0
             next_due_amount = max(0, monthly_rent - int(collect_fee.amount))
             
             balance_summary = {
@@ -94,6 +91,8 @@ class CollectFeeView(APIView):
                 {"error": "building_id is required"},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        if not self.scoped(Building.objects.filter(building_id=building_id)).exists():
+            return Response({"error": "Building not found"}, status=status.HTTP_404_NOT_FOUND)
 
         try:
             if month_param:
@@ -109,62 +108,40 @@ class CollectFeeView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        students_with_fees = Student.objects.filter(
-            allocated_bed__room__floor__building_id=building_id,
-            fees__payment_date__year=year_number,
-            fees__payment_date__month=month_number,
-        ).select_related(
-            'allocated_bed__room__floor__building__hostel'
-        ).distinct()
-
-        if student_id:
-            students_with_fees = students_with_fees.filter(student_id=student_id)
-
-        if search_query:
-            students_with_fees = students_with_fees.filter(
-                Q(student_name__icontains=search_query) |
-                Q(allocated_bed__room__room_number__icontains=search_query)
-            )
-        
-        # --- Prepare paginated results ---
-        paginator = self.pagination_class()
-        paginated_students = paginator.paginate_queryset(students_with_fees, request)
-        
-        data = []
-        for student in students_with_fees:
-            fee_for_month = (
-                CollectFee.objects.filter(
-                    student=student,
-                    payment_date__year=year_number,
-                    payment_date__month=month_number,
-                )
-                .order_by("-payment_date", "-updated_at")
-            )
+        fees = fee_ledger(
+            building_id,
+            year_number,
+            month_number,
+            search=search_query,
+            student_id=student_id,
+        )
 
-            if not fee_for_month.exists():
-                continue
+        # --- Paginate the ledger in SQL and serialize only the current page ---
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(fees, request)
 
-            bed = student.allocated_bed
-            room = bed.room if bed else None
-
-            for fee in fee_for_month:
-                data.append({
-                    "student_id": str(student.student_id),
-                    "student_name": student.student_name,
-                    "room_number": room.room_number if room else "N/A",
-                    "bed_number": bed.bed_number if bed else "N/A",
-                    "amount": int(fee.amount),
-                    "mode": fee.payment_method.capitalize(),
-                    "payment_status": "Paid",
-                    "payment_date": fee.payment_date.strftime("%Y-%m-%d"),
-                    "fee_id": str(fee.fee_id),
-                })
+        data = [
+            {
+                "student_id": str(fee.student_id),
+                "student_name": fee.student_name,
+                "room_number": fee.room_number,
+                "bed_number": fee.bed_number,
+                "amount": int(fee.amount),
+                "mode": fee.payment_method.capitalize(),
+                "payment_status": "Paid",
+                "payment_date": fee.payment_date.strftime("%Y-%m-%d"),
+                "fee_id": str(fee.fee_id),
+            }
+            for fee in page
+        ]
 
         return Response({
             "success": True,
             "month": f"{datetime(year_number, month_number, 1).strftime('%b-%Y')}",
             "building_id": building_id,
-            "count": len(data),
+            "count": paginator.page.paginator.count,
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
             "data": data,
         }, status=status.HTTP_200_OK)
     
@@ -173,7 +150,7 @@ class CollectFeeView(APIView):
      # ---------------- PUT/PATCH: Update collected fee ----------------
     def put(self, request, fee_id):
         try:
-            collect_fee = CollectFee.objects.get(fee_id=fee_id)
+            collect_fee = CollectFee.objects.get(fee_id=fee_id, student__in=self.scoped(Student.objects.all()))
         except CollectFee.DoesNotExist:
             return Response(
                 {"error": "Fee record not found"},
@@ -195,13 +172,15 @@ class CollectFeeView(APIView):
 
 
 
-class FeeDashboardView(APIView):
+class FeeDashboardView(OwnerScopedMixin, APIView):
     def get(self, request):
         building_id = request.query_params.get("building_id")
         month_param = request.query_params.get("month")
 
         if not building_id:
             return Response({"error": "building_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+        if not self.scoped(Building.objects.filter(building_id=building_id)).exists():
+            return Response({"error": "Building not found"}, status=status.HTTP_404_NOT_FOUND)
 
         if month_param:
             try:
@@ -217,54 +196,27 @@ class FeeDashboardView(APIView):
             month_number = now.month
             year_number = now.year
 
-        students = Student.objects.filter(
-            allocated_bed__room__floor__building=building_id
-        )
-        total_students = students.count()
-
-        all_beds = Bed.objects.filter(
-            room__floor__building=building_id
-        )
-
-        total_expected = 0
-        beds_with_rent = 0
-
-        for bed in all_beds:
-            rent_value = bed.monthly_rent
-            if rent_value and str(rent_value).strip():
-                try:
-                    bed_rent = int(float(rent_value))
-                    total_expected += bed_rent
-                    beds_with_rent += 1
-                except (ValueError, TypeError):
-                    continue
-
-        fees = CollectFee.objects.filter(
-            student__in=students,
-            payment_date__month=month_number,
-            payment_date__year=year_number,
-        )
-
-        total_collected = 0
-        paid_students = 0
+        rollup = FeeMonthlyRollup.objects.filter(
+            building_id=building_id, year=year_number, month=month_number
+        ).first()
+        if rollup is None:
+            # First request for this month: build the row once from source tables
+            rollup = refresh_fee_rollup(building_id, year_number, month_number)
+            if rollup is None:
+                return Response({"error": "Building not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        for student in students:
-            student_collected = (
-                fees.filter(student=student).aggregate(total=Sum("amount"))["total"]
-                or 0
-            )
-            total_collected += int(student_collected)
-            if student_collected > 0:
-                paid_students += 1
+        total_collected = rollup.total_collected
+        paid_students = rollup.paid_students
+        total_students = rollup.total_students
 
-        pending_amount = total_expected - total_collected
+        pending_amount = rollup.expected_rent - total_collected
         if pending_amount < 0:
             pending_amount = 0
 
         today = timezone.now().date()
         overdue_students = 0
         if today.day > 10:
-            overdue_students = total_students - paid_students
+            overdue_students = rollup.overdue_students
 
         return Response(
             {
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class HostelinfoConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.hostelinfo"
+
+    def ready(self):
+        import apps.hostelinfo.signals
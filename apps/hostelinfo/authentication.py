@@ -0,0 +1,29 @@
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+
+from .tokens import TokenError, TokenUser, verify_token
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Authenticate "Authorization: Bearer <access token>" without a database query.
+
+    request.user is a TokenUser carrying the user_id and role from the token.
+    """
+    keyword = b"bearer"
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword:
+            return None
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed("Invalid Authorization header")
+
+        try:
+            payload = verify_token(auth[1].decode(), "access")
+        except (TokenError, UnicodeError) as e:
+            raise exceptions.AuthenticationFailed(str(e))
+        return TokenUser(payload), payload
+
+    def authenticate_header(self, request):
+        return "Bearer"
@@ -0,0 +1,156 @@
+"""
+Outbound mail queue.
+
+Views call queue_mail(), which only inserts a QueuedEmail row and asks a
+Celery worker to drain the queue once the transaction commits, so a request
+never waits on SMTP. Where no worker is deployed (TASK_WORKER_ENABLED off)
+the drain runs in the web process right after the commit instead. The worker (or the send_queued_mail command) claims a
+batch in a short transaction, then sends it outside any lock over one
+reused connection of the configured EMAIL_BACKEND. A message that fails is
+retried with exponential backoff until MAIL_QUEUE_MAX_ATTEMPTS is reached,
+and is then marked failed.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Avg, Count, F, Min, Q
+from django.utils import timezone
+
+from core.settings.celery import enqueue_on_commit
+
+from .models import QueuedEmail
+
+logger = logging.getLogger(__name__)
+
+MAIL_QUEUE_BATCH_SIZE = getattr(settings, "MAIL_QUEUE_BATCH_SIZE", 50)
+MAIL_QUEUE_MAX_ATTEMPTS = getattr(settings, "MAIL_QUEUE_MAX_ATTEMPTS", 5)
+# First retry after this many seconds, doubling up to MAIL_QUEUE_MAX_BACKOFF
+MAIL_QUEUE_BACKOFF = getattr(settings, "MAIL_QUEUE_BACKOFF", 30)
+MAIL_QUEUE_MAX_BACKOFF = getattr(settings, "MAIL_QUEUE_MAX_BACKOFF", 60 * 60)
+# How long a claimed batch stays invisible to other workers while it is sent
+MAIL_QUEUE_CLAIM_TIMEOUT = getattr(settings, "MAIL_QUEUE_CLAIM_TIMEOUT", 5 * 60)
+
+
+def queue_mail(subject, message, recipient_list, from_email=None):
+    """Queue a plain-text message; the signature mirrors send_mail()."""
+    from .tasks import send_queued_mail_task
+    email = QueuedEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipient_list),
+    )
+    enqueue_on_commit(send_queued_mail_task)
+    return email
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying a message that has failed attempts times."""
+    return min(MAIL_QUEUE_BACKOFF * 2 ** (attempts - 1), MAIL_QUEUE_MAX_BACKOFF)
+
+
+def claim_due_mail(batch_size=MAIL_QUEUE_BATCH_SIZE):
+    """
+    Lease up to batch_size due messages to the caller and return them.
+
+    The rows are locked with SKIP LOCKED only long enough to push their
+    next_attempt_at MAIL_QUEUE_CLAIM_TIMEOUT seconds ahead, so other workers
+    skip them while they are being sent. A worker that dies mid-batch leaves
+    its messages pending, and they come due again once the lease runs out.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            QueuedEmail.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        QueuedEmail.objects.filter(pk__in=[email.pk for email in batch]).update(
+            next_attempt_at=now + timedelta(seconds=MAIL_QUEUE_CLAIM_TIMEOUT)
+        )
+    return batch
+
+
+def send_queued_mail(batch_size=MAIL_QUEUE_BATCH_SIZE):
+    """
+    Send one batch of due mail and return {"sent": n, "retried": n, "failed": n}.
+
+    The batch is claimed in a short transaction and sent after it commits,
+    so no row lock is held across SMTP calls. Each message is marked sent,
+    retried or failed on its own as soon as its send returns.
+    """
+    result = {"sent": 0, "retried": 0, "failed": 0}
+    batch = claim_due_mail(batch_size)
+    if not batch:
+        return result
+    now = timezone.now()
+
+    connection = get_connection()
+    try:
+        connection.open()
+    except Exception as e:
+        # Nothing can be sent this round; back the whole batch off
+        logger.warning("Could not connect to the mail server: %s", e)
+        for email in batch:
+            result[_record_failure(email, e, now)] += 1
+        return result
+
+    try:
+        for email in batch:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, email.recipients, connection=connection
+            )
+            try:
+                message.send()
+            except Exception as e:
+                logger.warning("Sending queued mail %s failed: %s", email.pk, e)
+                result[_record_failure(email, e, now)] += 1
+            else:
+                email.status = "sent"
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.last_error = None
+                email.save(update_fields=["status", "attempts", "sent_at", "last_error"])
+                result["sent"] += 1
+    finally:
+        connection.close()
+    return result
+
+
+def _record_failure(email, error, now):
+    email.attempts += 1
+    email.last_error = str(error)
+    if email.attempts >= MAIL_QUEUE_MAX_ATTEMPTS:
+        email.status = "failed"
+        outcome = "failed"
+    else:
+        email.next_attempt_at = now + timedelta(seconds=backoff(email.attempts))
+        outcome = "retried"
+    email.save(update_fields=["status", "attempts", "last_error", "next_attempt_at"])
+    return outcome
+
+
+def queue_metrics():
+    """Queue depth, retry and delivery-latency figures for monitoring."""
+    now = timezone.now()
+    totals = QueuedEmail.objects.aggregate(
+        pending=Count("pk", filter=Q(status="pending")),
+        due=Count("pk", filter=Q(status="pending", next_attempt_at__lte=now)),
+        retrying=Count("pk", filter=Q(status="pending", attempts__gt=0)),
+        sent=Count("pk", filter=Q(status="sent")),
+        failed=Count("pk", filter=Q(status="failed")),
+        oldest_pending=Min("created_at", filter=Q(status="pending")),
+        sent_last_hour=Count("pk", filter=Q(status="sent", sent_at__gte=now - timedelta(hours=1))),
+        avg_latency=Avg(
+            F("sent_at") - F("created_at"),
+            filter=Q(status="sent", sent_at__gte=now - timedelta(hours=1)),
+        ),
+    )
+    oldest = totals.pop("oldest_pending")
+    latency = totals.pop("avg_latency")
+    totals["oldest_pending_age_seconds"] = round((now - oldest).total_seconds(), 1) if oldest else None
+    totals["avg_delivery_seconds_last_hour"] = round(latency.total_seconds(), 2) if latency else None
+    return totals
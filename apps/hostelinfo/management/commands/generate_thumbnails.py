@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from apps.hostelinfo.models import Subscription
+from apps.hostelinfo.uploads import generate_derivatives
+from apps.hostelmanagement.models import Student
+
+
+class Command(BaseCommand):
+    help = "Generate missing thumbnail and preview images for receipts and Aadhaar images."
+
+    def handle(self, *args, **options):
+        names = []
+        for model, field in ((Subscription, "reciept"), (Student, "aadhar_image")):
+            names += model.objects.exclude(**{field: ""}).exclude(**{f"{field}__isnull": True}).values_list(
+                field, flat=True
+            )
+
+        created = failed = 0
+        for name in names:
+            if name.startswith("http"):
+                continue
+            try:
+                created += generate_derivatives(name)
+            except Exception as e:
+                failed += 1
+                self.stderr.write(f"{name}: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {len(names)} images, created {created} derivatives, {failed} failed."
+        ))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.hostelinfo.uploads import UPLOAD_QUEUE_BATCH_SIZE, push_staged_uploads
+
+
+class Command(BaseCommand):
+    help = "Push staged receipt and Aadhaar uploads to Cloudinary, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=UPLOAD_QUEUE_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when nothing is due")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep between polls with --loop")
+
+    def handle(self, *args, **options):
+        while True:
+            result = push_staged_uploads(batch_size=options["batch_size"])
+            if any(result.values()):
+                self.stdout.write(
+                    f"Uploaded {result['uploaded']}, retrying {result['retried']}, failed {result['failed']}."
+                )
+            # A full batch means more uploads may be due right away
+            if sum(result.values()) >= options["batch_size"]:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS("Staged uploads pushed."))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.hostelinfo.mailqueue import MAIL_QUEUE_BATCH_SIZE, queue_metrics, send_queued_mail
+
+
+class Command(BaseCommand):
+    help = "Send queued outbound mail in batches, retrying failures with backoff."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=MAIL_QUEUE_BATCH_SIZE)
+        parser.add_argument("--loop", action="store_true", help="Keep polling the queue instead of exiting when it is empty")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds to sleep between polls with --loop")
+        parser.add_argument("--metrics", action="store_true", help="Only print queue metrics")
+
+    def handle(self, *args, **options):
+        if options["metrics"]:
+            for name, value in queue_metrics().items():
+                self.stdout.write(f"{name}: {value}")
+            return
+
+        while True:
+            result = send_queued_mail(batch_size=options["batch_size"])
+            if any(result.values()):
+                self.stdout.write(
+                    f"Sent {result['sent']}, retrying {result['retried']}, failed {result['failed']}."
+                )
+            # A full batch means more mail may be due right away
+            if sum(result.values()) >= options["batch_size"]:
+                continue
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS("Mail queue drained."))
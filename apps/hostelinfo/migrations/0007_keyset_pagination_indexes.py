@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelinfo', '0006_alter_subscription_reciept'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['created_at', 'user_id'], name='user_created_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelinfo', '0010_stagedupload'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='stagedupload',
+            name='staged_upload_due_idx',
+        ),
+        migrations.AlterField(
+            model_name='stagedupload',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('in_progress', 'In progress'), ('uploaded', 'Uploaded'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='stagedupload',
+            index=models.Index(condition=models.Q(('status__in', ['pending', 'in_progress'])), fields=['next_attempt_at'], name='staged_upload_due_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelinfo', '0011_stagedupload_in_progress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='owner',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='staff', to='hostelinfo.user'),
+        ),
+    ]
@@ -1,7 +1,17 @@
 import uuid
 from django.core.validators import RegexValidator
 from django.db import models
+from django.utils import timezone
 from core.settings.cloudinary_storage import CloudinaryStorage
+from core.settings.tenancy import OwnedQuerySet
+
+
+class UserQuerySet(OwnedQuerySet):
+    def for_owner(self, owner_id):
+        # An owner's team: the owner and the wardens and workers linked to them
+        return self.filter(models.Q(pk=owner_id) | models.Q(owner=owner_id))
+
+
 class User(models.Model):
     user_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     full_name = models.CharField(max_length=50, null=False, blank=False)
@@ -31,9 +41,21 @@ class User(models.Model):
         ("worker", "Worker"),
     ]
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, null=False, blank=False) 
+    # The owner a warden or worker works for; their tokens are scoped to this owner's hostels
+    owner = models.ForeignKey(
+        "self", on_delete=models.SET_NULL, null=True, blank=True, related_name="staff"
+    )
     expiry_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = UserQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "user_id"], name="user_created_keyset_idx"),
+        ]
+
     def __str__(self):
         return self.email
 
@@ -56,6 +78,75 @@ class Subscription(models.Model):
     end_date = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Serves the latest-subscription lookup on every login
+            models.Index(fields=["user", "-created_at"], name="subscription_user_latest_idx"),
+        ]
+
     def __str__(self):
         return str(self.subscription_id)
 
+
+
+class QueuedEmail(models.Model):
+    """Outgoing mail waiting for the send_queued_mail worker."""
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+    email_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=255, null=True, blank=True)
+    recipients = models.JSONField(default=list)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # The worker only ever looks for due pending mail
+            models.Index(
+                fields=["next_attempt_at"], condition=models.Q(status="pending"), name="queued_email_due_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.status})"
+
+
+class StagedUpload(models.Model):
+    """A file written to UPLOAD_STAGING_ROOT, waiting for push_staged_uploads."""
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("in_progress", "In progress"),
+        ("uploaded", "Uploaded"),
+        ("failed", "Failed"),
+    ]
+    upload_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    public_id = models.CharField(max_length=255, unique=True)
+    path = models.CharField(max_length=500)
+    resource_type = models.CharField(max_length=20, default="image")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    uploaded_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["next_attempt_at"],
+                condition=models.Q(status__in=["pending", "in_progress"]),
+                name="staged_upload_due_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.public_id} ({self.status})"
@@ -0,0 +1,232 @@
+"""
+Storage for password-reset OTPs.
+
+Codes used to live in a module-level dict, which every Gunicorn worker had
+its own copy of and which never shrank. A store keeps each code for
+OTP_TTL seconds and counts the verification attempts made for each email
+over OTP_ATTEMPT_WINDOW seconds, so asking for a new code does not buy a
+fresh set of guesses.
+CacheOTPStore puts both in the configured Django cache (Redis in
+production), so every worker sees the same codes and they expire on their
+own. InMemoryOTPStore is a single-process stand-in for tests and local runs.
+
+The backend is chosen with the OTP_STORE_BACKEND setting.
+"""
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.crypto import constant_time_compare
+from django.utils.module_loading import import_string
+
+OTP_TTL = getattr(settings, "OTP_TTL", 60)
+OTP_RESEND_INTERVAL = getattr(settings, "OTP_RESEND_INTERVAL", 60)
+OTP_MAX_ATTEMPTS = getattr(settings, "OTP_MAX_ATTEMPTS", 5)
+OTP_ATTEMPT_WINDOW = getattr(settings, "OTP_ATTEMPT_WINDOW", 900)
+
+
+class OTPError(Exception):
+    pass
+
+
+class OTPThrottledError(OTPError):
+    pass
+
+
+class OTPAttemptsExceededError(OTPError):
+    pass
+
+
+def _normalize(email):
+    return email.strip().lower()
+
+
+def generate_otp():
+    return str(secrets.randbelow(900000) + 100000)
+
+
+class BaseOTPStore(ABC):
+    """
+    Issue and verify one OTP per email address.
+
+    Subclasses store three things per email, all expiring on their own: the
+    code, the number of attempts made within attempt_window, and a resend
+    cooldown. The attempt counter is kept apart from the code so reissuing
+    does not reset it. The public methods normalize the email; the abstract
+    ones always receive it normalized.
+    """
+
+    def __init__(
+        self,
+        ttl=OTP_TTL,
+        resend_interval=OTP_RESEND_INTERVAL,
+        max_attempts=OTP_MAX_ATTEMPTS,
+        attempt_window=OTP_ATTEMPT_WINDOW,
+    ):
+        self.ttl = ttl
+        self.resend_interval = resend_interval
+        self.max_attempts = max_attempts
+        self.attempt_window = attempt_window
+
+    def issue(self, email, throttle=False):
+        """
+        Store a fresh code for email and return it.
+
+        The attempts already made stay counted. With throttle=True, raise
+        OTPThrottledError if a code was issued less than
+        resend_interval seconds ago.
+        """
+        email = _normalize(email)
+        if not self._start_cooldown(email) and throttle:
+            raise OTPThrottledError("Please wait before requesting another OTP")
+        otp = generate_otp()
+        self._set(email, otp)
+        return otp
+
+    def verify(self, email, otp):
+        """
+        Return True and discard the code if otp matches, else False.
+
+        Every call against a live code counts as an attempt; once max_attempts
+        is used up within attempt_window the code is discarded and
+        OTPAttemptsExceededError is raised, including for codes issued later
+        in the window.
+        """
+        email = _normalize(email)
+        stored, attempts = self._get_and_count(email)
+        if stored is None:
+            return False
+        if attempts > self.max_attempts:
+            self._discard(email)
+            raise OTPAttemptsExceededError("Too many attempts, please request a new OTP")
+        if not constant_time_compare(stored, str(otp)):
+            return False
+        self._discard(email)
+        self._reset_attempts(email)
+        return True
+
+    def discard(self, email):
+        """Drop the code for email; the attempt counter runs out on its own."""
+        self._discard(_normalize(email))
+
+    @abstractmethod
+    def _discard(self, email):
+        ...
+
+    @abstractmethod
+    def _reset_attempts(self, email):
+        ...
+
+    @abstractmethod
+    def _start_cooldown(self, email):
+        """Begin the resend cooldown; False if one is already running."""
+
+    @abstractmethod
+    def _set(self, email, otp):
+        ...
+
+    @abstractmethod
+    def _get_and_count(self, email):
+        """Return (code, attempts in the window including this one), or (None, 0) if expired."""
+
+
+class CacheOTPStore(BaseOTPStore):
+    def __init__(self, alias="default", **kwargs):
+        super().__init__(**kwargs)
+        self.cache = caches[alias]
+
+    def _key(self, email, part):
+        return f"otp:{part}:{email}"
+
+    def _discard(self, email):
+        self.cache.delete(self._key(email, "code"))
+
+    def _reset_attempts(self, email):
+        self.cache.delete(self._key(email, "attempts"))
+
+    def _start_cooldown(self, email):
+        return self.cache.add(self._key(email, "cooldown"), 1, self.resend_interval)
+
+    def _set(self, email, otp):
+        self.cache.set(self._key(email, "code"), otp, self.ttl)
+
+    def _get_and_count(self, email):
+        stored = self.cache.get(self._key(email, "code"))
+        if stored is None:
+            return None, 0
+        key = self._key(email, "attempts")
+        # add() opens the window on the first attempt and leaves a running one alone
+        self.cache.add(key, 0, self.attempt_window)
+        try:
+            attempts = self.cache.incr(key)
+        except ValueError:
+            # The window closed between the two calls; this opens the next one
+            self.cache.add(key, 1, self.attempt_window)
+            attempts = 1
+        return stored, attempts
+
+
+class InMemoryOTPStore(BaseOTPStore):
+    """Per-process store for tests; expired entries are dropped on every write."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self._codes = {}
+        self._attempts = {}
+        self._cooldowns = {}
+
+    def _purge(self, now):
+        for entries in (self._codes, self._attempts, self._cooldowns):
+            for email in [email for email, entry in entries.items() if entry[-1] <= now]:
+                del entries[email]
+
+    def _discard(self, email):
+        with self._lock:
+            self._codes.pop(email, None)
+
+    def _reset_attempts(self, email):
+        with self._lock:
+            self._attempts.pop(email, None)
+
+    def _start_cooldown(self, email):
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            if email in self._cooldowns:
+                return False
+            self._cooldowns[email] = (now + self.resend_interval,)
+            return True
+
+    def _set(self, email, otp):
+        now = time.monotonic()
+        with self._lock:
+            self._purge(now)
+            self._codes[email] = (otp, now + self.ttl)
+
+    def _get_and_count(self, email):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._codes.get(email)
+            if entry is None or entry[1] <= now:
+                return None, 0
+            attempts = self._attempts.get(email)
+            if attempts is None or attempts[1] <= now:
+                attempts = self._attempts[email] = [0, now + self.attempt_window]
+            attempts[0] += 1
+            return entry[0], attempts[0]
+
+
+_store = None
+
+
+def get_otp_store():
+    global _store
+    if _store is None:
+        _store = import_string(
+            getattr(settings, "OTP_STORE_BACKEND", "apps.hostelinfo.otp.CacheOTPStore")
+        )()
+    return _store
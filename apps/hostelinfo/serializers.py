@@ -6,6 +6,9 @@ from apps.feemanagement.models import CollectFee
 from .models import User, Subscription
 
 from apps.hostelmanagement.models import Bed, Student
+from apps.hostelmanagement.serializers import format_amount
+from core.settings.cloudinary_storage import derivative_url
+from core.settings.upload_handlers import DOCUMENT_UPLOAD_MAX_SIZE
 
 
 # ---------------- User Serializer ----------------
@@ -20,6 +23,7 @@ class UserSerializer(serializers.ModelSerializer):
             "password": {"write_only": True},
             "confirm_password": {"write_only": True},
             "email": {"required": True},
+            "owner": {"read_only": True},
         }
 
    
@@ -86,6 +90,8 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
             "password": {"write_only": True},
             "confirm_password": {"write_only": True},
             "email": {"required": True},
+            # Only an owner registering their staff sets this (UserRegisterAPIView)
+            "owner": {"read_only": True},
         }
 
     def validate_email(self, value):
@@ -110,6 +116,9 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
 
 
 # ---------------- User Login Serializer ----------------
+LOGIN_FIELDS = ("user_id", "full_name", "phone", "email", "password", "role", "owner")
+
+
 class UserLoginSerializer(serializers.Serializer):
     phone = serializers.CharField(required=True)
     password = serializers.CharField(write_only=True, required=True)
@@ -118,12 +127,17 @@ class UserLoginSerializer(serializers.Serializer):
         phone = data.get("phone")
         password = data.get("password")
 
-        try:
-            user = User.objects.get(phone=phone)
-        except User.DoesNotExist:
+        # Only the columns the login response needs
+        user = User.objects.filter(phone=phone).only(*LOGIN_FIELDS).first()
+        if user is None:
             raise serializers.ValidationError("Invalid phone or password")
-            
-        if not check_password(password, user.password):
+
+        def upgrade(raw_password):
+            # Re-hash with the current PASSWORD_HASHERS profile and cost
+            user.password = make_password(raw_password)
+            User.objects.filter(pk=user.pk).update(password=user.password)
+
+        if not check_password(password, user.password, setter=upgrade):
             raise serializers.ValidationError("Invalid phone or password")
 
         data["user"] = user
@@ -147,10 +161,19 @@ class ResetPasswordSerializer(serializers.Serializer):
         return data
 
 class StudentSerializer(serializers.ModelSerializer):
+    thumbnail_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+
     class Meta:
         model = Student
         fields = "__all__"
 
+    def get_thumbnail_url(self, obj):
+        return derivative_url(obj.aadhar_image, "thumbnail")
+
+    def get_preview_url(self, obj):
+        return derivative_url(obj.aadhar_image, "preview")
+
 class StudentdetailsSerializer(serializers.ModelSerializer):
     allocation = serializers.SerializerMethodField(read_only=True)
     payment_due = serializers.SerializerMethodField(read_only=True)
@@ -195,7 +218,7 @@ class StudentdetailsSerializer(serializers.ModelSerializer):
             "room_number": room.room_number if room else None,
             "bed_number": bed.bed_number if bed else None,
             "floor_number": room.floor.floor_number if room else None,
-            "monthly_rent": str(room.monthly_rent) if room else None,
+            "monthly_rent": format_amount(room.monthly_rent) if room else None,
             "allocation_date": obj.created_at.date(),
             "status": "active",
             "payment_status": "pending"
@@ -204,7 +227,7 @@ class StudentdetailsSerializer(serializers.ModelSerializer):
     def get_payment_due(self, obj):
         room_rent = obj.allocated_bed.room.monthly_rent if obj.allocated_bed else 0
         return {
-            "amount_due": str(room_rent),
+            "amount_due": format_amount(room_rent) or "0",
             "due_date": (obj.created_at + timedelta(days=7)).date() if obj.created_at else None,
             "advance_required": "5000"
         }
@@ -303,9 +326,11 @@ class PremiumSubscriptionSerializer(serializers.Serializer):
     def validate_receipt(self, value):
         """Validate the uploaded receipt image"""
         if value:
-            # Check file size (max 5MB)
-            if value.size > 5 * 1024 * 1024:
-                raise serializers.ValidationError("File size cannot exceed 5MB")
+            # Check file size
+            if value.size > DOCUMENT_UPLOAD_MAX_SIZE:
+                raise serializers.ValidationError(
+                    f"File size cannot exceed {DOCUMENT_UPLOAD_MAX_SIZE // (1024 * 1024)}MB"
+                )
             
             # Check file type
             allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif']
@@ -343,9 +368,11 @@ class ReceiptUploadSerializer(serializers.Serializer):
     
     def validate_receipt(self, value):
         """Validate the uploaded receipt image"""
-        # Check file size (max 5MB)
-        if value.size > 5 * 1024 * 1024:
-            raise serializers.ValidationError("File size cannot exceed 5MB")
+        # Check file size
+        if value.size > DOCUMENT_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f"File size cannot exceed {DOCUMENT_UPLOAD_MAX_SIZE // (1024 * 1024)}MB"
+            )
         
         # Check file type
         allowed_types = ['image/jpeg', 'image/jpg', 'image/png', 'image/gif']
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Subscription
+from .subscriptions import invalidate_subscription
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def forget_subscription_snapshot(sender, instance, **kwargs):
+    invalidate_subscription(instance.user_id)
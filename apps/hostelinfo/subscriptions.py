@@ -0,0 +1,54 @@
+"""
+Cached view of each user's latest subscription.
+
+Login and the subscription endpoints only need a handful of fields from the
+newest Subscription row. latest_subscription() keeps those fields in the
+Django cache (Redis in production), including the fact that a user has no
+subscription, and the signals in signals.py drop the entry whenever one of
+the user's subscriptions is saved or deleted.
+"""
+import uuid
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Subscription
+
+SUBSCRIPTION_CACHE_TIMEOUT = getattr(settings, "SUBSCRIPTION_CACHE_TIMEOUT", 60 * 60)
+
+SubscriptionSnapshot = namedtuple(
+    "SubscriptionSnapshot", ["subscription_id", "account_type", "start_date", "end_date"]
+)
+
+# Cached in place of a snapshot for users without a subscription
+NO_SUBSCRIPTION = "none"
+
+
+def _key(user_id):
+    # Normalised so URL strings and model UUIDs share one entry
+    return f"subscription:latest:{uuid.UUID(str(user_id))}"
+
+
+def latest_subscription(user_id):
+    """The user's newest subscription as a SubscriptionSnapshot, or None."""
+    cached = cache.get(_key(user_id))
+    if cached is not None:
+        return None if cached == NO_SUBSCRIPTION else SubscriptionSnapshot(*cached)
+
+    row = (
+        Subscription.objects.filter(user_id=user_id)
+        .order_by("-created_at")
+        .values_list(*SubscriptionSnapshot._fields)
+        .first()
+    )
+    cache.set(_key(user_id), tuple(row) if row else NO_SUBSCRIPTION, SUBSCRIPTION_CACHE_TIMEOUT)
+    return SubscriptionSnapshot(*row) if row else None
+
+
+def invalidate_subscription(user_id):
+    """Drop the cached snapshot now and again once the transaction commits."""
+    cache.delete(_key(user_id))
+    # A concurrent login could re-cache the old row before we commit
+    transaction.on_commit(lambda: cache.delete(_key(user_id)))
@@ -0,0 +1,29 @@
+from celery import shared_task
+from django.conf import settings
+
+from .mailqueue import MAIL_QUEUE_BATCH_SIZE, send_queued_mail
+from .uploads import UPLOAD_QUEUE_BATCH_SIZE, generate_derivatives, push_staged_uploads
+
+# Batches one task run may work through before leaving the rest to the next sweep
+QUEUE_TASK_MAX_BATCHES = getattr(settings, "QUEUE_TASK_MAX_BATCHES", 20)
+
+
+@shared_task(ignore_result=True)
+def send_queued_mail_task():
+    """Send due mail, batch by batch; failed messages are retried by the queue's own backoff."""
+    for _ in range(QUEUE_TASK_MAX_BATCHES):
+        if sum(send_queued_mail(MAIL_QUEUE_BATCH_SIZE).values()) < MAIL_QUEUE_BATCH_SIZE:
+            break
+
+
+@shared_task(ignore_result=True)
+def push_staged_uploads_task():
+    """Push due staged uploads, batch by batch; failures are retried by the queue's own backoff."""
+    for _ in range(QUEUE_TASK_MAX_BATCHES):
+        if sum(push_staged_uploads(UPLOAD_QUEUE_BATCH_SIZE).values()) < UPLOAD_QUEUE_BATCH_SIZE:
+            break
+
+
+@shared_task(autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
+def generate_derivatives_task(name):
+    return generate_derivatives(name)
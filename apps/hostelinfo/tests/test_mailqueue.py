@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.utils import timezone
+
+from apps.hostelinfo import mailqueue, tasks
+from apps.hostelinfo.models import QueuedEmail
+
+
+@pytest.mark.django_db
+def test_queued_mail_is_sent_in_one_batch():
+    for number in range(3):
+        mailqueue.queue_mail(f"Hello {number}", "Body", [f"user{number}@example.com"])
+    assert mail.outbox == []
+
+    assert mailqueue.send_queued_mail() == {"sent": 3, "retried": 0, "failed": 0}
+    assert sorted(message.subject for message in mail.outbox) == ["Hello 0", "Hello 1", "Hello 2"]
+    assert mailqueue.queue_metrics()["sent"] == 3
+    assert mailqueue.send_queued_mail() == {"sent": 0, "retried": 0, "failed": 0}
+
+
+@pytest.mark.django_db
+def test_claimed_mail_is_hidden_from_other_workers_until_the_lease_runs_out(monkeypatch):
+    for number in range(2):
+        mailqueue.queue_mail(f"Hello {number}", "Body", [f"user{number}@example.com"])
+    seen_while_sending = []
+    send_messages = mail.backends.locmem.EmailBackend.send_messages
+
+    def send_and_look(self, messages):
+        seen_while_sending.append(len(mailqueue.claim_due_mail()))
+        return send_messages(self, messages)
+
+    monkeypatch.setattr("django.core.mail.backends.locmem.EmailBackend.send_messages", send_and_look)
+    assert mailqueue.send_queued_mail()["sent"] == 2
+    assert seen_while_sending == [0, 0]
+
+    # A worker that died after claiming leaves the mail pending until its lease expires
+    mailqueue.queue_mail("Orphaned", "Body", ["user@example.com"])
+    assert len(mailqueue.claim_due_mail()) == 1
+    assert mailqueue.send_queued_mail()["sent"] == 0
+    QueuedEmail.objects.filter(status="pending").update(next_attempt_at=timezone.now())
+    assert mailqueue.send_queued_mail()["sent"] == 1
+
+
+@pytest.mark.django_db
+def test_failed_mail_backs_off_then_gives_up(monkeypatch):
+    def refuse(self, messages):
+        raise OSError("connection refused")
+
+    monkeypatch.setattr("django.core.mail.backends.locmem.EmailBackend.send_messages", refuse)
+    email = mailqueue.queue_mail("Hello", "Body", ["user@example.com"])
+
+    for attempt in range(1, mailqueue.MAIL_QUEUE_MAX_ATTEMPTS):
+        assert mailqueue.send_queued_mail()["retried"] == 1
+        email.refresh_from_db()
+        assert email.attempts == attempt and email.last_error == "connection refused"
+        # Not due again until the backoff has passed
+        assert mailqueue.send_queued_mail()["retried"] == 0
+        QueuedEmail.objects.filter(pk=email.pk).update(next_attempt_at=email.next_attempt_at - timedelta(days=1))
+
+    assert mailqueue.send_queued_mail()["failed"] == 1
+    email.refresh_from_db()
+    assert email.status == "failed"
+    assert mailqueue.queue_metrics()["failed"] == 1
+
+
+@pytest.mark.django_db
+def test_queued_mail_is_sent_by_a_task_after_commit(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        mailqueue.queue_mail("Welcome", "Hello", ["a@example.com"])
+
+    assert QueuedEmail.objects.get().status == "sent"
+    assert mail.outbox[-1].subject == "Welcome"
+
+
+@pytest.mark.django_db
+def test_queued_mail_is_sent_inline_where_no_worker_runs(settings, monkeypatch, django_capture_on_commit_callbacks):
+    settings.TASK_WORKER_ENABLED = False
+    settings.CELERY_TASK_ALWAYS_EAGER = False
+
+    def unconsumed_broker(*args, **kwargs):
+        raise AssertionError("no worker would ever pick this up")
+
+    monkeypatch.setattr(tasks.send_queued_mail_task, "apply_async", unconsumed_broker)
+    with django_capture_on_commit_callbacks(execute=True):
+        mailqueue.queue_mail("Your OTP", "123456", ["a@example.com"])
+
+    assert QueuedEmail.objects.get().status == "sent"
+    assert mail.outbox[-1].subject == "Your OTP"
+
+
+@pytest.mark.django_db
+def test_queue_task_stops_after_its_batch_limit(monkeypatch):
+    monkeypatch.setattr(tasks, "MAIL_QUEUE_BATCH_SIZE", 1)
+    monkeypatch.setattr(tasks, "QUEUE_TASK_MAX_BATCHES", 2)
+    for number in range(3):
+        QueuedEmail.objects.create(subject=f"Hello {number}", body="Body", recipients=["a@example.com"])
+
+    tasks.send_queued_mail_task()
+
+    assert QueuedEmail.objects.filter(status="sent").count() == 2
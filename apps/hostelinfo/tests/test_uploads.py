@@ -0,0 +1,143 @@
+import os
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image
+
+from apps.hostelinfo.models import StagedUpload
+from apps.hostelinfo.uploads import claim_due_uploads, downscale_image, generate_derivatives, push_staged_uploads
+from core.settings.cloudinary_storage import CloudinaryStorage, FakeCloudinaryRemote
+
+
+@pytest.fixture
+def fake_cloudinary(settings, tmp_path):
+    settings.CLOUDINARY_REMOTE = "core.settings.cloudinary_storage.FakeCloudinaryRemote"
+    settings.CLOUDINARY_STAGED_UPLOADS = True
+    settings.UPLOAD_STAGING_ROOT = str(tmp_path)
+    FakeCloudinaryRemote.reset()
+    yield FakeCloudinaryRemote
+    FakeCloudinaryRemote.reset()
+
+
+@pytest.mark.django_db
+def test_upload_is_staged_then_pushed(fake_cloudinary, django_capture_on_commit_callbacks):
+    storage = CloudinaryStorage()
+    name = storage.save("reciepts/receipt.png", SimpleUploadedFile("receipt.png", b"x" * 1000))
+
+    # Nothing has reached Cloudinary, but the file is known and has its final URL
+    assert name.startswith("reciepts/")
+    assert fake_cloudinary.resources == {}
+    assert storage.exists(name)
+    assert storage.size(name) == 1000
+    assert storage.url(name).endswith(name)
+
+    fake_cloudinary.fail_uploads = ConnectionError("timed out")
+    assert push_staged_uploads() == {"uploaded": 0, "retried": 1, "failed": 0}
+    upload = StagedUpload.objects.get(public_id=name)
+    assert upload.status == "pending" and upload.attempts == 1
+
+    fake_cloudinary.fail_uploads = None
+    upload.next_attempt_at = upload.created_at
+    upload.save()
+    with django_capture_on_commit_callbacks(execute=True):
+        assert push_staged_uploads() == {"uploaded": 1, "retried": 0, "failed": 0}
+    assert fake_cloudinary.resources[name] == b"x" * 1000
+    assert not os.path.exists(upload.path)
+    assert storage.size(name) == 1000
+
+
+@pytest.mark.django_db
+def test_claimed_uploads_are_pushed_outside_the_claim(fake_cloudinary, django_capture_on_commit_callbacks):
+    storage = CloudinaryStorage()
+    name = storage.save("reciepts/receipt.png", SimpleUploadedFile("receipt.png", b"x" * 10))
+    upload = StagedUpload.objects.get(public_id=name)
+    seen_while_pushing = []
+    upload_to_fake = FakeCloudinaryRemote.upload
+
+    def upload_and_look(self, file, public_id, resource_type="image"):
+        seen_while_pushing.append(len(claim_due_uploads()))
+        return upload_to_fake(self, file, public_id, resource_type)
+
+    # A worker that died after claiming leaves the upload in_progress until its claim expires
+    assert claim_due_uploads() == [upload]
+    assert StagedUpload.objects.get().status == "in_progress"
+    assert push_staged_uploads()["uploaded"] == 0
+    StagedUpload.objects.update(next_attempt_at=upload.created_at)
+
+    FakeCloudinaryRemote.upload = upload_and_look
+    try:
+        with django_capture_on_commit_callbacks() as callbacks:
+            assert push_staged_uploads()["uploaded"] == 1
+    finally:
+        FakeCloudinaryRemote.upload = upload_to_fake
+
+    assert seen_while_pushing == [0]
+    assert StagedUpload.objects.get().status == "uploaded"
+    # The staged copy goes only once the uploaded status is committed
+    assert os.path.exists(upload.path)
+    for callback in callbacks:
+        callback()
+    assert not os.path.exists(upload.path)
+
+
+@pytest.mark.django_db
+def test_deleting_a_staged_upload_cancels_it(fake_cloudinary):
+    storage = CloudinaryStorage()
+    name = storage.save("aadhar/card.jpg", SimpleUploadedFile("card.jpg", b"card"))
+    path = StagedUpload.objects.get(public_id=name).path
+
+    storage.delete(name)
+
+    assert not StagedUpload.objects.exists()
+    assert not os.path.exists(path)
+    assert not storage.exists(name)
+
+
+@pytest.mark.django_db
+def test_non_image_receipt_is_rejected_while_streaming(client):
+    upload = SimpleUploadedFile("receipt.png", b"MZ\x90\x00not an image at all", content_type="image/png")
+    response = client.post("/api/subscriptions/abc/receipt/", {"receipt": upload})
+
+    assert response.status_code == 400
+    assert "only JPEG, PNG, and GIF" in response.json()["detail"]
+
+
+@pytest.mark.django_db
+def test_receipt_over_five_megabytes_is_rejected_while_streaming(client):
+    upload = SimpleUploadedFile("receipt.png", b"\x89PNG\r\n\x1a\n" + b"x" * (5 * 1024 * 1024), content_type="image/png")
+    response = client.post("/api/subscriptions/abc/receipt/", {"receipt": upload})
+
+    assert response.status_code == 400
+    assert "cannot exceed 5MB" in response.json()["detail"]
+
+
+def test_large_images_are_downscaled_before_upload(tmp_path):
+    path = tmp_path / "photo.jpg"
+    Image.new("RGB", (4000, 3000), "white").save(path, "JPEG")
+
+    assert downscale_image(str(path), max_dimension=1000)
+    with Image.open(path) as image:
+        assert image.size == (1000, 750)
+    assert not downscale_image(str(path), max_dimension=1000)
+
+
+@pytest.mark.django_db
+def test_pushed_images_get_thumbnail_and_preview(fake_cloudinary):
+    photo = BytesIO()
+    Image.new("RGB", (1600, 1200), "white").save(photo, "JPEG")
+    storage = CloudinaryStorage()
+    name = storage.save("aadhar/card.jpg", SimpleUploadedFile("card.jpg", photo.getvalue()))
+
+    # Until the worker runs, the original stands in for its derivatives
+    assert storage.derivative_url(name, "thumbnail") == storage.url(name)
+
+    push_staged_uploads()
+
+    thumbnail = storage.derivative_url(name, "thumbnail")
+    assert thumbnail.endswith(f"{name}__thumbnail")
+    with Image.open(BytesIO(fake_cloudinary.resources[f"{name}__thumbnail"])) as image:
+        assert image.size == (200, 150)
+    with Image.open(BytesIO(fake_cloudinary.resources[f"{name}__preview"])) as image:
+        assert image.size == (800, 600)
+    assert generate_derivatives(name) == 0
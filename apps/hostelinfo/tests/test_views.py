@@ -0,0 +1,219 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIRequestFactory
+
+from apps.hostelinfo import otp
+from apps.hostelinfo.authentication import SignedTokenAuthentication
+from apps.hostelinfo.mailqueue import send_queued_mail
+from apps.hostelinfo.models import Subscription, User
+from apps.hostelinfo.subscriptions import latest_subscription
+from apps.hostelinfo.tokens import claim_token, verify_token
+
+
+@pytest.fixture
+def otp_store(monkeypatch):
+    store = otp.InMemoryOTPStore(max_attempts=2)
+    monkeypatch.setattr(otp, "_store", store)
+    return store
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create(
+        full_name="Test User",
+        gender="male",
+        phone="+911234567890",
+        email="test@example.com",
+        password="password",
+        role="owner",
+    )
+
+
+def sent_otp():
+    send_queued_mail()
+    return mail.outbox[-1].body.rsplit(" ", 1)[-1]
+
+
+def reset(client, code):
+    return client.post("/api/reset-password/", {
+        "email": "test@example.com",
+        "otp": code,
+        "new_password": "new-secret",
+        "confirm_password": "new-secret",
+    })
+
+
+@pytest.mark.django_db
+def test_password_reset_with_otp(client, otp_store, user):
+    assert client.post("/api/forgot-password/", {"email": "test@example.com"}).status_code == 200
+    code = sent_otp()
+
+    assert client.post("/api/resend-otp/", {"email": "test@example.com"}).status_code == 429
+    assert reset(client, "000000").status_code == 400
+    assert reset(client, code).status_code == 200
+    # A code can only be used once
+    assert reset(client, code).status_code == 400
+
+
+@pytest.mark.django_db
+def test_otp_is_discarded_after_too_many_attempts(client, otp_store, user):
+    client.post("/api/forgot-password/", {"email": "test@example.com"})
+    code = sent_otp()
+
+    assert reset(client, "000000").status_code == 400
+    assert reset(client, "000000").status_code == 400
+    assert reset(client, code).status_code == 429
+    assert reset(client, code).status_code == 400
+
+
+@pytest.mark.django_db
+def test_reissuing_an_otp_after_lockout_keeps_the_lock(client, otp_store, user):
+    client.post("/api/forgot-password/", {"email": "test@example.com"})
+    code = sent_otp()
+    for guess in ("000000", "000000", code):
+        reset(client, guess)
+
+    # Asking again within the resend interval is throttled
+    assert client.post("/api/forgot-password/", {"email": "test@example.com"}).status_code == 429
+    otp_store._cooldowns.clear()  # Let the cooldown run out
+    assert client.post("/api/forgot-password/", {"email": "test@example.com"}).status_code == 200
+
+    assert reset(client, sent_otp()).status_code == 429
+
+
+@pytest.mark.django_db
+def test_cache_otp_store_counts_attempts_across_reissues():
+    store = otp.CacheOTPStore(resend_interval=0, max_attempts=1)
+    store.issue("Someone@Example.com")
+    assert store.verify("someone@example.com", "000000") is False
+
+    code = store.issue("someone@example.com")
+    with pytest.raises(otp.OTPAttemptsExceededError):
+        store.verify("someone@example.com", code)
+
+    store._reset_attempts("someone@example.com")
+    code = store.issue("someone@example.com")
+    assert store.verify("someone@example.com", code) is True
+
+    code = store.issue("someone@example.com")
+    store.discard(" SomeOne@Example.com")
+    assert store.verify("someone@example.com", code) is False
+
+
+@pytest.mark.django_db
+def test_login_upgrades_old_password_hashes(client, user):
+    user.password = make_password("secret", hasher="pbkdf2_sha1")
+    user.save()
+
+    response = client.post("/api/login/", {"phone": user.phone, "password": "secret"})
+
+    assert response.status_code == 200
+    user.refresh_from_db()
+    assert user.password.startswith("argon2")
+    assert client.post("/api/login/", {"phone": user.phone, "password": "secret"}).status_code == 200
+    assert client.post("/api/login/", {"phone": user.phone, "password": "wrong"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_subscription_snapshot_is_cached_until_a_subscription_changes(
+    user, django_assert_num_queries, django_capture_on_commit_callbacks
+):
+    assert latest_subscription(user.user_id) is None
+    with django_assert_num_queries(0):
+        assert latest_subscription(str(user.user_id)) is None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        subscription = Subscription.objects.create(user=user, account_type="free_trial")
+
+    snapshot = latest_subscription(user.user_id)
+    assert snapshot.subscription_id == subscription.subscription_id
+    assert snapshot.account_type == "free_trial"
+
+
+@pytest.fixture
+def tokens(client, user):
+    user.password = make_password("secret")
+    user.save()
+    response = client.post("/api/login/", {"phone": user.phone, "password": "secret"})
+    return response.json()
+
+
+@pytest.mark.django_db
+def test_access_token_authenticates_without_queries(tokens, user, django_assert_num_queries):
+    request = APIRequestFactory().get("/api/students/", HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+    with django_assert_num_queries(0):
+        token_user, _ = SignedTokenAuthentication().authenticate(request)
+    assert token_user.user_id == user.user_id
+    assert token_user.role == "owner"
+
+    # A refresh token is not an access token
+    request = APIRequestFactory().get("/api/students/", HTTP_AUTHORIZATION=f"Bearer {tokens['refresh']}")
+    with pytest.raises(AuthenticationFailed):
+        SignedTokenAuthentication().authenticate(request)
+
+
+@pytest.mark.django_db
+def test_refresh_tokens_rotate_and_logout_revokes(client, tokens):
+    response = client.post("/api/token/refresh/", {"refresh": tokens["refresh"]})
+    assert response.status_code == 200
+    # Each refresh token works once
+    assert client.post("/api/token/refresh/", {"refresh": tokens["refresh"]}).status_code == 401
+
+    fresh = response.json()
+    assert client.post("/api/logout/", {"refresh": fresh["refresh"]}).status_code == 200
+    assert client.post("/api/token/refresh/", {"refresh": fresh["refresh"]}).status_code == 401
+
+
+@pytest.mark.django_db
+def test_concurrent_refreshes_of_one_token_succeed_once(client, tokens, monkeypatch):
+    payload = verify_token(tokens["refresh"], "refresh")
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        claims = list(pool.map(lambda _: claim_token(payload), range(8)))
+    assert claims.count(True) == 1
+
+    # Two requests that both got past verify_token before either claimed the token
+    fresh = client.post("/api/login/", {"phone": "+911234567890", "password": "secret"}).json()
+    raced = verify_token(fresh["refresh"], "refresh")
+    monkeypatch.setattr("apps.hostelinfo.views.verify_token", lambda token, token_type: raced)
+    statuses = [client.post("/api/token/refresh/", {"refresh": fresh["refresh"]}).status_code for _ in range(2)]
+    assert statuses == [200, 401]
+
+
+@pytest.mark.django_db
+def test_cache_outage_accepts_access_tokens_but_not_refreshes(client, tokens, monkeypatch):
+    class DownCache:
+        def get_many(self, *args):
+            raise ConnectionError("cache unreachable")
+
+        add = get_many
+
+    monkeypatch.setattr("apps.hostelinfo.tokens._cache", DownCache)
+
+    request = APIRequestFactory().get("/api/students/", HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+    token_user, _ = SignedTokenAuthentication().authenticate(request)
+    assert str(token_user) == tokens["user_id"]
+    # A refresh token cannot be proven unused, so it is refused
+    assert client.post("/api/token/refresh/", {"refresh": tokens["refresh"]}).status_code == 401
+
+
+@pytest.mark.django_db
+def test_password_reset_views_ignore_a_stale_bearer_token(client, otp_store, user):
+    stale = {"HTTP_AUTHORIZATION": "Bearer expired-or-garbage"}
+    assert client.post("/api/forgot-password/", {"email": "test@example.com"}, **stale).status_code == 200
+    assert client.post("/api/resend-otp/", {"email": "test@example.com"}, **stale).status_code == 429
+    response = client.post("/api/reset-password/", {
+        "email": "test@example.com", "otp": "000000", "new_password": "x", "confirm_password": "x",
+    }, **stale)
+    assert response.status_code == 400 and "error" in response.json()
+
+
+@pytest.mark.django_db
+def test_password_reset_revokes_existing_tokens(client, otp_store, tokens):
+    client.post("/api/forgot-password/", {"email": "test@example.com"})
+    assert reset(client, sent_otp()).status_code == 200
+
+    assert client.post("/api/token/refresh/", {"refresh": tokens["refresh"]}).status_code == 401
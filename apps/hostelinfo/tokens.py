@@ -0,0 +1,147 @@
+"""
+Signed access and refresh tokens for the API.
+
+Tokens are HMAC-signed with SECRET_KEY through django.core.signing, so
+checking one needs no database query: the signature, type and age are
+verified locally, and a single cache read (Redis in production) checks the
+revocation list. Access tokens are short-lived; refresh tokens are
+single-use and are swapped for a new pair by TokenRefreshView.
+
+Two kinds of revocation are kept in the cache, each for as long as the
+tokens it covers can live: a revoked token id (logout, used refresh token)
+and a per-user cut-off time (password reset) before which every token of
+that user is rejected.
+
+If the cache is down, verify_token() fails open: it skips the revocation
+check and logs it, since every request would otherwise fail. claim_token()
+fails closed, as a refresh token's single use cannot be enforced without it.
+"""
+import logging
+import time
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+ACCESS_TOKEN_LIFETIME = getattr(settings, "ACCESS_TOKEN_LIFETIME", 15 * 60)
+REFRESH_TOKEN_LIFETIME = getattr(settings, "REFRESH_TOKEN_LIFETIME", 14 * 24 * 60 * 60)
+AUTH_TOKEN_CACHE = getattr(settings, "AUTH_TOKEN_CACHE", "default")
+
+LIFETIMES = {"access": ACCESS_TOKEN_LIFETIME, "refresh": REFRESH_TOKEN_LIFETIME}
+
+
+class TokenError(Exception):
+    pass
+
+
+class TokenUser:
+    """The authenticated user as far as the token says, without loading User."""
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, payload):
+        self.user_id = uuid.UUID(payload["sub"])
+        self.pk = self.user_id
+        self.role = payload["role"]
+        # Tokens issued before the "own" claim existed were scoped to their subject
+        owner_id = payload.get("own", payload["sub"])
+        self.owner_id = uuid.UUID(owner_id) if owner_id else None
+        self.token = payload
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+def _cache():
+    return caches[AUTH_TOKEN_CACHE]
+
+
+def _salt(token_type):
+    return f"hostelinfo.tokens.{token_type}"
+
+
+def _revoked_key(jti):
+    return f"auth:revoked:{jti}"
+
+
+def _cutoff_key(user_id):
+    return f"auth:revoked-before:{user_id}"
+
+
+def owner_of(user):
+    """The owner whose hostels a User (or TokenUser) works on, or None for unlinked staff."""
+    return user.user_id if user.role == "owner" else user.owner_id
+
+
+def issue_token(user_id, role, token_type, owner_id=None):
+    payload = {
+        "sub": str(user_id),
+        "role": role,
+        "own": str(owner_id) if owner_id else None,
+        "typ": token_type,
+        "jti": uuid.uuid4().hex,
+        "iat": time.time(),
+    }
+    return signing.dumps(payload, salt=_salt(token_type), compress=True)
+
+
+def issue_tokens(user):
+    """A fresh access/refresh pair for a User (or TokenUser)."""
+    return {
+        "access": issue_token(user.user_id, user.role, "access", owner_of(user)),
+        "refresh": issue_token(user.user_id, user.role, "refresh", owner_of(user)),
+    }
+
+
+def verify_token(token, token_type="access"):
+    """Return the payload of a valid, unrevoked token or raise TokenError."""
+    try:
+        payload = signing.loads(token, salt=_salt(token_type), max_age=LIFETIMES[token_type])
+    except signing.SignatureExpired:
+        raise TokenError("Token has expired")
+    except signing.BadSignature:
+        raise TokenError("Invalid token")
+
+    try:
+        revoked = _cache().get_many([_revoked_key(payload["jti"]), _cutoff_key(payload["sub"])])
+    except Exception:
+        logger.exception("Token revocation list unavailable, accepting token %s unchecked", payload["jti"])
+        return payload
+    if _revoked_key(payload["jti"]) in revoked:
+        raise TokenError("Token has been revoked")
+    cutoff = revoked.get(_cutoff_key(payload["sub"]))
+    if cutoff is not None and payload["iat"] <= cutoff:
+        raise TokenError("Token has been revoked")
+    return payload
+
+
+def revoke_token(payload):
+    """Reject this token from now until it would have expired anyway."""
+    remaining = payload["iat"] + LIFETIMES[payload["typ"]] - time.time()
+    if remaining > 0:
+        _cache().set(_revoked_key(payload["jti"]), 1, int(remaining) + 1)
+
+
+def claim_token(payload):
+    """
+    Revoke a single-use token and return True if this call was the one to do it.
+
+    The revocation is written with cache.add(), which is atomic, so of two
+    requests that verified the same token at once only one gets True.
+    """
+    remaining = payload["iat"] + LIFETIMES[payload["typ"]] - time.time()
+    if remaining <= 0:
+        return False
+    try:
+        return _cache().add(_revoked_key(payload["jti"]), 1, int(remaining) + 1)
+    except Exception:
+        logger.exception("Token revocation list unavailable, refusing to claim token %s", payload["jti"])
+        return False
+
+
+def revoke_user_tokens(user_id):
+    """Reject every token issued to the user so far."""
+    _cache().set(_cutoff_key(user_id), time.time(), max(LIFETIMES.values()))
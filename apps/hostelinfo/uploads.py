@@ -0,0 +1,215 @@
+"""
+Staged Cloudinary uploads.
+
+With CLOUDINARY_STAGED_UPLOADS on, CloudinaryStorage writes each upload to
+UPLOAD_STAGING_ROOT and calls enqueue_upload(), so a request never waits on
+Cloudinary. A Celery worker (or the push_staged_uploads command) claims staged
+files in batches and pushes them outside any transaction, retrying failures
+with exponential backoff until UPLOAD_QUEUE_MAX_ATTEMPTS is reached. A pushed
+file's metadata is cached and the local copy removed once that is committed.
+
+Images larger than UPLOAD_DOWNSCALE_MAX_DIMENSION are shrunk and re-encoded
+here, in the worker, so web processes never decode a full-size photo. Once
+an image is pushed, its thumbnail and preview derivatives are generated from
+the staged copy and pushed too.
+"""
+import logging
+import os
+from datetime import timedelta
+from functools import partial
+from io import BytesIO
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from core.settings.celery import enqueue_on_commit
+from core.settings.cloudinary_storage import (
+    DERIVATIVE_SIZES,
+    CloudinaryStorage,
+    cache_metadata,
+    derivative_name,
+    get_remote,
+    staged_path,
+)
+
+from .models import StagedUpload
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_QUEUE_BATCH_SIZE = getattr(settings, "UPLOAD_QUEUE_BATCH_SIZE", 20)
+UPLOAD_QUEUE_MAX_ATTEMPTS = getattr(settings, "UPLOAD_QUEUE_MAX_ATTEMPTS", 5)
+# First retry after this many seconds, doubling up to UPLOAD_QUEUE_MAX_BACKOFF
+UPLOAD_QUEUE_BACKOFF = getattr(settings, "UPLOAD_QUEUE_BACKOFF", 30)
+UPLOAD_QUEUE_MAX_BACKOFF = getattr(settings, "UPLOAD_QUEUE_MAX_BACKOFF", 60 * 60)
+# How long a claimed upload stays invisible to other workers while it is pushed
+UPLOAD_QUEUE_CLAIM_TIMEOUT = getattr(settings, "UPLOAD_QUEUE_CLAIM_TIMEOUT", 10 * 60)
+UPLOAD_DOWNSCALE_MAX_DIMENSION = getattr(settings, "UPLOAD_DOWNSCALE_MAX_DIMENSION", 2048)
+
+
+def enqueue_upload(public_id, path, resource_type="image"):
+    from .tasks import push_staged_uploads_task
+    upload = StagedUpload.objects.create(public_id=public_id, path=path, resource_type=resource_type)
+    enqueue_on_commit(push_staged_uploads_task)
+    return upload
+
+
+def cancel_upload(public_id):
+    """Forget a staged file that has not been pushed yet."""
+    for upload in StagedUpload.objects.filter(public_id=public_id, status="pending"):
+        _remove_staged_file(upload.path)
+        upload.delete()
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying an upload that has failed attempts times."""
+    return min(UPLOAD_QUEUE_BACKOFF * 2 ** (attempts - 1), UPLOAD_QUEUE_MAX_BACKOFF)
+
+
+def downscale_image(path, max_dimension=UPLOAD_DOWNSCALE_MAX_DIMENSION):
+    """
+    Shrink the image at path in place to fit max_dimension pixels a side.
+
+    Returns True if the file was rewritten. Small images, GIFs (which may be
+    animated) and files Pillow cannot read are left untouched.
+    """
+    if not max_dimension:
+        return False
+    try:
+        with Image.open(path) as image:
+            source_format = image.format
+            if source_format not in ("JPEG", "PNG") or max(image.size) <= max_dimension:
+                return False
+            # Let the JPEG decoder skip detail we are about to throw away
+            image.draft("RGB", (max_dimension, max_dimension))
+            image = ImageOps.exif_transpose(image)
+            image.thumbnail((max_dimension, max_dimension))
+            resized = path + ".resized"
+            if source_format == "PNG":
+                image.save(resized, "PNG", optimize=True)
+            else:
+                image.convert("RGB").save(resized, "JPEG", quality=85, optimize=True)
+        os.replace(resized, path)
+    except (OSError, Image.DecompressionBombError) as e:
+        logger.warning("Could not downscale %s: %s", path, e)
+        return False
+    return True
+
+
+def generate_derivatives(name, source=None):
+    """
+    Push whichever derivatives of the image name do not exist yet.
+
+    source is a local path to read the original from; by default the staged
+    copy is used if there is one, else the original is downloaded. Returns
+    the number of derivatives created, so running it again is a no-op.
+    """
+    storage = CloudinaryStorage()
+    missing = [kind for kind in DERIVATIVE_SIZES if not storage.exists(derivative_name(name, kind))]
+    if not missing:
+        return 0
+
+    remote = storage.remote
+    if source is None:
+        source = staged_path(name)
+        if not os.path.exists(source):
+            source = BytesIO(remote.fetch(name))
+
+    largest = max(DERIVATIVE_SIZES[kind] for kind in missing)
+    with Image.open(source) as image:
+        image.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for kind in missing:
+            derived = image.copy()
+            derived.thumbnail((DERIVATIVE_SIZES[kind], DERIVATIVE_SIZES[kind]))
+            buffer = BytesIO()
+            derived.save(buffer, "JPEG", quality=80, optimize=True)
+            buffer.seek(0)
+            pushed = remote.upload(buffer, derivative_name(name, kind))
+            cache_metadata(pushed["public_id"], "uploaded", pushed["bytes"], pushed["url"], permanent=True)
+    return len(missing)
+
+
+def claim_due_uploads(batch_size=UPLOAD_QUEUE_BATCH_SIZE):
+    """
+    Mark up to batch_size due uploads in_progress for the caller and return them.
+
+    The rows are locked with SKIP LOCKED only for this short transaction. A
+    claim lasts UPLOAD_QUEUE_CLAIM_TIMEOUT seconds; uploads left in_progress
+    by a worker that died come due again after that.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        batch = list(
+            StagedUpload.objects.select_for_update(skip_locked=True)
+            .filter(status__in=["pending", "in_progress"], next_attempt_at__lte=now)
+            .order_by("next_attempt_at")[:batch_size]
+        )
+        StagedUpload.objects.filter(pk__in=[upload.pk for upload in batch]).update(
+            status="in_progress", next_attempt_at=now + timedelta(seconds=UPLOAD_QUEUE_CLAIM_TIMEOUT)
+        )
+    return batch
+
+
+def push_staged_uploads(batch_size=UPLOAD_QUEUE_BATCH_SIZE):
+    """
+    Push one batch of due uploads and return {"uploaded": n, "retried": n, "failed": n}.
+
+    The batch is claimed first, so several workers can run side by side
+    without pushing a file twice, and no row lock is held while Cloudinary
+    is called. Each upload is marked on its own as soon as its push returns.
+    """
+    result = {"uploaded": 0, "retried": 0, "failed": 0}
+    now = timezone.now()
+    remote = get_remote()
+    for upload in claim_due_uploads(batch_size):
+        if upload.resource_type == "image" and upload.attempts == 0:
+            downscale_image(upload.path)
+        try:
+            pushed = remote.upload(upload.path, upload.public_id, upload.resource_type)
+        except Exception as e:
+            logger.warning("Pushing staged upload %s failed: %s", upload.public_id, e)
+            result[_record_failure(upload, e, now)] += 1
+            continue
+        cache_metadata(upload.public_id, "uploaded", pushed["bytes"], pushed["url"])
+        if upload.resource_type == "image":
+            try:
+                generate_derivatives(upload.public_id, upload.path)
+            except Exception as e:
+                # Retried from the pushed original, with backoff
+                from .tasks import generate_derivatives_task
+                logger.warning("Generating derivatives of %s failed: %s", upload.public_id, e)
+                enqueue_on_commit(generate_derivatives_task, upload.public_id)
+        with transaction.atomic():
+            upload.status = "uploaded"
+            upload.attempts += 1
+            upload.uploaded_at = timezone.now()
+            upload.last_error = None
+            upload.save(update_fields=["status", "attempts", "uploaded_at", "last_error"])
+            # Keep the staged copy until the row saying it was pushed is durable
+            transaction.on_commit(partial(_remove_staged_file, upload.path))
+        result["uploaded"] += 1
+    return result
+
+
+def _record_failure(upload, error, now):
+    upload.attempts += 1
+    upload.last_error = str(error)
+    if upload.attempts >= UPLOAD_QUEUE_MAX_ATTEMPTS:
+        # The staged file is kept so the upload can be retried by hand
+        upload.status = "failed"
+        outcome = "failed"
+    else:
+        upload.status = "pending"
+        upload.next_attempt_at = now + timedelta(seconds=backoff(upload.attempts))
+        outcome = "retried"
+    upload.save(update_fields=["status", "attempts", "last_error", "next_attempt_at"])
+    return outcome
+
+
+def _remove_staged_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -3,12 +3,15 @@ from django.urls import path
 from .views import (
     ForgotPasswordView,
     LoginView,
+    LogoutView,
+    MailQueueStatsView,
     PaymentDetailView,
     PremiumSubscriptionView,
     ReceiptUploadView,
     ResetPasswordView,
     StudentAPIView,
     StudentDetailAPIView,
+    TokenRefreshView,
     TrialActivationView,
     UserDetailAPIView,
     UserRegisterAPIView,
@@ -20,9 +23,12 @@ urlpatterns = [
     path("userregister/", UserRegisterAPIView.as_view(), name="user-register"), 
     path("userregister/<uuid:pk>/", UserDetailAPIView.as_view(), name="user-detail"), 
     path("login/", LoginView.as_view(), name="login"),  
+    path("token/refresh/", TokenRefreshView.as_view(), name="token-refresh"),
+    path("logout/", LogoutView.as_view(), name="logout"),
     path("forgot-password/", ForgotPasswordView.as_view(), name="forgot-password"), 
     path("reset-password/", ResetPasswordView.as_view(), name="reset-password"), 
     path("resend-otp/", ResendOTPView.as_view(), name="resend-otp"),
+    path("mail-queue/stats/", MailQueueStatsView.as_view(), name="mail-queue-stats"),
     path("subscriptions/trial/activate/", TrialActivationView.as_view(), name="trial-activation"),
     path("subscriptions/premium/create/", PremiumSubscriptionView.as_view(), name="premium-subscription"),
     path("subscriptions/payment-details/", PaymentDetailView.as_view(), name="payment-details"),
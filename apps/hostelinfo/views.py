@@ -1,15 +1,21 @@
-import random
-import time
 from datetime import date, datetime, timedelta
 from django.conf import settings
 from django.contrib.auth.hashers import make_password
-from django.core.mail import send_mail
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from apps.hostelinfo.models import User, Subscription
+from apps.hostelinfo.mailqueue import queue_mail, queue_metrics
+from apps.hostelinfo.otp import OTPAttemptsExceededError, OTPThrottledError, get_otp_store
+from apps.hostelinfo.subscriptions import latest_subscription
+from apps.hostelinfo.tokens import TokenError, claim_token, issue_tokens, revoke_token, revoke_user_tokens, verify_token
 from apps.hostelmanagement.models import Student
+from apps.roomallocate.allocation import BedUnavailableError, claim_bed, idempotent, release_bed
+from core.settings.cloudinary_storage import derivative_url
+from core.settings.pagination import PaginatedListMixin
+from core.settings.tenancy import OwnerScopedMixin
 
 import logging
 
@@ -18,7 +24,7 @@ logger = logging.getLogger(__name__)
 # Utility function to get subscription ID from User model
 def get_user_subscription_id(user):
     try:
-        subscription = Subscription.objects.filter(user=user).order_by('-created_at').first()
+        subscription = latest_subscription(user.user_id)
         return str(subscription.subscription_id) if subscription else None
     except Exception as e:
         logger.error(f"Error getting subscription ID for user {user.user_id}: {str(e)}")
@@ -38,21 +44,19 @@ from .serializers import (
     UserSerializer,
 )
 
-# Temporary in-memory storage for OTPs
-OTP_STORE = {}
-
-OTP_EXPIRY_TIME = 60  # 1 minutes
-
-class UserRegisterAPIView(APIView):
+class UserRegisterAPIView(OwnerScopedMixin, PaginatedListMixin, APIView):
     def get(self, request):
-        users = User.objects.all()
-        serializer = UserSerializer(users, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.paginated_response(self.scoped(User.objects.all()), UserSerializer)
 
     def post(self, request):
         serializer = UserRegistrationSerializer(data=request.data)
         if serializer.is_valid():
-            user = serializer.save()
+            # Wardens and workers registered by a signed-in owner work for that owner
+            registrar = request.user
+            if getattr(registrar, "role", None) == "owner" and serializer.validated_data["role"] != "owner":
+                user = serializer.save(owner_id=registrar.user_id)
+            else:
+                user = serializer.save()
             # Return the exact format requested
             response_data = {
                 "full_name": user.full_name,
@@ -68,14 +72,14 @@ class UserRegisterAPIView(APIView):
         return Response(serializer.errors, status=400)
 
 
-class UserDetailAPIView(APIView):
+class UserDetailAPIView(OwnerScopedMixin, APIView):
     def get(self, request, pk):
-        user = get_object_or_404(User, pk=pk)
+        user = get_object_or_404(self.scoped(User.objects.all()), pk=pk)
         serializer = UserSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request, pk):
-        user = get_object_or_404(User, pk=pk)
+        user = get_object_or_404(self.scoped(User.objects.all()), pk=pk)
         serializer = UserSerializer(user, data=request.data, partial=True)
 
         if serializer.is_valid():
@@ -88,7 +92,7 @@ class UserDetailAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, pk):
-        user = get_object_or_404(User, pk=pk)
+        user = get_object_or_404(self.scoped(User.objects.all()), pk=pk)
         user.delete()
         return Response({"detail": "User deleted"}, status=status.HTTP_204_NO_CONTENT)
 
@@ -103,6 +107,9 @@ class StudentListAPIView(APIView):
 
 # ---------------- User Login API ----------------
 class LoginView(APIView):
+    # A stale token in the header must not stop the user logging in again
+    authentication_classes = []
+
     def post(self, request):
         serializer = UserLoginSerializer(data=request.data)
         if serializer.is_valid():
@@ -124,7 +131,8 @@ class LoginView(APIView):
                 "message": "Login successful",
                 "user_id": str(user.user_id),
                 "role": user.role,
-                "user": user_data
+                "user": user_data,
+                **issue_tokens(user),
             }
             
             # Only include subscription if it has valid data (not null subscription_id)
@@ -138,7 +146,7 @@ class LoginView(APIView):
     def _get_subscription_id(self, user):
         """Get subscription ID from Subscription model based on User model"""
         try:
-            subscription = Subscription.objects.filter(user=user).order_by('-created_at').first()
+            subscription = latest_subscription(user.user_id)
             return str(subscription.subscription_id) if subscription else None
         except Exception as e:
             logger.error(f"Error getting subscription ID for user {user.user_id}: {str(e)}")
@@ -146,10 +154,9 @@ class LoginView(APIView):
     
     def _get_subscription_data(self, user):
         """Get subscription data from Subscription model"""
-        print(f"User: {user}")
         try:
-            # Get the latest subscription for the user
-            subscription = Subscription.objects.filter(user=user).order_by('-created_at').first()
+            # Get the latest subscription for the user, usually from the cache
+            subscription = latest_subscription(user.user_id)
             
             if subscription:
                 return {
@@ -210,20 +217,66 @@ class LoginView(APIView):
             ]
 
 
+# ---------------- Token Refresh API ----------------
+class TokenRefreshView(APIView):
+    authentication_classes = []
+
+    def post(self, request):
+        """Swap a refresh token for a new access/refresh pair; each refresh token works once"""
+        try:
+            payload = verify_token(request.data.get("refresh") or "", "refresh")
+        except TokenError as e:
+            return Response({"error": str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+        # Two requests may both get past verify_token; only one can claim the token
+        if not claim_token(payload):
+            return Response({"error": "Token has been revoked"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        # The one query on this path: the account may be gone or its role changed
+        user = User.objects.filter(user_id=payload["sub"]).only("user_id", "role", "owner").first()
+        if user is None:
+            return Response({"error": "User not found"}, status=status.HTTP_401_UNAUTHORIZED)
+
+        return Response(issue_tokens(user), status=status.HTTP_200_OK)
+
+
+# ---------------- Logout API ----------------
+class LogoutView(APIView):
+    authentication_classes = []
+
+    def post(self, request):
+        """Revoke the given refresh token and, if sent, the current access token"""
+        try:
+            revoke_token(verify_token(request.data.get("refresh") or "", "refresh"))
+        except TokenError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        auth = request.headers.get("Authorization", "").split()
+        if len(auth) == 2 and auth[0].lower() == "bearer":
+            try:
+                revoke_token(verify_token(auth[1], "access"))
+            except TokenError:
+                pass  # Already unusable
+        return Response({"message": "Logged out"}, status=status.HTTP_200_OK)
+
+
 # ---------------- Forgot Password API ----------------
 class ForgotPasswordView(APIView):
+    authentication_classes = []
+
     def post(self, request):
         serializer = ForgotPasswordSerializer(data=request.data)
         if serializer.is_valid():
             email = serializer.validated_data["email"]
 
-            otp = str(random.randint(100000, 999999))
-            OTP_STORE[email] = {"otp": otp, "timestamp": time.time()}
+            try:
+                otp = get_otp_store().issue(email, throttle=True)
+            except OTPThrottledError as e:
+                return Response({"error": str(e)}, status=429)
 
             # Send OTP via email
             subject = "Password Reset OTP"
             message = f"Your OTP for password reset is: {otp}"
-            send_mail(subject, message, settings.EMAIL_HOST_USER, [email])
+            queue_mail(subject, message, [email], settings.EMAIL_HOST_USER)
 
             return Response(
                 {"message": "OTP sent to your email"}, status=status.HTTP_200_OK
@@ -234,6 +287,8 @@ class ForgotPasswordView(APIView):
 
 # ---------------- Reset Password API ----------------
 class ResetPasswordView(APIView):
+    authentication_classes = []
+
     def post(self, request):
         serializer = ResetPasswordSerializer(data=request.data)
         if serializer.is_valid():
@@ -241,20 +296,20 @@ class ResetPasswordView(APIView):
             otp = serializer.validated_data["otp"]
             new_password = serializer.validated_data["new_password"]
 
-            otp_data = OTP_STORE.get(email)
-            if not otp_data or otp_data["otp"] != otp:
+            # Codes expire on their own; a missing one reads as invalid
+            try:
+                valid = get_otp_store().verify(email, otp)
+            except OTPAttemptsExceededError as e:
+                return Response({"error": str(e)}, status=429)
+            if not valid:
                 return Response({"error": "Invalid or expired OTP"}, status=400)
 
-            # Check if OTP expired
-            if time.time() - otp_data["timestamp"] > OTP_EXPIRY_TIME:
-                OTP_STORE.pop(email, None)
-                return Response({"error": "OTP expired"}, status=400)
-
             user = get_object_or_404(User, email=email)
             user.password = make_password(new_password)
             user.save()
+            # Sign out every device that logged in with the old password
+            revoke_user_tokens(user.user_id)
 
-            OTP_STORE.pop(email, None)
             return Response({"message": "Password reset successful"}, status=200)
 
         return Response(serializer.errors, status=400)
@@ -262,6 +317,8 @@ class ResetPasswordView(APIView):
 
 # ---------------- Resend OTP API ----------------
 class ResendOTPView(APIView):
+    authentication_classes = []
+
     def post(self, request):
         email = request.data.get("email")
 
@@ -272,36 +329,45 @@ class ResendOTPView(APIView):
         if not user:
             return Response({"error": "User with this email does not exist"}, status=404)
 
-        # Throttle: don’t allow resend within 1 minute
-        if (
-            email in OTP_STORE
-            and time.time() - OTP_STORE[email]["timestamp"] < 60
-        ):
-            return Response(
-                {"error": "Please wait before requesting another OTP"},
-                status=429,
-            )
-
-        otp = str(random.randint(100000, 999999))
-        OTP_STORE[email] = {"otp": otp, "timestamp": time.time()}
+        # Throttle: don’t allow resend within OTP_RESEND_INTERVAL
+        try:
+            otp = get_otp_store().issue(email, throttle=True)
+        except OTPThrottledError as e:
+            return Response({"error": str(e)}, status=429)
 
         subject = "Password Reset OTP (Resent)"
         message = f"Your new OTP for password reset is: {otp}"
-        send_mail(subject, message, settings.EMAIL_HOST_USER, [email])
+        queue_mail(subject, message, [email], settings.EMAIL_HOST_USER)
 
         return Response({"message": "New OTP sent to your email"}, status=200)
 
 
+# ---------------- Mail Queue Stats API ----------------
+class MailQueueStatsView(APIView):
+    """
+    Depth, retry and delivery-latency figures for the outbound mail queue.
+    """
+    def get(self, request):
+        return Response(queue_metrics(), status=status.HTTP_200_OK)
+
+
 # ---------------- Student List API ----------------
-class StudentAPIView(APIView):
+class StudentAPIView(OwnerScopedMixin, PaginatedListMixin, APIView):
+    @idempotent("student-create")
     def post(self, request):
         serializer = StudentdetailsSerializer(data=request.data)
         if serializer.is_valid():
-            student = serializer.save()
-            if student.allocated_bed:
-                bed = student.allocated_bed
-                bed.is_occupied = True
-                bed.save(update_fields=["is_occupied"])
+            try:
+                with transaction.atomic():
+                    # Claim the bed before the student row exists so two
+                    # registrations can never end up on the same bed
+                    claim_bed(serializer.validated_data["allocated_bed"])
+                    student = serializer.save()
+            except BedUnavailableError as e:
+                return Response({
+                    "success": False,
+                    "errors": {"allocated_bed": [str(e)]}
+                }, status=status.HTTP_400_BAD_REQUEST)
             return Response({
                 "success": True,
                 "message": "Student registered and bed allocated successfully",
@@ -314,32 +380,33 @@ class StudentAPIView(APIView):
 
     def get(self, request, student_id=None):
         if student_id:
-            student = get_object_or_404(Student, student_id=student_id)
+            student = get_object_or_404(self.scoped(Student.objects.all()), student_id=student_id)
             serializer = StudentListSerializer(student)
             return Response(serializer.data, status=status.HTTP_200_OK)
         else:
-            students = Student.objects.all()
-            serializer = StudentListSerializer(students, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+            students = self.scoped(Student.objects.prefetch_related("fees"))
+            return self.paginated_response(students, StudentListSerializer)
     def put(self, request, student_id):
-        student = get_object_or_404(Student, student_id=student_id)
-        old_bed = student.allocated_bed
+        student = get_object_or_404(self.scoped(Student.objects.all()), student_id=student_id)
+        old_bed_id = student.allocated_bed_id
 
         serializer = StudentdetailsSerializer(student, data=request.data, partial=True)
         if serializer.is_valid():
-            updated_student = serializer.save()
-            new_bed = updated_student.allocated_bed
-
-            # If bed changed
-            if old_bed != new_bed:
-                # Free old bed
-                if old_bed:
-                    old_bed.is_occupied = False
-                    old_bed.save(update_fields=["is_occupied"])
-                # Occupy new bed
-                if new_bed:
-                    new_bed.is_occupied = True
-                    new_bed.save(update_fields=["is_occupied"])
+            new_bed_id = serializer.validated_data.get("allocated_bed")
+            try:
+                with transaction.atomic():
+                    # If bed changed, claim the new one before freeing the old one
+                    if new_bed_id and new_bed_id != old_bed_id:
+                        claim_bed(new_bed_id)
+                        updated_student = serializer.save()
+                        release_bed(old_bed_id)
+                    else:
+                        updated_student = serializer.save()
+            except BedUnavailableError as e:
+                return Response({
+                    "success": False,
+                    "errors": {"allocated_bed": [str(e)]}
+                }, status=status.HTTP_400_BAD_REQUEST)
 
             return Response({
                 "success": True,
@@ -352,12 +419,12 @@ class StudentAPIView(APIView):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     def delete(self, request, student_id):
-        student = get_object_or_404(Student, student_id=student_id)
-        bed = student.allocated_bed
-        student.delete()
-        if bed:
-            bed.is_occupied = False
-            bed.save(update_fields=["is_occupied"])
+        student = get_object_or_404(self.scoped(Student.objects.all()), student_id=student_id)
+        with transaction.atomic():
+            bed_id = student.allocated_bed_id
+            student.delete()
+            if bed_id:
+                release_bed(bed_id)
 
         return Response({
             "success": True,
@@ -365,10 +432,10 @@ class StudentAPIView(APIView):
         }, status=status.HTTP_204_NO_CONTENT)
     
 
-class StudentDetailAPIView(APIView):
+class StudentDetailAPIView(OwnerScopedMixin, APIView):
     def get(self, request, owner_id):
         try:
-            owner = User.objects.filter(user_id=owner_id).first()
+            owner = self.scoped(User.objects.filter(user_id=owner_id)).first()
             if not owner:
                 return Response(
                     {"error": f"Owner with ID {owner_id} not found"}, 
@@ -376,7 +443,7 @@ class StudentDetailAPIView(APIView):
                 )
             
             # Filter students by owner_id
-            students = Student.objects.filter(owner=owner_id)
+            students = self.scoped(Student.objects.filter(owner=owner_id))
             print(f"Found {students.count()} students for owner {owner_id}")
             
             # Serialize the data
@@ -502,6 +569,8 @@ class PremiumSubscriptionView(APIView):
                     # Get the URL from Cloudinary storage
                     receipt_url = subscription.reciept.url if subscription.reciept else None
                     subscription_data["receipt_url"] = receipt_url
+                    subscription_data["thumbnail_url"] = derivative_url(subscription.reciept, "thumbnail")
+                    subscription_data["preview_url"] = derivative_url(subscription.reciept, "preview")
                 except Exception as e:
                     logger.error(f"Error getting receipt URL: {str(e)}")
                     subscription_data["receipt_url"] = str(subscription.reciept) if subscription.reciept else None
@@ -598,9 +667,7 @@ class ReceiptUploadView(APIView):
 class UserSubscriptionView(APIView):
     def get(self, request, user_id):
         """Get subscription details for a specific user"""
-        try:
-            user = User.objects.get(user_id=user_id)
-        except User.DoesNotExist:
+        if not User.objects.filter(user_id=user_id).exists():
             return Response(
                 {
                     "success": False,
@@ -609,8 +676,8 @@ class UserSubscriptionView(APIView):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Get the latest subscription from Subscription model
-        subscription = Subscription.objects.filter(user=user).order_by('-created_at').first()
+        # Get the latest subscription, usually from the cache
+        subscription = latest_subscription(user_id)
         
         if subscription:
             # Generate subscription data based on subscription's account type
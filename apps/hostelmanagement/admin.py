@@ -45,6 +45,8 @@ class RoomAdmin(admin.ModelAdmin):
         "is_available",
         "created_at",
     )
+    # Derived from the bed counters; shown for reference only
+    readonly_fields = ("is_available",)
 
     def get_building(self, obj):
         return obj.floor.building.building_name
@@ -0,0 +1,75 @@
+from django.db.models import Prefetch
+
+from .models import Inventory, RoomInventory
+
+
+def resolve_inventory_types(inventory_types):
+    """
+    Map each inventory type name to its Inventory row, creating missing ones.
+
+    Names must already be validated against Inventory.INVENTORY_CHOICES. One
+    query looks the types up; missing ones are inserted with ON CONFLICT DO
+    NOTHING, so a concurrent request creating the same type is harmless, and
+    read back with one more query.
+    """
+    inventory_types = set(inventory_types)
+    inventories = {
+        inventory.inventory_type: inventory
+        for inventory in Inventory.objects.filter(inventory_type__in=inventory_types)
+    }
+    missing = inventory_types - inventories.keys()
+    if missing:
+        Inventory.objects.bulk_create(
+            [Inventory(inventory_type=inv_type) for inv_type in missing], ignore_conflicts=True
+        )
+        inventories.update(
+            (inventory.inventory_type, inventory)
+            for inventory in Inventory.objects.filter(inventory_type__in=missing)
+        )
+    return inventories
+
+
+def upsert_room_inventories(quantities):
+    """
+    Insert or update RoomInventory rows in a single statement.
+
+    quantities maps (room_id, inventory_type) to the quantity to store; rows
+    that already exist for the same room and inventory get the new quantity.
+    Returns the number of rows written.
+    """
+    if not quantities:
+        return 0
+    inventories = resolve_inventory_types(inv_type for _, inv_type in quantities)
+
+    # Key on the resolved inventory so a batch never touches the same row twice
+    rows = {}
+    for (room_id, inv_type), quantity in quantities.items():
+        inventory = inventories[inv_type]
+        rows[(room_id, inventory.pk)] = RoomInventory(room_id=room_id, inventory=inventory, quantity=quantity)
+
+    RoomInventory.objects.bulk_create(
+        rows.values(),
+        update_conflicts=True,
+        unique_fields=["room", "inventory"],
+        update_fields=["quantity"],
+    )
+    return len(rows)
+
+
+def rooms_with_inventories(rooms):
+    """Prefetch each room's RoomInventory rows and their Inventory in one go."""
+    return rooms.prefetch_related(
+        Prefetch("roominventory_set", queryset=RoomInventory.objects.select_related("inventory"))
+    )
+
+
+def inventory_items(room):
+    """The room's inventory as API items; expects rooms_with_inventories()."""
+    return [
+        {
+            "inventory_id": str(room_inventory.inventory.inventory_id),
+            "name": room_inventory.inventory.inventory_type,
+            "quantity": room_inventory.quantity,
+        }
+        for room_inventory in room.roominventory_set.all()
+    ]
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from apps.hostelmanagement.models import Student
+from core.settings.cloudinary_storage import adopt_files
+
+
+class Command(BaseCommand):
+    help = "Upload Aadhaar images saved to the default storage before Cloudinary to Cloudinary."
+
+    def handle(self, *args, **options):
+        # Each moved file is committed on its own, so a failed run resumes where it stopped
+        moved = adopt_files(Student.objects.all(), "aadhar_image")
+        self.stdout.write(self.style.SUCCESS(f"Moved {moved} Aadhaar images to Cloudinary."))
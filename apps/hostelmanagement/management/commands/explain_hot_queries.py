@@ -0,0 +1,168 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from apps.expenses.models import Expense
+from apps.feemanagement.ledger import fee_ledger, with_last_payment
+from apps.feemanagement.models import CollectFee
+from apps.hostelinfo.models import Subscription, User
+from apps.hostelmanagement.models import Bed, Building, Hostel, Room, Student
+from apps.hostelmanagement.provisioning import bulk_provisioning, provision_building
+from apps.roomallocate.models import StudentRoomIssues
+
+
+def hot_queries(building_id, student_id, user_id, year, month):
+    """
+    The querysets behind the busiest endpoints, most requested first.
+
+    Each entry is (name, queryset, index the plan is expected to use); the
+    index is None where the planner may reasonably pick several.
+    """
+    return [
+        (
+            "students-by-building",
+            with_last_payment(
+                Student.objects.filter(building_id=building_id)
+            ).order_by("-created_at", "-pk")[:50],
+            "student_building_keyset_idx",
+        ),
+        (
+            "available-beds",
+            Bed.objects.filter(building_id=building_id, is_occupied=False),
+            "bed_building_occupied_idx",
+        ),
+        (
+            "latest-subscription",
+            Subscription.objects.filter(user_id=user_id).order_by("-created_at")[:1],
+            "subscription_user_latest_idx",
+        ),
+        ("fee-ledger", fee_ledger(building_id, year, month)[:10], None),
+        (
+            "last-payment",
+            CollectFee.objects.filter(student_id=student_id).order_by("-payment_date")[:1],
+            "fee_student_paid_idx",
+        ),
+        ("room-listing", Room.objects.order_by("-created_at", "-pk")[:50], "room_created_keyset_idx"),
+        (
+            "expenses-by-building",
+            Expense.objects.filter(building_id=building_id).order_by("-date")[:10],
+            "expense_building_date_idx",
+        ),
+        (
+            "student-issues",
+            StudentRoomIssues.objects.filter(student_id=user_id).order_by("-reported_at"),
+            "room_issue_student_idx",
+        ),
+    ]
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN ANALYZE plans for the busiest endpoint queries and check their indexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=None, help="Only explain the N busiest queries")
+        parser.add_argument("--building", help="Building to run the queries for (default: the largest)")
+        parser.add_argument(
+            "--seed",
+            type=int,
+            metavar="ROOMS",
+            help="Explain against a generated building with this many rooms; it is rolled back afterwards",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail if a plan no longer uses the index its query is expected to use",
+        )
+
+    def handle(self, *args, **options):
+        # EXPLAIN ANALYZE executes the queries; run everything in a
+        # transaction that is always rolled back, seed data included.
+        with transaction.atomic():
+            if options["seed"]:
+                building_id = self._seed(options["seed"])
+            else:
+                building_id = options["building"] or self._largest_building()
+            failures = self._explain(building_id, options)
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError("Plans no longer use the expected index: " + ", ".join(failures))
+        self.stdout.write(self.style.SUCCESS("All plans checked." if options["check"] else "Done."))
+
+    def _largest_building(self):
+        building_id = (
+            Building.objects.order_by("-bed_count").values_list("building_id", flat=True).first()
+        )
+        if building_id is None:
+            raise CommandError("No buildings to explain against; pass --seed to generate one.")
+        return building_id
+
+    def _seed(self, rooms):
+        owner = User.objects.create(
+            full_name="Explain Owner",
+            gender="other",
+            phone="+910000000000",
+            email="explain-owner@example.invalid",
+            password="!",
+            role="owner",
+        )
+        Subscription.objects.create(user=owner, account_type="free_trial")
+        hostel = Hostel.objects.create(owner=owner, hostel_name="Explain Hostel")
+        floors = max(rooms // 20, 1)
+        with bulk_provisioning():
+            building = Building.objects.create(
+                hostel=hostel, building_name="Explain Block", total_floors=floors, building_type="coliving"
+            )
+            provision_building(building, rooms_per_floor=max(rooms // floors, 1), beds_per_room=4)
+
+        beds = list(Bed.objects.filter(building=building).values_list("pk", "room_id"))
+        taken = beds[: len(beds) * 3 // 4]
+        students = Student.objects.bulk_create(
+            Student(owner=owner, student_name=f"Student {number}", allocated_bed_id=bed_id, building=building)
+            for number, (bed_id, _) in enumerate(taken)
+        )
+        Bed.objects.filter(pk__in=[bed_id for bed_id, _ in taken]).update(is_occupied=True)
+        CollectFee.objects.bulk_create(
+            CollectFee(student=student, payment_type="Monthly_Rent", amount=5000, payment_method="upi")
+            for student in students
+            for _ in range(3)
+        )
+        StudentRoomIssues.objects.bulk_create(
+            StudentRoomIssues(student=owner, room_id=room_id, issue_type="other")
+            for _, room_id in beds[:50]
+        )
+        Expense.objects.bulk_create(
+            Expense(building=building, date=timezone.localdate(), nature_of_expense="Seed", amount=100)
+            for _ in range(100)
+        )
+
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+        self.stdout.write(f"Seeded {len(beds)} beds and {len(students)} students.")
+        return building.building_id
+
+    def _explain(self, building_id, options):
+        student = (
+            Student.objects.filter(building_id=building_id)
+            .annotate(last_paid=Max("fees__payment_date"))
+            .order_by("-last_paid")
+            .values_list("pk", "owner_id")
+            .first()
+        )
+        student_id, user_id = student or (None, None)
+        now = timezone.localtime()
+        queries = hot_queries(building_id, student_id, user_id, now.year, now.month)[: options["top"]]
+
+        # EXPLAIN ANALYZE is PostgreSQL-only; other backends get the plain plan
+        explain_options = {"analyze": True, "buffers": True} if connection.vendor == "postgresql" else {}
+        failures = []
+        for name, queryset, index in queries:
+            plan = queryset.explain(**explain_options)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"== {name}"))
+            self.stdout.write(plan)
+            if options["check"] and index and index not in plan:
+                self.stdout.write(self.style.ERROR(f"{name}: expected {index}"))
+                failures.append(name)
+        return failures
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.hostelmanagement.occupancy import reconcile_occupancy
+
+
+class Command(BaseCommand):
+    help = "Recount beds and repair drifted occupancy counters on rooms, floors and buildings."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drift, do not repair it")
+
+    def handle(self, *args, **options):
+        drift = reconcile_occupancy(apply=not options["dry_run"])
+        summary = ", ".join(f"{count} {level}" for level, count in drift.items())
+
+        if not any(drift.values()):
+            self.stdout.write(self.style.SUCCESS("Occupancy counters are in sync."))
+        elif options["dry_run"]:
+            self.stdout.write(self.style.WARNING(f"Drift found in {summary}."))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Repaired drift in {summary}."))
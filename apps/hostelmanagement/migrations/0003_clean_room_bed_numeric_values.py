@@ -0,0 +1,55 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations
+
+
+def _clean_amount(value):
+    """Normalise a free-text rent such as ' ₹5,000 ' to '5000.00', or None."""
+    if value is None:
+        return None
+    cleaned = str(value).replace(",", "").replace("₹", "").strip()
+    if not cleaned:
+        return None
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        return None
+    if amount < 0 or amount >= Decimal("100000000"):
+        return None
+    return f"{amount:.2f}"
+
+
+def _clean_count(value):
+    amount = _clean_amount(value)
+    if amount is None:
+        return None
+    return str(int(Decimal(amount)))
+
+
+def clean_numeric_values(apps, schema_editor):
+    Room = apps.get_model("hostelmanagement", "Room")
+    Bed = apps.get_model("hostelmanagement", "Bed")
+
+    rooms = []
+    for room in Room.objects.only("room_id", "total_beds", "monthly_rent").iterator():
+        room.total_beds = _clean_count(room.total_beds)
+        room.monthly_rent = _clean_amount(room.monthly_rent)
+        rooms.append(room)
+    Room.objects.bulk_update(rooms, ["total_beds", "monthly_rent"], batch_size=500)
+
+    beds = []
+    for bed in Bed.objects.only("bed_id", "monthly_rent").iterator():
+        bed.monthly_rent = _clean_amount(bed.monthly_rent)
+        beds.append(bed)
+    Bed.objects.bulk_update(beds, ["monthly_rent"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelmanagement', '0002_remove_hostel_address_remove_hostel_hostel_type_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(clean_numeric_values, migrations.RunPython.noop),
+    ]
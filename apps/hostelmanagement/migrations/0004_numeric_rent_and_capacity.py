@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelmanagement', '0003_clean_room_bed_numeric_values'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bed',
+            name='monthly_rent',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='room',
+            name='monthly_rent',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='room',
+            name='total_beds',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:38
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Bed = apps.get_model("hostelmanagement", "Bed")
+
+    for model_name, path in (
+        ("Room", "room"),
+        ("Floor", "room__floor"),
+        ("Building", "room__floor__building"),
+    ):
+        beds = Bed.objects.filter(**{path: OuterRef("pk")}).order_by().values(path)
+        apps.get_model("hostelmanagement", model_name).objects.update(
+            bed_count=Coalesce(Subquery(beds.annotate(n=Count("pk")).values("n")), 0),
+            occupied_beds=Coalesce(
+                Subquery(beds.filter(is_occupied=True).annotate(n=Count("pk")).values("n")), 0
+            ),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelmanagement', '0004_numeric_rent_and_capacity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='building',
+            name='bed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='building',
+            name='occupied_beds',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='floor',
+            name='bed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='floor',
+            name='occupied_beds',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='bed_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='occupied_beds',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelinfo', '0007_keyset_pagination_indexes'),
+        ('hostelmanagement', '0005_occupancy_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='building',
+            index=models.Index(fields=['created_at', 'building_id'], name='building_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='floor',
+            index=models.Index(fields=['created_at', 'floor_id'], name='floor_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hostel',
+            index=models.Index(fields=['created_at', 'hostel_id'], name='hostel_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['created_at', 'room_id'], name='room_created_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['created_at', 'student_id'], name='student_created_keyset_idx'),
+        ),
+    ]
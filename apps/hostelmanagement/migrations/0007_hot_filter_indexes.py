@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelmanagement', '0006_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bed',
+            index=models.Index(condition=models.Q(('is_occupied', False)), fields=['room'], name='bed_free_by_room_idx'),
+        ),
+    ]
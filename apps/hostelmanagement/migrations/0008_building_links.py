@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_building_links(apps, schema_editor):
+    Bed = apps.get_model("hostelmanagement", "Bed")
+    Floor = apps.get_model("hostelmanagement", "Floor")
+    Student = apps.get_model("hostelmanagement", "Student")
+
+    Bed.objects.update(
+        building_id=Subquery(Floor.objects.filter(rooms=OuterRef("room_id")).values("building_id")[:1])
+    )
+    Student.objects.update(
+        building_id=Subquery(Bed.objects.filter(pk=OuterRef("allocated_bed_id")).values("building_id")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelinfo', '0008_hot_filter_indexes'),
+        ('hostelmanagement', '0007_hot_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bed',
+            name='building',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='beds', to='hostelmanagement.building'),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='building',
+            field=models.ForeignKey(db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='students', to='hostelmanagement.building'),
+        ),
+        migrations.RunPython(backfill_building_links, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='bed',
+            index=models.Index(fields=['building', 'is_occupied'], name='bed_building_occupied_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['building', 'created_at', 'student_id'], name='student_building_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+import core.settings.cloudinary_storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelmanagement', '0008_building_links'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='aadhar_image',
+            field=models.FileField(blank=True, null=True, storage=core.settings.cloudinary_storage.CloudinaryStorage(), upload_to='aadhar/'),
+        ),
+    ]
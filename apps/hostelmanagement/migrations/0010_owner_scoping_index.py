@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelinfo', '0010_stagedupload'),
+        ('hostelmanagement', '0009_aadhar_image_cloudinary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='hostel',
+            name='owner',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='hostels', to='hostelinfo.user'),
+        ),
+        migrations.AddIndex(
+            model_name='hostel',
+            index=models.Index(fields=['owner', 'created_at', 'hostel_id'], name='hostel_owner_keyset_idx'),
+        ),
+    ]
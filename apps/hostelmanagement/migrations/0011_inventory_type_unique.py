@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:26
+
+from django.db import migrations, models
+
+CHOICES = {"fan", "ac", "geyser", "tv", "light"}
+
+
+def merge_duplicate_inventory_types(apps, schema_editor):
+    """
+    Keep the earliest Inventory row of each type and point rooms at it.
+
+    Names that are a choice in another case or with stray spaces ("Fan ")
+    are folded into the choice. A room that already has the kept row keeps
+    its quantity and loses the duplicate's.
+    """
+    Inventory = apps.get_model("hostelmanagement", "Inventory")
+    RoomInventory = apps.get_model("hostelmanagement", "RoomInventory")
+
+    keepers = {}
+    for inventory in Inventory.objects.order_by("created_at", "inventory_id"):
+        normalized = inventory.inventory_type.strip().lower()
+        key = normalized if normalized in CHOICES else inventory.inventory_type
+        keeper = keepers.setdefault(key, inventory)
+        if keeper is inventory:
+            continue
+        kept_rooms = RoomInventory.objects.filter(inventory=keeper).values("room_id")
+        RoomInventory.objects.filter(inventory=inventory, room_id__in=kept_rooms).delete()
+        RoomInventory.objects.filter(inventory=inventory).update(inventory=keeper)
+        inventory.delete()
+
+    for key, keeper in keepers.items():
+        if keeper.inventory_type != key:
+            keeper.inventory_type = key
+            keeper.save(update_fields=["inventory_type"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelmanagement', '0010_owner_scoping_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_inventory_types, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='inventory',
+            constraint=models.UniqueConstraint(fields=('inventory_type',), name='inventory_type_unique'),
+        ),
+    ]
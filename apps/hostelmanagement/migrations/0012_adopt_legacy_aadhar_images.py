@@ -0,0 +1,9 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    # Intentionally empty: copying legacy Aadhaar images to Cloudinary needs
+    # credentials and network access, so it runs as the adopt_aadhar_images
+    # management command instead of on every migrate.
+    dependencies = [('hostelmanagement', '0011_inventory_type_unique')]
+    operations = []
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelmanagement', '0012_adopt_legacy_aadhar_images'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='room',
+            name='is_available',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+    ]
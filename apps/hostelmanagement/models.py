@@ -2,23 +2,65 @@ import uuid
 from django.db import models
 
 from apps.hostelinfo.models import User
+from core.settings.cloudinary_storage import CloudinaryStorage
+from core.settings.tenancy import OwnedQuerySet
 
 
 
 # ------------------ Hostel Model ------------------
 class Hostel(models.Model):
     hostel_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="hostels")
+    # hostel_owner_keyset_idx covers lookups by owner
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="hostels", db_index=False)
     hostel_name = models.CharField(max_length=200)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    owner_lookup = "owner"
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "hostel_id"], name="hostel_created_keyset_idx"),
+            models.Index(fields=["owner", "created_at", "hostel_id"], name="hostel_owner_keyset_idx"),
+        ]
+
     def __str__(self):
         return self.hostel_name
 
 
+# ------------------ Occupancy counters ------------------
+class OccupancyCounters(models.Model):
+    """
+    Bed totals kept in step with Bed rows by hostelmanagement.occupancy.
+
+    The counters are only ever changed with F() updates, so a full save() of
+    an instance loaded earlier must not write its stale copy back.
+    """
+    bed_count = models.PositiveIntegerField(default=0, editable=False)
+    occupied_beds = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ("bed_count", "occupied_beds")
+
+    class Meta:
+        abstract = True
+
+    @property
+    def available_beds(self):
+        return max(self.bed_count - self.occupied_beds, 0)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and not kwargs.get("force_insert") and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
 # ------------------ Building Model ------------------
-class Building(models.Model):
+class Building(OccupancyCounters):
     hostel = models.ForeignKey(Hostel, on_delete=models.CASCADE, related_name="buildings")
     building_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     building_name = models.CharField(max_length=200)
@@ -32,6 +74,14 @@ class Building(models.Model):
     building_type = models.CharField(max_length=10, choices=BUILDING_TYPE_CHOICES)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    owner_lookup = "hostel__owner"
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "building_id"], name="building_created_keyset_idx"),
+        ]
+
     def __str__(self):
         return self.building_name
 
@@ -39,13 +89,21 @@ class Building(models.Model):
 
 
 # ------------------ Floor Model ------------------
-class Floor(models.Model):
+class Floor(OccupancyCounters):
     building = models.ForeignKey(Building, on_delete=models.CASCADE, related_name="floors")
     floor_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     floor_number = models.IntegerField()
     total_rooms = models.IntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    owner_lookup = "building__hostel__owner"
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "floor_id"], name="floor_created_keyset_idx"),
+        ]
+
     def __str__(self):
         return f"{self.building.building_name} - Floor {self.floor_number}"
 
@@ -64,11 +122,17 @@ class Inventory(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        constraints = [
+            # One row per type, so concurrent creates cannot add a second one
+            models.UniqueConstraint(fields=["inventory_type"], name="inventory_type_unique"),
+        ]
+
     def __str__(self):
         return self.inventory_type
 
 # ------------------ Room Model ------------------
-class Room(models.Model):
+class Room(OccupancyCounters):
     room_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     floor = models.ForeignKey(Floor, on_delete=models.CASCADE, related_name="rooms")
     room_number = models.CharField(max_length=20, null=True, blank=True)
@@ -85,14 +149,26 @@ class Room(models.Model):
     ]
     preference = models.CharField(max_length=10, choices=PREFERENCE_TYPE, null=True, blank=True)
 
-    total_beds = models.CharField(max_length=20, null=True, blank=True)
-    monthly_rent = models.CharField(max_length=20, null=True, blank=True)
-    is_available = models.BooleanField(default=True)
+    total_beds = models.PositiveIntegerField(null=True, blank=True)
+    monthly_rent = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    # Follows bed_count > occupied_beds; set by the occupancy updates, never by hand
+    is_available = models.BooleanField(default=True, editable=False)
     inventories = models.ManyToManyField(Inventory, through="RoomInventory", related_name="rooms")
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    owner_lookup = "floor__building__hostel__owner"
+    objects = OwnedQuerySet.as_manager()
+
+    # is_available is moved by the same UPDATEs as the counters
+    COUNTER_FIELDS = OccupancyCounters.COUNTER_FIELDS + ("is_available",)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "room_id"], name="room_created_keyset_idx"),
+        ]
+
     def __str__(self):
         return f"Room {self.room_number} ({self.room_type})"
 
@@ -110,12 +186,26 @@ class RoomInventory(models.Model):
 # ------------------ Bed Model ------------------
 class Bed(models.Model):
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="beds")
+    # Copy of room.floor.building, kept in sync by hostelmanagement.placement
+    building = models.ForeignKey(
+        Building, on_delete=models.CASCADE, related_name="beds", null=True, editable=False, db_index=False
+    )
     bed_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     bed_number = models.CharField(max_length=10)
     is_occupied = models.BooleanField(default=False)
-    monthly_rent = models.CharField(max_length=20, null=True, blank=True)
+    monthly_rent = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    owner_lookup = "building__hostel__owner"
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Free-bed lookups only ever touch unoccupied rows
+            models.Index(fields=["room"], condition=models.Q(is_occupied=False), name="bed_free_by_room_idx"),
+            models.Index(fields=["building", "is_occupied"], name="bed_building_occupied_idx"),
+        ]
+
     def __str__(self):
         return f"Bed {self.bed_number} - Room {self.room.room_number}" if self.room else str(self.bed_id)
 
@@ -129,14 +219,27 @@ class Student(models.Model):
     mobile_number = models.CharField(max_length=10, null=True, blank=True, unique=True)
     aadhar_number = models.CharField(max_length=12, null=True, blank=True, unique=True)
     address = models.TextField(null=True, blank=True)
-    aadhar_image = models.FileField(upload_to="aadhar/", null=True, blank=True)
+    aadhar_image = models.FileField(upload_to="aadhar/", storage=CloudinaryStorage(), null=True, blank=True)
     allocated_bed = models.ForeignKey(Bed, on_delete=models.CASCADE)
+    # Copy of allocated_bed.building; student_building_keyset_idx covers lookups
+    building = models.ForeignKey(
+        Building, on_delete=models.CASCADE, related_name="students", null=True, editable=False, db_index=False
+    )
     date_of_birth = models.DateField(null=True, blank=True)
     emergency_name = models.CharField(max_length=50, null=True, blank=True)
     emergency_phone = models.CharField(max_length=15, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    owner_lookup = "building__hostel__owner"
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["created_at", "student_id"], name="student_created_keyset_idx"),
+            models.Index(fields=["building", "created_at", "student_id"], name="student_building_keyset_idx"),
+        ]
+
     def __str__(self):
         return self.student_name or "Unnamed Student"
 
@@ -0,0 +1,158 @@
+from django.db import transaction
+from django.db.models import BooleanField, Count, ExpressionWrapper, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.dispatch import Signal
+
+from .models import Bed, Building, Floor, Room
+
+# Sent with room_id after a room's counters move, including claims and
+# releases made with queryset updates that bypass the Bed model signals.
+occupancy_changed = Signal()
+
+
+def adjust_occupancy(room_id, beds=0, occupied=0):
+    """
+    Apply a bed/occupancy delta to a room and to its floor and building.
+
+    Every counter is moved with an F() expression in a single UPDATE per level,
+    so concurrent allocations never overwrite each other's changes.
+    """
+    if not room_id or not (beds or occupied):
+        return
+
+    counters = {
+        "bed_count": Greatest(F("bed_count") + beds, 0),
+        "occupied_beds": Greatest(F("occupied_beds") + occupied, 0),
+    }
+    Room.objects.filter(pk=room_id).update(
+        # Compared against the pre-update values, hence the deltas.
+        is_available=ExpressionWrapper(
+            Q(bed_count__gt=F("occupied_beds") + occupied - beds),
+            output_field=BooleanField(),
+        ),
+        **counters,
+    )
+    Floor.objects.filter(rooms=room_id).update(**counters)
+    Building.objects.filter(floors__rooms=room_id).update(**counters)
+    occupancy_changed.send(sender=Room, room_id=room_id)
+
+
+def _move_counters(model, from_pk, to_pk, beds, occupied):
+    if not (beds or occupied):
+        return
+    for pk, sign in ((from_pk, -1), (to_pk, 1)):
+        model.objects.filter(pk=pk).update(
+            bed_count=Greatest(F("bed_count") + sign * beds, 0),
+            occupied_beds=Greatest(F("occupied_beds") + sign * occupied, 0),
+        )
+
+
+def move_room_occupancy(room_id, from_floor_id):
+    """
+    Carry a room's bed totals from its old floor (and building) to its new one.
+
+    The room row is locked first, so a bed claim in the room cannot move the
+    counters between reading them and moving them.
+    """
+    with transaction.atomic():
+        row = (
+            Room.objects.select_for_update()
+            .filter(pk=room_id)
+            .values_list("floor_id", "floor__building_id", "bed_count", "occupied_beds")
+            .first()
+        )
+        if row is None:
+            return
+        floor_id, building_id, beds, occupied = row
+        from_building_id = Floor.objects.filter(pk=from_floor_id).values_list("building_id", flat=True).first()
+        _move_counters(Floor, from_floor_id, floor_id, beds, occupied)
+        if from_building_id != building_id:
+            _move_counters(Building, from_building_id, building_id, beds, occupied)
+
+
+def move_floor_occupancy(floor_id, from_building_id):
+    """Carry a floor's bed totals from its old building to its new one."""
+    with transaction.atomic():
+        row = (
+            Floor.objects.select_for_update()
+            .filter(pk=floor_id)
+            .values_list("building_id", "bed_count", "occupied_beds")
+            .first()
+        )
+        if row is not None:
+            building_id, beds, occupied = row
+            _move_counters(Building, from_building_id, building_id, beds, occupied)
+
+
+def _bed_totals(path):
+    """Subqueries counting all and occupied beds for the row at OuterRef("pk")."""
+    beds = Bed.objects.filter(**{path: OuterRef("pk")}).order_by().values(path)
+    total = beds.annotate(n=Count("pk")).values("n")
+    occupied = beds.filter(is_occupied=True).annotate(n=Count("pk")).values("n")
+    return Coalesce(Subquery(total), 0), Coalesce(Subquery(occupied), 0)
+
+
+def reconcile_occupancy(apply=True):
+    """
+    Recount beds from source rows and repair any counters that drifted.
+
+    Returns {"rooms": n, "floors": n, "buildings": n} with the number of rows
+    whose stored counters did not match.
+    """
+    drift = {}
+    for key, model, path in (
+        ("rooms", Room, "room"),
+        ("floors", Floor, "room__floor"),
+        ("buildings", Building, "room__floor__building"),
+    ):
+        total, occupied = _bed_totals(path)
+        rows = model.objects.annotate(actual_beds=total, actual_occupied=occupied)
+        in_sync = Q(bed_count=F("actual_beds"), occupied_beds=F("actual_occupied"))
+        if model is Room:
+            in_sync &= Q(is_available=ExpressionWrapper(
+                Q(actual_beds__gt=F("actual_occupied")), output_field=BooleanField()
+            ))
+        drifted = list(rows.exclude(in_sync).values_list("pk", "actual_beds", "actual_occupied"))
+        drift[key] = len(drifted)
+
+        if apply:
+            for pk, actual_beds, actual_occupied in drifted:
+                values = {"bed_count": actual_beds, "occupied_beds": actual_occupied}
+                if model is Room:
+                    values["is_available"] = actual_beds > actual_occupied
+                model.objects.filter(pk=pk).update(**values)
+    return drift
+
+
+class BedUnavailableError(Exception):
+    """The bed does not exist or another allocation claimed it first."""
+
+
+def claim_bed(bed_id):
+    """
+    Mark a free bed as occupied and return it, or raise BedUnavailableError.
+
+    The claim is a single conditional UPDATE (... WHERE is_occupied = false),
+    so of two concurrent requests for the same bed exactly one succeeds; the
+    other blocks on the row lock and then matches no rows. Queryset updates
+    skip the Bed signals, so the occupancy counters are moved here.
+    """
+    with transaction.atomic():
+        claimed = Bed.objects.filter(pk=bed_id, is_occupied=False).update(is_occupied=True)
+        bed = Bed.objects.select_related("room").filter(pk=bed_id).first()
+        if bed is None:
+            raise BedUnavailableError("Bed not found")
+        if not claimed:
+            raise BedUnavailableError(f"Bed {bed.bed_number} in Room {bed.room.room_number} is already occupied")
+        adjust_occupancy(bed.room_id, occupied=1)
+    return bed
+
+
+def release_bed(bed_id):
+    """Mark a bed as free again. Returns False if it was not occupied."""
+    with transaction.atomic():
+        room_id = Bed.objects.filter(pk=bed_id).values_list("room_id", flat=True).first()
+        released = Bed.objects.filter(pk=bed_id, is_occupied=True).update(is_occupied=False)
+        if released:
+            adjust_occupancy(room_id, occupied=-1)
+    return bool(released)
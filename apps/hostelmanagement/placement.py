@@ -0,0 +1,30 @@
+"""
+Denormalized building links on beds and students.
+
+Bed.building and Student.building repeat what room.floor.building and
+allocated_bed.building already say, so building-scoped queries can filter a
+single table instead of joining Student -> Bed -> Room -> Floor -> Building.
+The signals in signals.py keep them current: a bed follows its room, a
+student follows their bed, and moving a room or floor re-points everything
+beneath it.
+"""
+from .models import Bed, Floor, Room, Student
+
+
+def building_id_for_room(room_id):
+    """Resolve the building of a room with a single indexed lookup."""
+    return Floor.objects.filter(rooms=room_id).values_list("building_id", flat=True).first()
+
+
+def building_id_for_student(student_id):
+    return Student.objects.filter(pk=student_id).values_list("building_id", flat=True).first()
+
+
+def relink_rooms(rooms, building_id):
+    """Point the beds in these rooms, and the students on them, at building_id."""
+    Bed.objects.filter(room__in=rooms).update(building_id=building_id)
+    Student.objects.filter(allocated_bed__room__in=rooms).update(building_id=building_id)
+
+
+def relink_floor(floor):
+    relink_rooms(Room.objects.filter(floor=floor), floor.building_id)
@@ -0,0 +1,214 @@
+"""
+Bulk creation of the floor -> room -> bed tree.
+
+The per-row signals in signals.py used to create floors, rooms and beds one
+object at a time, each save firing further signals. The functions here build
+the same rows with bulk_create and keep the occupancy counters in step with a
+handful of set-based UPDATEs. Inside bulk_provisioning() the per-row signals
+stand down so callers can provision a whole batch themselves.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, ExpressionWrapper, F, PositiveIntegerField, Q, Value, When
+from django.dispatch import Signal
+
+from .models import Bed, Building, Floor, Room
+
+_state = threading.local()
+
+# Sent with building_id after rows were written with bulk_create or
+# bulk_update, neither of which sends post_save signals of its own.
+building_provisioned = Signal()
+
+
+@contextmanager
+def bulk_provisioning():
+    """Run a block in one transaction with the provisioning signals suspended."""
+    depth = getattr(_state, "depth", 0)
+    _state.depth = depth + 1
+    try:
+        with transaction.atomic():
+            yield
+    finally:
+        _state.depth = depth
+
+
+def signals_suspended():
+    return getattr(_state, "depth", 0) > 0
+
+
+def _add_bed_counts(model, deltas, **extra):
+    """bed_count += deltas[pk] for every row, in a single UPDATE."""
+    if not deltas:
+        return
+    increment = Case(
+        *[When(pk=pk, then=Value(count)) for pk, count in deltas.items()],
+        default=Value(0),
+        output_field=PositiveIntegerField(),
+    )
+    model.objects.filter(pk__in=deltas).update(bed_count=F("bed_count") + increment, **extra)
+
+
+def provision_floors(building):
+    """Create floors 1..total_floors for a new building."""
+    floors = [
+        Floor(building=building, floor_number=number)
+        for number in range(1, (building.total_floors or 0) + 1)
+    ]
+    return Floor.objects.bulk_create(floors)
+
+
+def provision_rooms(missing_rooms):
+    """
+    Create empty rooms for each floor, {floor_id: number of rooms to add}.
+
+    New rooms have no beds yet, so they start out unavailable.
+    """
+    rooms = [
+        Room(floor_id=floor_id, room_number="", room_type="NON_AC", is_available=False)
+        for floor_id, count in missing_rooms.items()
+        for _ in range(count)
+    ]
+    return Room.objects.bulk_create(rooms, batch_size=500)
+
+
+def provision_beds(rooms):
+    """
+    Create total_beds beds for every room that has none yet.
+
+    Counters on the rooms, their floors and buildings are raised to match, and
+    the in-memory rooms are updated too. Returns the number of beds created.
+    """
+    rooms = [room for room in rooms if (room.total_beds or 0) > 0]
+    if not rooms:
+        return 0
+
+    furnished = set(
+        Bed.objects.filter(room__in=rooms).values_list("room_id", flat=True).distinct()
+    )
+    beds = []
+    room_deltas = {}
+    floor_deltas = {}
+    for room in rooms:
+        if room.pk in furnished or room.pk in room_deltas:
+            continue
+        beds.extend(Bed(room=room, bed_number=str(number)) for number in range(1, room.total_beds + 1))
+        room_deltas[room.pk] = room.total_beds
+        floor_deltas[room.floor_id] = floor_deltas.get(room.floor_id, 0) + room.total_beds
+    if not beds:
+        return 0
+
+    floor_buildings = dict(Floor.objects.filter(pk__in=floor_deltas).values_list("pk", "building_id"))
+    for bed in beds:
+        bed.building_id = floor_buildings[bed.room.floor_id]
+    Bed.objects.bulk_create(beds, batch_size=1000)
+
+    building_deltas = {}
+    for floor_id, building_id in floor_buildings.items():
+        building_deltas[building_id] = building_deltas.get(building_id, 0) + floor_deltas[floor_id]
+
+    _add_bed_counts(Room, room_deltas, is_available=True)
+    _add_bed_counts(Floor, floor_deltas)
+    _add_bed_counts(Building, building_deltas)
+
+    for room in rooms:
+        if room.pk in room_deltas:
+            room.bed_count += room_deltas[room.pk]
+            room.is_available = True
+    for building_id in building_deltas:
+        building_provisioned.send(sender=Building, building_id=building_id)
+    return len(beds)
+
+
+def sync_room_beds(rooms):
+    """
+    Bulk counterpart of the Room post_save signals: give bedless rooms their
+    beds, set is_available from the bed counters and announce the change.
+    """
+    provision_beds(rooms)
+    Room.objects.filter(pk__in=[room.pk for room in rooms]).update(
+        is_available=ExpressionWrapper(Q(bed_count__gt=F("occupied_beds")), output_field=BooleanField())
+    )
+    # The rooms were written with bulk_update, which sends no post_save
+    building_ids = Floor.objects.filter(pk__in={room.floor_id for room in rooms}).values_list(
+        "building_id", flat=True
+    ).distinct()
+    for building_id in building_ids:
+        building_provisioned.send(sender=Building, building_id=building_id)
+
+
+def provision_building(building, rooms_per_floor=0, beds_per_room=0):
+    """
+    Create the whole floor/room/bed tree of a new building in one transaction.
+
+    When creating the building yourself, do it inside bulk_provisioning() so
+    the create_floors signal does not add a second set of floors.
+    """
+    with bulk_provisioning():
+        floors = provision_floors(building)
+        rooms = []
+        if rooms_per_floor:
+            Floor.objects.filter(building=building).update(total_rooms=rooms_per_floor)
+            rooms = Room.objects.bulk_create(
+                [
+                    Room(
+                        floor=floor,
+                        room_number=f"{floor.floor_number}{number:02d}",
+                        room_type="NON_AC",
+                        total_beds=beds_per_room or None,
+                        is_available=False,
+                    )
+                    for floor in floors
+                    for number in range(1, rooms_per_floor + 1)
+                ],
+                batch_size=500,
+            )
+        provision_beds(rooms)
+    building_provisioned.send(sender=Building, building_id=building.building_id)
+    return floors
+
+
+def update_floor_room_totals(floor_totals):
+    """
+    Set total_rooms on several floors and create the rooms they are missing.
+
+    floor_totals maps floor_id to the new total. As with a single floor save,
+    rooms are only added when a floor's total goes up. Returns one result dict
+    per floor, in the order given.
+    """
+    with bulk_provisioning():
+        floors = {
+            floor.pk: floor
+            for floor in Floor.objects.select_related("building").filter(pk__in=floor_totals)
+        }
+        room_counts = dict(
+            Room.objects.filter(floor_id__in=floors)
+            .values("floor_id")
+            .annotate(count=Count("pk"))
+            .values_list("floor_id", "count")
+        )
+
+        results = []
+        missing_rooms = {}
+        for floor_id, new_total in floor_totals.items():
+            floor = floors[floor_id]
+            previous_total = floor.total_rooms or 0
+            current_count = room_counts.get(floor_id, 0)
+            floor.total_rooms = new_total
+            if new_total > previous_total:
+                missing_rooms[floor_id] = max(new_total - current_count, 0)
+            results.append({
+                "floor": floor,
+                "previous_total_rooms": previous_total,
+                "current_room_count": current_count,
+                "rooms_created": missing_rooms.get(floor_id, 0),
+            })
+
+        Floor.objects.bulk_update(list(floors.values()), ["total_rooms"])
+        provision_rooms(missing_rooms)
+
+    for building_id in {floor.building_id for floor in floors.values()}:
+        building_provisioned.send(sender=Building, building_id=building_id)
+    return results
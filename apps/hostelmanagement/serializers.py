@@ -1,8 +1,65 @@
 
+from decimal import Decimal
+
 from rest_framework import serializers
 from django.db import models
+from django.utils import timezone
+from core.settings.cloudinary_storage import derivative_url
+from .inventory import resolve_inventory_types
 from .models import Bed, Building, Floor, Hostel, Room, Inventory, RoomInventory, Student
 
+
+def format_amount(value):
+    """Render a rent the way the API always has: "5000", "5250.5" or None."""
+    if value is None or value == "":
+        return None
+    return format(Decimal(value).normalize(), "f")
+
+
+class AmountField(serializers.DecimalField):
+    """
+    Rent column stored as a decimal but exposed in the legacy string shape.
+    Blank input is stored as null.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("max_digits", 10)
+        kwargs.setdefault("decimal_places", 2)
+        kwargs.setdefault("required", False)
+        kwargs.setdefault("allow_null", True)
+        super().__init__(**kwargs)
+
+    def validate_empty_values(self, data):
+        if isinstance(data, str) and not data.strip():
+            data = None
+        return super().validate_empty_values(data)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = data.replace(",", "").strip()
+        return super().to_internal_value(data)
+
+    def to_representation(self, value):
+        return format_amount(value)
+
+
+class CountField(serializers.IntegerField):
+    """Bed capacity stored as an integer but exposed as a string, as before."""
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("min_value", 0)
+        kwargs.setdefault("required", False)
+        kwargs.setdefault("allow_null", True)
+        super().__init__(**kwargs)
+
+    def validate_empty_values(self, data):
+        if isinstance(data, str) and not data.strip():
+            data = None
+        return super().validate_empty_values(data)
+
+    def to_representation(self, value):
+        return str(value)
+
 class BedSerializer(serializers.ModelSerializer):
     status = serializers.SerializerMethodField()
     room_number = serializers.CharField(source='room.room_number', read_only=True)
@@ -26,7 +83,7 @@ class BedSerializer(serializers.ModelSerializer):
         return "booked" if obj.is_occupied else "empty"
 
     def get_monthly_rent(self, obj):
-        return obj.monthly_rent or obj.room.monthly_rent
+        return format_amount(obj.monthly_rent or obj.room.monthly_rent)
 
 
 class InventoryDetailSerializer(serializers.ModelSerializer):
@@ -37,14 +94,8 @@ class InventoryDetailSerializer(serializers.ModelSerializer):
         fields = ["inventory_id", "inventory_type", "quantity"]
 
     def get_quantity(self, obj):
-        # Access the room passed via serializer context
-        room = self.context.get("room")
-        if not room:
-            return None
-        try:
-            return RoomInventory.objects.get(room=room, inventory=obj).quantity
-        except RoomInventory.DoesNotExist:
-            return None
+        # Quantities come from the room's prefetched RoomInventory rows, keyed by inventory_id
+        return self.context.get("quantities", {}).get(obj.inventory_id)
 
 
 
@@ -56,6 +107,8 @@ class RoomSerializer(serializers.ModelSerializer):
     floor_id = serializers.UUIDField(source='floor.floor_id', read_only=True)
     building_id = serializers.UUIDField(source='floor.building.building_id', read_only=True)
     hostel_id = serializers.UUIDField(source='floor.building.hostel.hostel_id', read_only=True)
+    total_beds = CountField()
+    monthly_rent = AmountField()
 
     inventories = serializers.SerializerMethodField()  
 
@@ -63,22 +116,55 @@ class RoomSerializer(serializers.ModelSerializer):
         model = Room
         fields = "__all__"
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load everything a room listing renders in a fixed number of queries."""
+        return queryset.select_related("floor__building__hostel").prefetch_related(
+            "beds", "roominventory_set__inventory"
+        )
+
     def create(self, validated_data):
         room = Room.objects.create(**validated_data)
         return room
 
     def get_is_available(self, obj):
-        return obj.beds.filter(is_occupied=False).exists()
+        return obj.available_beds > 0
 
     # ✅ You need this method for SerializerMethodField
     def get_inventories(self, obj):
-        inventories = obj.inventories.all()
-        return InventoryDetailSerializer(inventories, many=True, context={"room": obj}).data
+        room_inventories = obj.roominventory_set.all()
+        if "roominventory_set" not in getattr(obj, "_prefetched_objects_cache", {}):
+            room_inventories = room_inventories.select_related("inventory")
+        quantities = {}
+        inventories = []
+        for room_inventory in room_inventories:
+            quantities[room_inventory.inventory_id] = room_inventory.quantity
+            inventories.append(room_inventory.inventory)
+        return InventoryDetailSerializer(inventories, many=True, context={"quantities": quantities}).data
+
+
+class InventoryTypeField(serializers.ChoiceField):
+    """An Inventory.INVENTORY_CHOICES key, accepted in any case ("Fan" -> "fan")."""
+
+    def __init__(self, **kwargs):
+        super().__init__(choices=Inventory.INVENTORY_CHOICES, **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, str):
+            data = data.strip().lower()
+        return super().to_internal_value(data)
 
 
 class RoomInventoryItemSerializer(serializers.Serializer):
-    inventory_type = serializers.CharField()
-    quantity = serializers.IntegerField(min_value=1)
+    """Inventory entry in a bulk room update."""
+    inventory_type = InventoryTypeField()
+    quantity = serializers.IntegerField(min_value=0, default=1)
+
+
+class InventoryItemSerializer(serializers.Serializer):
+    """Inventory entry of the room and bulk inventory endpoints."""
+    name = InventoryTypeField()
+    quantity = serializers.IntegerField(min_value=0, default=0)
 
 
 class BulkRoomUpdateItemSerializer(serializers.Serializer):
@@ -86,12 +172,13 @@ class BulkRoomUpdateItemSerializer(serializers.Serializer):
     room_number = serializers.CharField(required=False)
     room_type = serializers.CharField(required=False)
     preference = serializers.CharField(required=False)
-    total_beds = serializers.CharField(required=False)
-    monthly_rent = serializers.CharField(required=False)
+    total_beds = CountField()
+    monthly_rent = AmountField()
     is_available = serializers.BooleanField(required=False)
-    inventories = serializers.ListField(
-        child=serializers.DictField(), required=False
-    )
+    inventories = RoomInventoryItemSerializer(many=True, required=False)
+
+    def validate_is_available(self, value):
+        raise serializers.ValidationError("is_available follows the room's free beds and cannot be set.")
 
 class BulkRoomUpdateSerializer(serializers.Serializer):
     rooms = BulkRoomUpdateItemSerializer(many=True)
@@ -107,43 +194,72 @@ class BulkRoomUpdateSerializer(serializers.Serializer):
         """
         pass
 
+    ROOM_FIELDS = ["room_number", "room_type", "preference", "total_beds", "monthly_rent"]
+
     def save(self, **kwargs):
         """
-        Handle bulk update manually.
+        Handle bulk update manually, with a fixed number of queries per batch:
+        one to load the rooms, one bulk_update, and for inventories one lookup
+        of the types, one delete and one bulk_create.
         """
         rooms_data = self.validated_data.get("rooms", [])
+        # The view passes the rooms its caller may edit; others are reported not found
+        rooms = self.context.get("rooms", Room.objects.all()).in_bulk([room_data["room_id"] for room_data in rooms_data])
         updated_rooms = []
         not_found_ids = []
+        changed_fields = set()
+        inventories_by_room = {}
 
         for room_data in rooms_data:
             room_id = room_data.get("room_id")
-            try:
-                room = Room.objects.get(room_id=room_id)
-            except Room.DoesNotExist:
+            room = rooms.get(room_id)
+            if room is None:
                 not_found_ids.append(str(room_id))
                 continue
 
             # ✅ Update basic fields
-            for field in ["room_number", "room_type", "preference", "total_beds", "monthly_rent", "is_available"]:
+            for field in self.ROOM_FIELDS:
                 if field in room_data:
                     setattr(room, field, room_data[field])
-            room.save()
+                    changed_fields.add(field)
 
-            # ✅ Handle inventories if provided
+            # ✅ Inventories provided for a room replace its current ones
             inventories_data = room_data.get("inventories", [])
             if inventories_data:
-                # Clear and recreate
-                RoomInventory.objects.filter(room=room).delete()
-                for inv in inventories_data:
-                    inv_type = inv.get("inventory_type")
-                    quantity = inv.get("quantity", 1)
-                    inventory_obj, _ = Inventory.objects.get_or_create(inventory_type=inv_type)
-                    RoomInventory.objects.create(room=room, inventory=inventory_obj, quantity=quantity)
+                inventories_by_room[room.pk] = {
+                    inv.get("inventory_type"): inv.get("quantity", 1) for inv in inventories_data
+                }
 
             updated_rooms.append(room)
 
+        if updated_rooms:
+            # bulk_update skips auto_now, so stamp updated_at ourselves
+            touched = {room.pk: room for room in updated_rooms}
+            now = timezone.now()
+            for room in touched.values():
+                room.updated_at = now
+            Room.objects.bulk_update(
+                list(touched.values()),
+                [field for field in self.ROOM_FIELDS if field in changed_fields] + ["updated_at"],
+                batch_size=500,
+            )
+
+        if inventories_by_room:
+            self._replace_inventories(inventories_by_room)
+
         return {"updated_rooms": updated_rooms, "not_found": not_found_ids}
 
+    def _replace_inventories(self, inventories_by_room):
+        inventories = resolve_inventory_types(
+            inv_type for items in inventories_by_room.values() for inv_type in items
+        )
+        RoomInventory.objects.filter(room_id__in=inventories_by_room).delete()
+        RoomInventory.objects.bulk_create([
+            RoomInventory(room_id=room_id, inventory=inventories[inv_type], quantity=quantity)
+            for room_id, items in inventories_by_room.items()
+            for inv_type, quantity in items.items()
+        ])
+
 
 class FloorSerializer(serializers.ModelSerializer):
     rooms = RoomSerializer(many=True, read_only=True)
@@ -202,7 +318,7 @@ class FloorTotalRoomsUpdateSerializer(serializers.Serializer):
     
     def validate_floor(self, value):
         try:
-            floor = Floor.objects.get(floor_id=value)
+            floor = self.context.get("floors", Floor.objects.all()).get(floor_id=value)
             return floor
         except Floor.DoesNotExist:
             raise serializers.ValidationError("Floor not found")
@@ -220,6 +336,14 @@ class BulkFloorTotalRoomsUpdateSerializer(serializers.Serializer):
 
 class StudentSerializer(serializers.ModelSerializer):
     allocated_bed = BedSerializer(read_only=True)
+    thumbnail_url = serializers.SerializerMethodField()
+    preview_url = serializers.SerializerMethodField()
+
+    def get_thumbnail_url(self, obj):
+        return derivative_url(obj.aadhar_image, "thumbnail")
+
+    def get_preview_url(self, obj):
+        return derivative_url(obj.aadhar_image, "preview")
 
     class Meta:
         model = Student
@@ -230,6 +354,8 @@ class StudentSerializer(serializers.ModelSerializer):
             'aadhar_number',
             'address',
             'aadhar_image',
+            'thumbnail_url',
+            'preview_url',
             'date_of_birth',
             'emergency_name',
             'emergency_phone',
@@ -260,44 +386,46 @@ class StudentSimpleSerializer(serializers.ModelSerializer):
                 return 0
         return 0
     
+    def _last_payment(self, obj):
+        """
+        (date, amount) of the student's most recent payment.
+
+        Reads the annotations added by feemanagement.ledger.with_last_payment
+        and only falls back to a query when the queryset was not annotated.
+        """
+        if not hasattr(obj, "last_payment_date"):
+            from apps.feemanagement.models import CollectFee
+            last_fee = CollectFee.objects.filter(
+                student=obj,
+            ).order_by('-payment_date').values('payment_date', 'amount').first()
+            obj.last_payment_date = last_fee['payment_date'] if last_fee else None
+            obj.last_payment_amount = last_fee['amount'] if last_fee else None
+        return obj.last_payment_date, obj.last_payment_amount
+
     def get_due_amount(self, obj):
         """Calculate due amount: monthly rent - last payment amount"""
-        from apps.feemanagement.models import CollectFee
-        
         monthly_rent = self.get_monthly_rent(obj)
-        
-        # Get the most recent Monthly_Rent payment amount
-        last_payment = CollectFee.objects.filter(
-            student=obj,
-        ).order_by('-payment_date').first()
-        
-        # Get the last payment amount
-        last_payment_amount = float(last_payment.amount) if last_payment else 0
-        
+        _, amount = self._last_payment(obj)
+        last_payment_amount = float(amount) if amount is not None else 0
+
         due = monthly_rent - last_payment_amount
-        return max(due, 0) 
-    
+        return max(due, 0)
+
     def get_status(self, obj):
         """Return 'overdue' if due amount is present, else 'pending'"""
         due_amount = self.get_due_amount(obj)
         return 'overdue' if due_amount > 0 else 'paid'
-    
+
     def get_last_payment(self, obj):
-        """Get the date of the most recent Monthly_Rent payment from CollectFee"""
-        from apps.feemanagement.models import CollectFee
-        last_fee = CollectFee.objects.filter(
-            student=obj,
-        ).order_by('-payment_date').first()
-        return last_fee.payment_date if last_fee else None
-    
+        """Get the date of the most recent payment"""
+        payment_date, _ = self._last_payment(obj)
+        return payment_date
+
     def get_payment_amount(self, obj):
-        """Get the amount of the most recent Monthly_Rent payment from CollectFee"""
-        from apps.feemanagement.models import CollectFee
-        last_fee = CollectFee.objects.filter(
-            student=obj,
-        ).order_by('-payment_date').first()
-        return float(last_fee.amount) if last_fee else 0
-    
+        """Get the amount of the most recent payment"""
+        _, amount = self._last_payment(obj)
+        return float(amount) if amount is not None else 0
+
     class Meta:
         model = Student
         fields = [
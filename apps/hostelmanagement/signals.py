@@ -1,16 +1,15 @@
-from django.db.models.signals import post_save, pre_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
-from .models import Bed, Building, Floor, Room
+from .models import Bed, Building, Floor, Room, Student
+from .occupancy import adjust_occupancy, move_floor_occupancy, move_room_occupancy
+from .placement import building_id_for_room, relink_floor, relink_rooms
+from .provisioning import provision_beds, provision_floors, provision_rooms, signals_suspended
 
 
 @receiver(post_save, sender=Building)
 def create_floors(sender, instance, created, **kwargs):
-    if created:
-        for i in range(instance.total_floors):
-            Floor.objects.create(
-                building=instance,
-                floor_number=i + 1,
-            )
+    if created and not signals_suspended():
+        provision_floors(instance)
 
 
 @receiver(pre_save, sender=Floor)
@@ -19,32 +18,17 @@ def create_rooms_based_on_total_rooms(sender, instance, **kwargs):
     Automatically create rooms when total_rooms is increased
     This signal will be triggered before saving the Floor instance
     """
-    if instance.pk:  # Only for existing floors (not new ones)
-        try:
-            old_instance = Floor.objects.get(pk=instance.pk)
-            old_total_rooms = old_instance.total_rooms or 0
-            new_total_rooms = instance.total_rooms or 0
-            
-            # Only create rooms if total_rooms is being increased
-            if new_total_rooms > old_total_rooms:
-                current_room_count = old_instance.rooms.count()
-                rooms_to_create = new_total_rooms - current_room_count
-                
-                # Create the additional rooms
-                for i in range(rooms_to_create):
-                    room_number = ""
-                    
-                    Room.objects.create(
-                        floor=instance,
-                        room_number=room_number,
-                        room_type="NON_AC",  
-                        monthly_rent="",   
-                        total_beds="",
-                        is_available=True
-                    )
-        except Floor.DoesNotExist:
-            # Floor doesn't exist yet, skip room creation
-            pass
+    if instance._state.adding or signals_suspended():
+        # Floor doesn't exist yet, or rooms are being provisioned in bulk
+        return
+
+    old_total_rooms = Floor.objects.filter(pk=instance.pk).values_list("total_rooms", flat=True).first() or 0
+    new_total_rooms = instance.total_rooms or 0
+
+    # Only create rooms if total_rooms is being increased
+    if new_total_rooms > old_total_rooms:
+        current_room_count = Room.objects.filter(floor=instance).count()
+        provision_rooms({instance.pk: max(new_total_rooms - current_room_count, 0)})
 
 
 @receiver(post_save, sender=Room)
@@ -54,22 +38,98 @@ def sync_beds_with_total_beds(sender, instance, created, **kwargs):
     - If the room already has beds, leave them unchanged regardless of total_beds updates.
     - If there are no beds and total_beds > 0, create exactly total_beds beds.
     """
-    try:
-        total_beds = int(instance.total_beds) if instance.total_beds else 0
-    except ValueError:
-        total_beds = 0  # fallback if total_beds is not a valid integer
-
-    current_beds_count = instance.beds.count()
-
-    # Only create beds if none exist yet
-    if current_beds_count == 0 and total_beds > 0:
-        for index in range(1, total_beds + 1):
-            Bed.objects.create(
-                room=instance,
-                bed_number=str(index),
-            )
-
-    # Update room availability flag based on any unoccupied bed
-    instance.is_available = instance.beds.filter(is_occupied=False).exists()
+    if signals_suspended():
+        return
+
+    provision_beds([instance])
+
+    # Update room availability flag from the maintained bed counters
+    instance.refresh_from_db(fields=["bed_count", "occupied_beds"])
+    instance.is_available = instance.available_beds > 0
     # Save only the availability field to avoid re-triggering unnecessary changes
     Room.objects.filter(pk=instance.pk).update(is_available=instance.is_available)
+
+
+@receiver(pre_save, sender=Bed)
+def remember_bed_occupancy(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored room and occupancy so post_save can apply the delta."""
+    if instance._state.adding:
+        instance._previous_occupancy = None
+    elif update_fields is not None and not {"room", "room_id", "is_occupied"} & set(update_fields):
+        instance._previous_occupancy = (instance.room_id, instance.is_occupied)
+    else:
+        instance._previous_occupancy = (
+            Bed.objects.filter(pk=instance.pk).values_list("room_id", "is_occupied").first()
+        )
+
+
+@receiver(post_save, sender=Bed)
+def update_occupancy_counters(sender, instance, created, **kwargs):
+    previous = getattr(instance, "_previous_occupancy", None)
+    if created or previous is None:
+        adjust_occupancy(instance.room_id, beds=1, occupied=int(instance.is_occupied))
+        return
+
+    previous_room_id, was_occupied = previous
+    if previous_room_id != instance.room_id:
+        adjust_occupancy(previous_room_id, beds=-1, occupied=-int(was_occupied))
+        adjust_occupancy(instance.room_id, beds=1, occupied=int(instance.is_occupied))
+    elif was_occupied != instance.is_occupied:
+        adjust_occupancy(instance.room_id, occupied=1 if instance.is_occupied else -1)
+
+
+@receiver(post_delete, sender=Bed)
+def release_occupancy_counters(sender, instance, **kwargs):
+    adjust_occupancy(instance.room_id, beds=-1, occupied=-int(instance.is_occupied))
+
+
+@receiver(pre_save, sender=Bed)
+def set_bed_building(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {"room", "room_id"} & set(update_fields):
+        instance.building_id = building_id_for_room(instance.room_id)
+
+
+@receiver(pre_save, sender=Student)
+def set_student_building(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or {"allocated_bed", "allocated_bed_id"} & set(update_fields):
+        instance.building_id = (
+            Bed.objects.filter(pk=instance.allocated_bed_id).values_list("building_id", flat=True).first()
+        )
+
+
+@receiver(pre_save, sender=Room)
+def remember_room_floor(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored floor so post_save can tell whether the room moved."""
+    if instance._state.adding or (update_fields is not None and "floor" not in update_fields):
+        instance._previous_floor_id = None
+    else:
+        instance._previous_floor_id = (
+            Room.objects.filter(pk=instance.pk).values_list("floor_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Room)
+def relink_moved_room(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_floor_id", None)
+    if previous is not None and previous != instance.floor_id:
+        move_room_occupancy(instance.pk, previous)
+        relink_rooms([instance], building_id_for_room(instance.pk))
+
+
+@receiver(pre_save, sender=Floor)
+def remember_floor_building(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored building so post_save can tell whether the floor moved."""
+    if instance._state.adding or (update_fields is not None and "building" not in update_fields):
+        instance._previous_building_id = None
+    else:
+        instance._previous_building_id = (
+            Floor.objects.filter(pk=instance.pk).values_list("building_id", flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Floor)
+def relink_moved_floor(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_building_id", None)
+    if previous is not None and previous != instance.building_id:
+        move_floor_occupancy(instance.pk, previous)
+        relink_floor(instance)
@@ -1 +1,514 @@
-# Create your tests here.
+import importlib
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.apps import apps as django_apps
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.feemanagement.models import CollectFee
+from apps.hostelinfo.models import User
+from apps.hostelinfo.tokens import issue_tokens
+from apps.hostelmanagement.inventory import resolve_inventory_types
+from apps.hostelmanagement.models import Bed, Building, Floor, Hostel, Inventory, Room, RoomInventory, Student
+from apps.hostelmanagement.occupancy import claim_bed, reconcile_occupancy
+from apps.hostelmanagement.provisioning import bulk_provisioning, provision_building
+from core.settings.cloudinary_storage import FakeCloudinaryRemote
+
+
+def make_rooms(owner, rooms, appliances):
+    hostel = Hostel.objects.create(owner=owner, hostel_name="Inventory Hostel")
+    building = Building.objects.create(
+        hostel=hostel, building_name="Block A", total_floors=1, building_type="boys"
+    )
+    floor = building.floors.get()
+    inventories = [
+        Inventory.objects.get_or_create(inventory_type=inventory_type)[0]
+        for inventory_type in ["fan", "ac", "geyser", "tv", "light"][:appliances]
+    ]
+    for number in range(rooms):
+        room = Room.objects.create(floor=floor, room_number=f"1{number:02d}", total_beds=2)
+        RoomInventory.objects.bulk_create(
+            RoomInventory(room=room, inventory=inventory, quantity=index + 1)
+            for index, inventory in enumerate(inventories)
+        )
+    return floor
+
+
+def count_queries(client, url, owner):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, HTTP_AUTHORIZATION=f"Bearer {issue_tokens(owner)['access']}")
+    assert response.status_code == 200
+    data = response.json()
+    # Project-wide listings are paginated, per-floor listings are not
+    return len(queries), data["results"] if isinstance(data, dict) else data
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", ["/api/rooms/", "/api/beds/", "/api/rooms-by-floor/{floor_id}/"])
+def test_room_listing_inventory_query_count_is_constant(client, url):
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    floor = make_rooms(owner, rooms=2, appliances=1)
+    small_count, _ = count_queries(client, url.format(floor_id=floor.floor_id), owner)
+
+    make_rooms(owner, rooms=30, appliances=5)
+    large_count, rooms = count_queries(client, url.format(floor_id=floor.floor_id), owner)
+
+    assert small_count == large_count <= 4
+    expected = {"fan": 1, "ac": 2, "geyser": 3, "tv": 4, "light": 5}
+    for room in rooms:
+        quantities = {item["inventory_type"]: item["quantity"] for item in room["inventories"]}
+        assert quantities and quantities.items() <= expected.items()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("url", ["/api/hostels/", "/api/buildings/", "/api/floors/", "/api/rooms/"])
+def test_listings_are_scoped_to_the_token_owner(client, url):
+    owners = [
+        User.objects.create(
+            full_name=f"Owner {n}", gender="male", phone=f"+91123456789{n}",
+            email=f"owner{n}@example.com", password="password", role="owner",
+        )
+        for n in range(2)
+    ]
+    make_rooms(owners[0], rooms=2, appliances=0)
+    make_rooms(owners[1], rooms=3, appliances=0)
+    token = issue_tokens(owners[0])["access"]
+
+    own = client.get(url, HTTP_AUTHORIZATION=f"Bearer {token}").json()["results"]
+    anonymous = client.get(url).json()["results"]
+
+    model = {"hostels": Hostel, "buildings": Building, "floors": Floor, "rooms": Room}[url.split("/")[2]]
+    assert 0 < len(own) == model.objects.for_owner(owners[0].pk).count() < model.objects.count()
+    assert anonymous == []
+
+
+@pytest.mark.django_db
+def test_detail_views_are_scoped_and_staff_act_for_their_owner(client):
+    owners = [
+        User.objects.create(
+            full_name=f"Owner {n}", gender="male", phone=f"+91123456789{n}",
+            email=f"owner{n}@example.com", password="password", role="owner",
+        )
+        for n in range(2)
+    ]
+    floor = make_rooms(owners[0], rooms=1, appliances=0)
+    building = floor.building
+    urls = [
+        f"/api/hostels/{building.hostel_id}/",
+        f"/api/buildings/{building.building_id}/",
+        f"/api/floors/{floor.floor_id}/",
+        f"/api/rooms/{floor.rooms.get().room_id}/",
+        f"/api/analytics-inventory/{building.building_id}/",
+    ]
+
+    response = client.post(
+        "/api/userregister/",
+        {
+            "full_name": "Warden", "gender": "male", "phone": "+911234567899", "email": "warden@example.com",
+            "password": "password", "confirm_password": "password", "role": "warden",
+        },
+        content_type="application/json",
+        HTTP_AUTHORIZATION=f"Bearer {issue_tokens(owners[0])['access']}",
+    )
+    assert response.status_code == 201, response.json()
+    warden = User.objects.get(email="warden@example.com")
+    assert warden.owner == owners[0]
+    unlinked = User.objects.create(
+        full_name="Worker", gender="male", phone="+911234567898",
+        email="worker@example.com", password="password", role="worker",
+    )
+
+    def statuses(user):
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {issue_tokens(user)['access']}"}
+        return {client.get(url, **auth).status_code for url in urls}
+
+    assert statuses(owners[0]) == statuses(warden) == {200}
+    assert statuses(owners[1]) == statuses(unlinked) == {404}
+    listed = client.get("/api/userregister/", HTTP_AUTHORIZATION=f"Bearer {issue_tokens(warden)['access']}").json()
+    assert {user["email"] for user in listed["results"]} == {"owner0@example.com", "warden@example.com"}
+
+
+@pytest.mark.django_db
+def test_room_rent_and_capacity_are_numeric_but_keep_their_api_shape(client):
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    floor = make_rooms(owner, rooms=0, appliances=0)
+
+    response = client.post(
+        "/api/rooms/",
+        {"floor": str(floor.floor_id), "room_number": "201", "total_beds": "3", "monthly_rent": "5,000"},
+        content_type="application/json",
+    )
+
+    assert response.status_code == 201, response.json()
+    assert (response.json()["total_beds"], response.json()["monthly_rent"]) == ("3", "5000")
+    room = Room.objects.get(room_number="201")
+    assert (room.total_beds, room.monthly_rent) == (3, Decimal("5000.00"))
+
+
+def test_rent_cleanup_migration_normalises_free_text_values():
+    migration = importlib.import_module("apps.hostelmanagement.migrations.0003_clean_room_bed_numeric_values")
+
+    assert migration._clean_amount(" \u20b95,000 ") == "5000.00"
+    assert migration._clean_amount("5250.5") == "5250.50"
+    assert [migration._clean_amount(value) for value in ("", "  ", "n/a", "-10", None)] == [None] * 5
+    assert migration._clean_count("3 ") == "3"
+
+
+@pytest.mark.django_db
+def test_keyset_cursor_bounds_the_index_range(client):
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    for n in range(3):
+        Hostel.objects.create(owner=owner, hostel_name=f"Hostel {n}")
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {issue_tokens(owner)['access']}"}
+    first = client.get("/api/hostels/?page_size=2", **auth).json()
+
+    with CaptureQueriesContext(connection) as queries:
+        second = client.get(first["next"], **auth).json()
+
+    seen = [hostel["hostel_id"] for hostel in first["results"] + second["results"]]
+    assert seen == [str(pk) for pk in Hostel.objects.order_by("-created_at", "-hostel_id").values_list("pk", flat=True)]
+    page_sql = next(q["sql"] for q in queries if q["sql"].startswith("SELECT") and "hostelmanagement_hostel" in q["sql"])
+    # A plain range conjunct next to the OR lets the index seek to the cursor
+    assert '"hostelmanagement_hostel"."created_at" <= ' in page_sql
+
+
+@pytest.mark.django_db
+def test_students_by_building_keeps_numbered_pages_with_a_count(client):
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    floor = make_rooms(owner, rooms=1, appliances=0)
+    beds = list(Bed.objects.filter(room__floor=floor))
+    for n, bed in enumerate(beds):
+        Student.objects.create(student_name=f"Student {n}", allocated_bed=bed)
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {issue_tokens(owner)['access']}"}
+
+    url = f"/api/students-by-building/{floor.building_id}/?page_size=1"
+    first = client.get(url, **auth).json()
+    second = client.get(f"{url}&page=2", **auth).json()
+
+    assert (first["count"], len(first["results"]), len(second["results"])) == (2, 1, 1)
+    assert first["previous"] is None and first["next"]
+
+
+@pytest.mark.django_db
+def test_students_by_building_reads_the_latest_payment_without_per_row_queries(client):
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    floor = make_rooms(owner, rooms=3, appliances=0)
+    Bed.objects.filter(room__floor=floor).update(monthly_rent=5000)
+    students = [
+        Student.objects.create(student_name=f"Student {n}", allocated_bed=bed)
+        for n, bed in enumerate(Bed.objects.filter(room__floor=floor))
+    ]
+    for student in students:
+        CollectFee.objects.create(student=student, payment_type="Monthly_Rent", amount=1000, payment_method="cash")
+        CollectFee.objects.create(student=student, payment_type="Monthly_Rent", amount=3000, payment_method="upi")
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {issue_tokens(owner)['access']}"}
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(f"/api/students-by-building/{floor.building_id}/", **auth)
+
+    rows = response.json()["results"]
+    assert len(rows) == len(students)
+    assert {(row["payment_amount"], row["due_amount"], row["status"]) for row in rows} == {(3000.0, 2000.0, "overdue")}
+    # count + page, however many students there are
+    assert len(queries) <= 3
+
+
+def counters(instance):
+    instance.refresh_from_db(fields=["bed_count", "occupied_beds"])
+    return instance.bed_count, instance.occupied_beds
+
+
+@pytest.mark.django_db
+def test_occupancy_counters_survive_a_stale_full_save():
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    floor = make_rooms(owner, rooms=1, appliances=0)
+    stale = Room.objects.get(floor=floor)
+    for bed in Bed.objects.filter(room=stale):
+        claim_bed(bed.pk)
+
+    stale.room_number = "999"
+    stale.save()
+
+    room = Room.objects.get(pk=stale.pk)
+    assert (room.room_number, room.bed_count, room.occupied_beds, room.is_available) == ("999", 2, 2, False)
+    assert counters(floor) == counters(floor.building) == (2, 2)
+    assert reconcile_occupancy(apply=False) == {"rooms": 0, "floors": 0, "buildings": 0}
+
+
+@pytest.mark.django_db
+def test_moving_a_room_or_floor_moves_its_counters():
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    source = make_rooms(owner, rooms=2, appliances=0)
+    target = make_rooms(owner, rooms=1, appliances=0)
+    room = Room.objects.filter(floor=source).first()
+    claim_bed(Bed.objects.filter(room=room).first().pk)
+
+    room.floor = target
+    room.save()
+
+    assert counters(source) == counters(source.building) == (2, 0)
+    assert counters(target) == counters(target.building) == (4, 1)
+
+    emptied = target.building
+    target.building = source.building
+    target.save()
+
+    assert counters(source.building) == (6, 1)
+    assert counters(emptied) == (0, 0)
+    assert reconcile_occupancy(apply=False) == {"rooms": 0, "floors": 0, "buildings": 0}
+
+
+@pytest.mark.django_db
+def test_beds_and_students_follow_their_room_and_floor_to_a_new_building():
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    source = make_rooms(owner, rooms=1, appliances=0)
+    target = make_rooms(owner, rooms=1, appliances=0)
+    room = Room.objects.get(floor=source)
+    bed = Bed.objects.filter(room=room).first()
+    student = Student.objects.create(student_name="Mover", allocated_bed=bed)
+
+    assert bed.building_id == student.building_id == source.building_id
+
+    room.floor = target
+    room.save()
+
+    assert set(Bed.objects.filter(room=room).values_list("building_id", flat=True)) == {target.building_id}
+    assert Student.objects.get(pk=student.pk).building_id == target.building_id
+
+    target.building = source.building
+    target.save()
+
+    assert set(Bed.objects.filter(room__floor=target).values_list("building_id", flat=True)) == {source.building_id}
+    assert Student.objects.get(pk=student.pk).building_id == source.building_id
+
+
+def provision(owner, floors, rooms_per_floor, beds_per_room):
+    hostel = Hostel.objects.create(owner=owner, hostel_name="Provisioned Hostel")
+    with CaptureQueriesContext(connection) as queries:
+        with bulk_provisioning():
+            building = Building.objects.create(
+                hostel=hostel, building_name="Block P", total_floors=floors, building_type="boys"
+            )
+            provision_building(building, rooms_per_floor=rooms_per_floor, beds_per_room=beds_per_room)
+    return building, len(queries)
+
+
+@pytest.mark.django_db
+def test_provisioning_a_building_takes_a_fixed_number_of_queries():
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    _, small_count = provision(owner, floors=1, rooms_per_floor=1, beds_per_room=1)
+    building, large_count = provision(owner, floors=3, rooms_per_floor=4, beds_per_room=2)
+
+    assert small_count == large_count
+    assert (building.floors.count(), Room.objects.filter(floor__building=building).count()) == (3, 12)
+    assert Bed.objects.filter(building=building).count() == 24
+    assert counters(building) == (24, 0)
+    assert reconcile_occupancy(apply=False) == {"rooms": 0, "floors": 0, "buildings": 0}
+
+
+@pytest.mark.django_db
+def test_raising_floor_room_totals_adds_only_the_missing_rooms(client):
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    floor = make_rooms(owner, rooms=2, appliances=0)
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {issue_tokens(owner)['access']}"}
+
+    response = client.post(
+        "/api/total-rooms-create/", [{"floor": str(floor.floor_id), "total_rooms": 5}], content_type="application/json", **auth
+    )
+
+    assert response.status_code == 200, response.json()
+    floor.refresh_from_db()
+    assert (floor.total_rooms, floor.rooms.count()) == (5, 5)
+
+
+@pytest.mark.django_db
+def test_bulk_room_update_is_set_based(client):
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {issue_tokens(owner)['access']}"}
+
+    def bulk_update(rooms):
+        payload = {
+            "rooms": [
+                {
+                    "room_id": str(room.pk), "room_number": f"R{n}", "total_beds": "2", "monthly_rent": "4,500",
+                    "inventories": [{"inventory_type": "fan", "quantity": 2}, {"inventory_type": "light"}],
+                }
+                for n, room in enumerate(rooms)
+            ] + [{"room_id": "00000000-0000-0000-0000-000000000000", "room_number": "missing"}]
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = client.put("/api/rooms/bulk-update/", payload, content_type="application/json", **auth)
+        assert response.status_code == 200, response.json()
+        return response.json(), len(queries)
+
+    small_building, _ = provision(owner, floors=1, rooms_per_floor=2, beds_per_room=0)
+    large_building, _ = provision(owner, floors=2, rooms_per_floor=4, beds_per_room=0)
+    Inventory.objects.bulk_create([Inventory(inventory_type="fan"), Inventory(inventory_type="light")])
+    _, small_count = bulk_update(Room.objects.filter(floor__building=small_building))
+    data, large_count = bulk_update(Room.objects.filter(floor__building=large_building))
+
+    assert small_count == large_count
+    assert (len(data["updated_rooms"]), data["not_found"]) == (8, ["00000000-0000-0000-0000-000000000000"])
+    rooms = Room.objects.filter(floor__building=large_building)
+    assert {(room.total_beds, room.monthly_rent, room.bed_count, room.is_available) for room in rooms} == {
+        (2, Decimal("4500.00"), 2, True)
+    }
+    assert set(RoomInventory.objects.filter(room__in=rooms).values_list("inventory__inventory_type", "quantity")) == {
+        ("fan", 2), ("light", 1)
+    }
+
+
+@pytest.mark.django_db
+def test_room_availability_cannot_be_set_by_hand(client):
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    room = Room.objects.get(floor=make_rooms(owner, rooms=1, appliances=0))
+
+    response = client.put(
+        "/api/rooms/bulk-update/",
+        {"rooms": [{"room_id": str(room.pk), "is_available": False}]},
+        content_type="application/json",
+        HTTP_AUTHORIZATION=f"Bearer {issue_tokens(owner)['access']}",
+    )
+
+    assert response.status_code == 400
+    assert "is_available" in str(response.json()["rooms"])
+    assert Room.objects.get(pk=room.pk).is_available
+
+
+@pytest.mark.django_db
+def test_room_inventory_names_are_validated_against_the_choices(client):
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    room = Room.objects.get(floor=make_rooms(owner, rooms=1, appliances=0))
+    url = f"/api/room/{room.room_id}/inventories/"
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {issue_tokens(owner)['access']}"}
+
+    for name in ("x" * 40, "fridge"):
+        response = client.put(url, {"inventory_type": [{"name": name, "quantity": 1}]}, content_type="application/json", **auth)
+        assert response.status_code == 400
+    response = client.put(url, {"inventory_type": [{"name": " Fan", "quantity": 3}]}, content_type="application/json", **auth)
+
+    assert response.status_code == 200
+    assert list(RoomInventory.objects.filter(room=room).values_list("inventory__inventory_type", "quantity")) == [("fan", 3)]
+
+
+@pytest.mark.django_db
+def test_inventory_types_are_created_once():
+    existing = Inventory.objects.create(inventory_type="tv")
+
+    first = resolve_inventory_types(["tv", "ac"])
+    second = resolve_inventory_types(["ac", "tv"])
+
+    assert first["tv"] == second["tv"] == existing
+    assert first["ac"] == second["ac"]
+    assert Inventory.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_inventory_migration_merges_types_that_differ_only_in_case():
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    rooms = list(Room.objects.filter(floor=make_rooms(owner, rooms=2, appliances=0)))
+    keeper = Inventory.objects.create(inventory_type="Fan ")
+    duplicate = Inventory.objects.create(inventory_type="fan")
+    RoomInventory.objects.create(room=rooms[0], inventory=keeper, quantity=1)
+    RoomInventory.objects.create(room=rooms[0], inventory=duplicate, quantity=5)
+    RoomInventory.objects.create(room=rooms[1], inventory=duplicate, quantity=2)
+
+    migration = importlib.import_module("apps.hostelmanagement.migrations.0011_inventory_type_unique")
+    migration.merge_duplicate_inventory_types(django_apps, None)
+
+    assert list(Inventory.objects.values_list("pk", "inventory_type")) == [(keeper.pk, "fan")]
+    assert set(RoomInventory.objects.values_list("room_id", "quantity")) == {(rooms[0].pk, 1), (rooms[1].pk, 2)}
+
+
+@pytest.mark.django_db
+def test_explain_hot_queries_explains_seeded_data_and_rolls_it_back():
+    out = StringIO()
+
+    call_command("explain_hot_queries", seed=20, top=3, stdout=out)
+
+    output = out.getvalue()
+    for name in ("students-by-building", "available-beds", "latest-subscription"):
+        assert f"== {name}" in output
+    assert "== fee-ledger" not in output
+    assert not Building.objects.exists() and not User.objects.exists()
+
+
+
+@pytest.mark.django_db
+def test_legacy_aadhar_images_are_moved_to_cloudinary(settings, tmp_path):
+    settings.CLOUDINARY_REMOTE = "core.settings.cloudinary_storage.FakeCloudinaryRemote"
+    settings.MEDIA_ROOT = str(tmp_path)
+    FakeCloudinaryRemote.reset()
+    legacy_storage = FileSystemStorage(location=tmp_path)
+    legacy_storage.save("aadhar/card.jpg", ContentFile(b"card"))
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    floor = make_rooms(owner, rooms=1, appliances=0)
+    legacy, lost = (
+        Student.objects.create(student_name=f"Student {n}", allocated_bed=bed)
+        for n, bed in enumerate(Bed.objects.filter(room__floor=floor))
+    )
+    Student.objects.filter(pk=legacy.pk).update(aadhar_image="aadhar/card.jpg")
+    Student.objects.filter(pk=lost.pk).update(aadhar_image="aadhar/gone.jpg")
+
+    out = StringIO()
+    call_command("adopt_aadhar_images", stdout=out)
+    call_command("adopt_aadhar_images", stdout=out)
+    assert out.getvalue().splitlines() == [
+        "Moved 1 Aadhaar images to Cloudinary.", "Moved 0 Aadhaar images to Cloudinary."
+    ]
+
+    legacy.refresh_from_db()
+    assert legacy.aadhar_image.name.startswith("aadhar/") and legacy.aadhar_image.name != "aadhar/card.jpg"
+    assert FakeCloudinaryRemote.resources[legacy.aadhar_image.name] == b"card"
+    assert Student.objects.get(pk=lost.pk).aadhar_image.name == "aadhar/gone.jpg"
+    FakeCloudinaryRemote.reset()
@@ -0,0 +1,23 @@
+from django.db.models import Prefetch
+
+from .models import Bed, Floor, Room
+
+
+def building_tree(building_id, beds=True, students=False):
+    """
+    Floors of a building with their rooms, beds and students prefetched.
+
+    Runs one query per level, however large the building is: floors, rooms,
+    then beds (skipped with beds=False, or narrowed by passing a Bed queryset)
+    and, with students=True, the students in those beds. Children are read
+    with floor.rooms.all(), room.beds.all() and bed.student_set.all(), which
+    are served from the prefetch cache; bed.room and room.floor are already
+    populated too.
+    """
+    lookups = [Prefetch("rooms", queryset=Room.objects.all())]
+    if beds is not False:
+        bed_queryset = Bed.objects.all() if beds is True else beds
+        lookups.append(Prefetch("rooms__beds", queryset=bed_queryset))
+        if students:
+            lookups.append("rooms__beds__student_set")
+    return Floor.objects.filter(building_id=building_id).prefetch_related(*lookups)
@@ -3,9 +3,14 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from apps.hostelinfo.models import User
-from django.db.models import Q
-from rest_framework.pagination import PageNumberPagination
+from apps.feemanagement.ledger import with_last_payment
+from apps.reports.cache import cached_report
+from django.db.models import F, Q
+from core.settings.pagination import PaginatedListMixin, StandardResultsSetPagination
+from core.settings.tenancy import OwnerScopedMixin
 from .models import Bed, Building, Floor, Hostel, Room, Inventory, RoomInventory, Student
+from .inventory import inventory_items, rooms_with_inventories, upsert_room_inventories
+from .provisioning import bulk_provisioning, sync_room_beds, update_floor_room_totals
 from .serializers import (
     BedSerializer,
     BuildingInventorySerializer,
@@ -14,6 +19,7 @@ from .serializers import (
     HostelSerializer,
     RoomSerializer,
     BulkRoomUpdateSerializer,
+    InventoryItemSerializer,
     InventorySerializer,
     BulkFloorTotalRoomsUpdateSerializer,
     StudentSimpleSerializer,
@@ -21,11 +27,9 @@ from .serializers import (
 
 
 # ------------------ HOSTEL API ------------------
-class HostelView(APIView):
+class HostelView(OwnerScopedMixin, PaginatedListMixin, APIView):
     def get(self, request):
-        hostels = Hostel.objects.all()
-        serializer = HostelSerializer(hostels, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.paginated_response(self.scoped(Hostel.objects.all()), HostelSerializer)
 
     def post(self, request):
         serializer = HostelSerializer(data=request.data)
@@ -35,10 +39,10 @@ class HostelView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class HostelDetailView(APIView):
+class HostelDetailView(OwnerScopedMixin, APIView):
     def get(self, request, hostel_id):
         try:
-            hostel = Hostel.objects.get(hostel_id=hostel_id)
+            hostel = self.scoped(Hostel.objects.all()).get(hostel_id=hostel_id)
             serializer = HostelSerializer(hostel)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Hostel.DoesNotExist:
@@ -46,7 +50,7 @@ class HostelDetailView(APIView):
 
     def put(self, request, hostel_id):
         try:
-            hostel = Hostel.objects.get(hostel_id=hostel_id)
+            hostel = self.scoped(Hostel.objects.all()).get(hostel_id=hostel_id)
         except Hostel.DoesNotExist:
             return Response({"error": "Hostel not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -58,7 +62,7 @@ class HostelDetailView(APIView):
 
     def delete(self, request, hostel_id):
         try:
-            hostel = Hostel.objects.get(hostel_id=hostel_id)
+            hostel = self.scoped(Hostel.objects.all()).get(hostel_id=hostel_id)
             hostel.delete()
             return Response({"message": f"Hostel with id {hostel_id} deleted successfully"}, status=status.HTTP_200_OK)
         except Hostel.DoesNotExist:
@@ -66,19 +70,17 @@ class HostelDetailView(APIView):
     
 
 # ------------------ HOSTEL BY OWNER API ------------------
-class HostelByOwnerView(APIView):
+class HostelByOwnerView(OwnerScopedMixin, APIView):
     def get(self, request, owner_id):
-        hostels = Hostel.objects.filter(owner=owner_id)
+        hostels = self.scoped(Hostel.objects.filter(owner=owner_id))
         serializer = HostelSerializer(hostels, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 # ------------------ BUILDING API ------------------
-class BuildingView(APIView):
+class BuildingView(OwnerScopedMixin, PaginatedListMixin, APIView):
     def get(self, request):
-        buildings = Building.objects.all()
-        serializer = BuildingSerializer(buildings, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.paginated_response(self.scoped(Building.objects.all()), BuildingSerializer)
 
     def post(self, request):
         serializer = BuildingSerializer(data=request.data)
@@ -87,16 +89,16 @@ class BuildingView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class BuildingByHostelView(APIView):
+class BuildingByHostelView(OwnerScopedMixin, APIView):
     def get(self, request, hostel_id):
-        buildings = Building.objects.filter(hostel=hostel_id)
+        buildings = self.scoped(Building.objects.filter(hostel=hostel_id))
         serializer = BuildingSerializer(buildings, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class BuildingDetailView(APIView):
+class BuildingDetailView(OwnerScopedMixin, APIView):
     def get(self, request, building_id):
         try:
-            building = Building.objects.get(building_id=building_id)
+            building = self.scoped(Building.objects.all()).get(building_id=building_id)
             serializer = BuildingSerializer(building)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Building.DoesNotExist:
@@ -104,7 +106,7 @@ class BuildingDetailView(APIView):
 
     def put(self, request, building_id):
         try:
-            building = Building.objects.get(building_id=building_id)
+            building = self.scoped(Building.objects.all()).get(building_id=building_id)
         except Building.DoesNotExist:
             return Response({"error": "Building not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -116,7 +118,7 @@ class BuildingDetailView(APIView):
 
     def delete(self, request, building_id):
         try:
-            building = Building.objects.get(building_id=building_id)
+            building = self.scoped(Building.objects.all()).get(building_id=building_id)
             building.delete()
             return Response({"message": f"Building with id {building_id} deleted successfully"}, status=status.HTTP_200_OK)
         except Building.DoesNotExist:
@@ -124,11 +126,9 @@ class BuildingDetailView(APIView):
 
 
 # ------------------ FLOOR API ------------------
-class FloorView(APIView):
+class FloorView(OwnerScopedMixin, PaginatedListMixin, APIView):
     def get(self, request):
-        floors = Floor.objects.all()
-        serializer = FloorSerializer(floors, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.paginated_response(self.scoped(Floor.objects.all()), FloorSerializer)
 
     def post(self, request):
         serializer = FloorSerializer(data=request.data)
@@ -138,17 +138,17 @@ class FloorView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class FloorByBuildingView(APIView):
+class FloorByBuildingView(OwnerScopedMixin, APIView):
     def get(self, request, building_id):
-        floors = Floor.objects.filter(building=building_id)
+        floors = self.scoped(Floor.objects.filter(building=building_id))
         serializer = FloorSerializer(floors, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class FloorDetailView(APIView):
+class FloorDetailView(OwnerScopedMixin, APIView):
     def get(self, request, floor_id):
         try:
-            floor = Floor.objects.get(floor_id=floor_id)
+            floor = self.scoped(Floor.objects.all()).get(floor_id=floor_id)
             serializer = FloorSerializer(floor)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Floor.DoesNotExist:
@@ -156,7 +156,7 @@ class FloorDetailView(APIView):
 
     def put(self, request, floor_id):
         try:
-            floor = Floor.objects.get(floor_id=floor_id)
+            floor = self.scoped(Floor.objects.all()).get(floor_id=floor_id)
         except Floor.DoesNotExist:
             return Response({"error": "Floor not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -168,7 +168,7 @@ class FloorDetailView(APIView):
 
     def delete(self, request, floor_id):
         try:
-            floor = Floor.objects.get(floor_id=floor_id)
+            floor = self.scoped(Floor.objects.all()).get(floor_id=floor_id)
             floor.delete()
             return Response({"message": f"Floor with id {floor_id} deleted successfully"}, status=status.HTTP_200_OK)
         except Floor.DoesNotExist:
@@ -176,17 +176,16 @@ class FloorDetailView(APIView):
 
 
 # ------------------ ROOM API ------------------
-class RoomView(APIView):
+class RoomView(OwnerScopedMixin, PaginatedListMixin, APIView):
     def get(self, request):
         status_param = request.query_params.get("status") 
-        rooms = Room.objects.all()
+        rooms = RoomSerializer.setup_eager_loading(self.scoped(Room.objects.all()))
 
         if status_param == "vacant":
             # Rooms that have at least 1 empty bed
-            rooms = rooms.filter(beds__is_occupied=False).distinct()
+            rooms = rooms.filter(bed_count__gt=F("occupied_beds"))
 
-        serializer = RoomSerializer(rooms, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.paginated_response(rooms, RoomSerializer)
 
     def post(self, request):
         many = isinstance(request.data, list)
@@ -196,16 +195,16 @@ class RoomView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class RoomByFloorView(APIView):
+class RoomByFloorView(OwnerScopedMixin, APIView):
     def get(self, request, floor_id):
-        rooms = Room.objects.filter(floor=floor_id)
+        rooms = RoomSerializer.setup_eager_loading(self.scoped(Room.objects.filter(floor=floor_id)))
         serializer = RoomSerializer(rooms, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class RoomDetailView(APIView):
+class RoomDetailView(OwnerScopedMixin, APIView):
     def get(self, request, room_id):
         try:
-            room = Room.objects.get(room_id=room_id)
+            room = RoomSerializer.setup_eager_loading(self.scoped(Room.objects.all())).get(room_id=room_id)
             serializer = RoomSerializer(room)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Room.DoesNotExist:
@@ -213,7 +212,7 @@ class RoomDetailView(APIView):
 
     def put(self, request, room_id):
         try:
-            room = Room.objects.get(room_id=room_id)
+            room = self.scoped(Room.objects.all()).get(room_id=room_id)
         except Room.DoesNotExist:
             return Response({"error": "Room not found"}, status=status.HTTP_404_NOT_FOUND)
 
@@ -225,7 +224,7 @@ class RoomDetailView(APIView):
 
     def delete(self, request, room_id):
         try:
-            room = Room.objects.get(room_id=room_id)
+            room = self.scoped(Room.objects.all()).get(room_id=room_id)
             room.delete()
             return Response({"message": f"Room with id {room_id} deleted successfully"}, status=status.HTTP_200_OK)
         except Room.DoesNotExist:
@@ -233,18 +232,16 @@ class RoomDetailView(APIView):
 
 
 # ------------------ BED API ------------------
-class BedView(APIView):
+class BedView(OwnerScopedMixin, PaginatedListMixin, APIView):
     def get(self, request):
         status_param = request.query_params.get("status")
         # beds = Bed.objects.all()
-        rooms = Room.objects.prefetch_related('beds', 'floor__building__hostel').all()
+        rooms = RoomSerializer.setup_eager_loading(self.scoped(Room.objects.all()))
         if status_param == "empty":
-            rooms = rooms.filter(beds__is_occupied=False).distinct()
+            rooms = rooms.filter(bed_count__gt=F("occupied_beds"))
         elif status_param == "booked":
-            rooms = rooms.filter(beds__is_occupied=True).distinct()
-        serializer = RoomSerializer(rooms, many=True)
-        
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            rooms = rooms.filter(occupied_beds__gt=0)
+        return self.paginated_response(rooms, RoomSerializer)
 
     def post(self, request):
         serializer = BedSerializer(data=request.data)
@@ -253,32 +250,32 @@ class BedView(APIView):
             return Response(serializer.data, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class BedByRoomView(APIView):
+class BedByRoomView(OwnerScopedMixin, APIView):
     def get(self, request, room_id):
-        beds = Bed.objects.filter(room=room_id)
+        beds = self.scoped(Bed.objects.filter(room=room_id))
         serializer = BedSerializer(beds, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class BedDetailView(APIView):
+class BedDetailView(OwnerScopedMixin, APIView):
     def get(self, request, bed_id):
         try:
-            bed = Bed.objects.get(bed_id=bed_id)
+            bed = self.scoped(Bed.objects.all()).get(bed_id=bed_id)
             serializer = BedSerializer(bed)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except Bed.DoesNotExist:
             return Response({"error": "Bed not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
-class AvailableBedsView(APIView):
+class AvailableBedsView(OwnerScopedMixin, APIView):
     def get(self, request):
         building_id = request.query_params.get("building_id")
         if not building_id:
             return Response({"error": "building_id is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        beds = Bed.objects.filter(
+        beds = self.scoped(Bed.objects.filter(
             is_occupied=False,
-            room__floor__building__building_id=building_id,
-        ).select_related(
+            building_id=building_id,
+        )).select_related(
             "room",
             "room__floor",
             "room__floor__building",
@@ -294,21 +291,21 @@ class AvailableBedsView(APIView):
         if floor_id:
             beds = beds.filter(room__floor__floor_id=floor_id)
         if hostel_id:
-            beds = beds.filter(room__floor__building__hostel__hostel_id=hostel_id)
+            beds = beds.filter(building__hostel_id=hostel_id)
 
         serializer = BedSerializer(beds, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
-class AvailableBedsView(APIView):
+class AvailableBedsView(OwnerScopedMixin, APIView):
     def get(self, request):
         building_id = request.query_params.get("building_id")
         if not building_id:
             return Response({"error": "building_id is required"}, status=status.HTTP_400_BAD_REQUEST)
 
-        beds = Bed.objects.filter(
+        beds = self.scoped(Bed.objects.filter(
             is_occupied=False,
-            room__floor__building__building_id=building_id,
-        ).select_related(
+            building_id=building_id,
+        )).select_related(
             "room",
             "room__floor",
             "room__floor__building",
@@ -324,37 +321,23 @@ class AvailableBedsView(APIView):
         if floor_id:
             beds = beds.filter(room__floor__floor_id=floor_id)
         if hostel_id:
-            beds = beds.filter(room__floor__building__hostel__hostel_id=hostel_id)
+            beds = beds.filter(building__hostel_id=hostel_id)
 
         serializer = BedSerializer(beds, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class BulkRoomUpdateAPIView(APIView):
+class BulkRoomUpdateAPIView(OwnerScopedMixin, APIView):
     """
     Bulk update rooms API (PUT only)
     """
     def put(self, request, *args, **kwargs):
-        serializer = BulkRoomUpdateSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        result = serializer.save()  # calls update() in serializer
-
-        updated_rooms = result.get("updated_rooms", [])
-        not_found = result.get("not_found", [])
-
-        return Response(
-            {
-                "message": f"{len(updated_rooms)} rooms updated successfully",
-                "updated_rooms": [str(room.room_id) for room in updated_rooms],
-                "not_found": not_found,
-            },
-            status=status.HTTP_200_OK,
-        )
-
-    def put(self, request, *args, **kwargs):
-        serializer = BulkRoomUpdateSerializer(data=request.data)
+        serializer = BulkRoomUpdateSerializer(data=request.data, context={"rooms": self.scoped(Room.objects.all())})
         serializer.is_valid(raise_exception=True)
-        result = serializer.save()
+        # Per-room bed signals stand down; beds are created for the whole batch at once
+        with bulk_provisioning():
+            result = serializer.save()  # calls update() in serializer
+            sync_room_beds(result.get("updated_rooms", []))
 
         updated_rooms = result.get("updated_rooms", [])
         not_found = result.get("not_found", [])
@@ -368,11 +351,11 @@ class BulkRoomUpdateAPIView(APIView):
             status=status.HTTP_200_OK,
         )
 
-class Deleteinventory(APIView):
+class Deleteinventory(OwnerScopedMixin, APIView):
     def delete(self, request, room_id):
         try:
             # Ensure the room exists
-            room = Room.objects.get(room_id=room_id)
+            room = self.scoped(Room.objects.all()).get(room_id=room_id)
         except Room.DoesNotExist:
             return Response(
                 {"error": "Room not found"},
@@ -394,7 +377,7 @@ class Deleteinventory(APIView):
 
 
 
-class FloorTotalRoomsUpdateAPIView(APIView):
+class FloorTotalRoomsUpdateAPIView(OwnerScopedMixin, APIView):
     def post(self, request, *args, **kwargs):
         floors_data = []
         
@@ -413,39 +396,34 @@ class FloorTotalRoomsUpdateAPIView(APIView):
             )
         
         # Validate the data
-        serializer = BulkFloorTotalRoomsUpdateSerializer(data={"floors_data": floors_data})
+        serializer = BulkFloorTotalRoomsUpdateSerializer(
+            data={"floors_data": floors_data}, context={"floors": self.scoped(Floor.objects.all())}
+        )
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         
         # Use validated data instead of raw input data
         validated_floors_data = serializer.validated_data["floors_data"]
         
+        # Floors are updated and their missing rooms created in one transaction
+        floor_totals = {
+            floor_data["floor"].pk: int(floor_data["total_rooms"])
+            for floor_data in validated_floors_data
+        }
         results = []
-        
-        for floor_data in validated_floors_data:
-            floor = floor_data["floor"]  # This is already the Floor object from serializer validation
-            new_total_rooms = int(floor_data["total_rooms"])  # Ensure integer type
-            old_total_rooms = floor.total_rooms or 0
-            current_room_count = floor.rooms.count()
-            
-            # Update the floor's total_rooms field
-            # The signal will automatically create rooms if needed
-            floor.total_rooms = new_total_rooms
-            floor.save(update_fields=['total_rooms'])
-            
-            # Count rooms created by checking the room count after save
-            final_room_count = floor.rooms.count()
-            rooms_created = final_room_count - current_room_count
-                
+
+        for outcome in update_floor_room_totals(floor_totals):
+            floor = outcome["floor"]
+            final_room_count = outcome["current_room_count"] + outcome["rooms_created"]
             results.append({
                 "floor_id": str(floor.floor_id),
                 "floor_number": floor.floor_number,
                 "building_name": floor.building.building_name,
-                "previous_total_rooms": old_total_rooms,
-                "current_room_count": current_room_count,
-                "new_total_rooms": new_total_rooms,
+                "previous_total_rooms": outcome["previous_total_rooms"],
+                "current_room_count": outcome["current_room_count"],
+                "new_total_rooms": floor.total_rooms,
                 "final_room_count": final_room_count,
-                "rooms_created": rooms_created,
+                "rooms_created": outcome["rooms_created"],
                 "status": "success"
             })
         
@@ -459,55 +437,49 @@ class FloorTotalRoomsUpdateAPIView(APIView):
 # ---------------- GET all inventories (flat list) ----------------
 class InventoryListView(APIView):
     def get(self, request):
-        # Get all inventories with related room data
-        inventories = Inventory.objects.select_related('room', 'builiding', 'hostel').all()
-        
+        # One query: every room inventory row with its room, building and hostel
+        room_inventories = RoomInventory.objects.select_related(
+            "inventory", "room__floor__building__hostel"
+        ).order_by("room__floor__building_id", "room__room_number")
+
         # Group by common fields and organize by room
-        grouped_data = self.group_inventories_by_common_fields(inventories)
-        
+        grouped_data = self.group_inventories_by_common_fields(room_inventories)
+
         return Response(grouped_data, status=200)
-    
-    def group_inventories_by_common_fields(self, inventories):
-        # Structure to hold our final response
+
+    def group_inventories_by_common_fields(self, room_inventories):
+        # Groups keyed by (owner, hostel, building); rooms indexed by room_id
         response_data = {}
-        
-        for inventory in inventories:
-            # Use the correct field names from your model
-            common_key = f"{inventory.owner_id}_{inventory.hostel_id}_{inventory.builiding_id}"
-            
+        rooms_by_group = {}
+
+        for room_inventory in room_inventories:
+            room = room_inventory.room
+            building = room.floor.building
+            common_key = (building.hostel.owner_id, building.hostel_id, building.building_id)
+
             if common_key not in response_data:
-                # Initialize the common data structure
                 response_data[common_key] = {
-                    "owner_id": inventory.owner_id,
-                    "hostel_id": inventory.hostel_id,
-                    "building_id": inventory.builiding_id,  # Use builiding_id here
+                    "owner_id": building.hostel.owner_id,
+                    "hostel_id": building.hostel_id,
+                    "building_id": building.building_id,
                     "rooms": []
                 }
-            
-            # Find if this room already exists in the rooms list
-            room_exists = False
-            for room_data in response_data[common_key]["rooms"]:
-                if room_data["room_id"] == inventory.room.room_id:
-                    # Room exists, add inventory item
-                    room_data["inventory_items"].append({
-                        "inventory_id": str(inventory.inventory_id),
-                        "name": inventory.inventory_type,
-                        "quantity": inventory.quantity
-                    })
-                    room_exists = True
-                    break
-            
-            # If room doesn't exist, create new room entry
-            if not room_exists:
-                response_data[common_key]["rooms"].append({
-                    "room_id": inventory.room.room_id,
-                    "room_number": inventory.room.room_number,
-                    "inventory_items": [{
-                        "inventory_id": str(inventory.inventory_id),
-                        "name": inventory.inventory_type,
-                        "quantity": inventory.quantity
-                    }]
-                })
+                rooms_by_group[common_key] = {}
+
+            rooms = rooms_by_group[common_key]
+            if room.room_id not in rooms:
+                rooms[room.room_id] = {
+                    "room_id": room.room_id,
+                    "room_number": room.room_number,
+                    "inventory_items": []
+                }
+                response_data[common_key]["rooms"].append(rooms[room.room_id])
+
+            rooms[room.room_id]["inventory_items"].append({
+                "inventory_id": str(room_inventory.inventory.inventory_id),
+                "name": room_inventory.inventory.inventory_type,
+                "quantity": room_inventory.quantity
+            })
         return list(response_data.values())
 # ---------------- GET by inventory_id ----------------
 class InventoryDetailView(APIView):
@@ -539,74 +511,68 @@ class InventoryDetailView(APIView):
             return Response({"error": "Inventory not found"}, status=404)
 
 # ---------------- GET inventories by building (rooms grouped) ----------------
-class BuildingRoomsInventoryView(APIView):
+class BuildingRoomsInventoryView(OwnerScopedMixin, APIView):
     def get(self, request, building_id):
-        rooms = Room.objects.filter(building_id=building_id).order_by("room_number")
-        if not rooms.exists():
+        building = self.scoped(Building.objects.filter(building_id=building_id)).first()
+        rooms = list(rooms_with_inventories(
+            Room.objects.filter(floor__building_id=building_id).order_by("room_number")
+        )) if building else []
+        if not rooms:
             return Response({"error": "No rooms found for this building"}, status=404)
-        hostel_id = str(rooms.first().hostel.id)
         rooms_data = []
         for room in rooms:
-            inventories = Inventory.objects.filter(room=room)
-            inventory_data = [{"inventory_id": str(inv.inventory_id), "name": inv.inventory_type, "quantity": inv.quantity} for inv in inventories]
             rooms_data.append({
-                "inventory_id": str(room.id),
-                "room_id": str(room.id),
+                "inventory_id": str(room.room_id),
+                "room_id": str(room.room_id),
                 "room_number": room.room_number,
-                "inventory_type": inventory_data
+                "inventory_type": inventory_items(room)
             })
         response_data = {
             "building_id": building_id,
-            "hostel_id": hostel_id,
+            "hostel_id": str(building.hostel_id),
             "rooms": rooms_data
         }
         return Response(response_data, status=200)
 
 # ---------------- GET/PUT inventories by room_id ----------------
-class RoomInventoryDetailView(APIView):
+class RoomInventoryDetailView(OwnerScopedMixin, APIView):
     def get(self, request, room_id):
-        try:
-            room = Room.objects.get(id=room_id)
-        except Room.DoesNotExist:
+        room = rooms_with_inventories(
+            self.scoped(Room.objects.select_related("floor__building").filter(room_id=room_id))
+        ).first()
+        if room is None:
             return Response({"error": "Room not found"}, status=404)
-        inventories = Inventory.objects.filter(room=room)
-        inventory_data = [{"inventory_id": str(inv.inventory_id), "name": inv.inventory_type, "quantity": inv.quantity} for inv in inventories]
+        building = room.floor.building
         response_data = {
-            "building_id": str(room.building.id),
-            "hostel_id": str(room.hostel.id),
+            "building_id": str(building.building_id),
+            "hostel_id": str(building.hostel_id),
             "rooms": [
                 {
-                    "inventory_id": str(room.id),
-                    "room_id": str(room.id),
+                    "inventory_id": str(room.room_id),
+                    "room_id": str(room.room_id),
                     "room_number": room.room_number,
-                    "inventory_type": inventory_data
+                    "inventory_type": inventory_items(room)
                 }
             ]
         }
         return Response(response_data, status=200)
 
     def put(self, request, room_id):
-        try:
-            room = Room.objects.get(id=room_id)
-        except Room.DoesNotExist:
+        if not self.scoped(Room.objects.filter(room_id=room_id)).exists():
             return Response({"error": "Room not found"}, status=404)
-        inventory_items = request.data.get("inventory_type", [])
-        for item in inventory_items:
-            Inventory.objects.update_or_create(
-                room=room,
-                inventory_type=item.get("name"),
-                defaults={
-                    "quantity": item.get("quantity", 0),
-                    "owner": request.user,
-                    "hostel": room.hostel,
-                    "builiding": room.building,
-                    "Floor": room.floor
-                }
-            )
+        items = InventoryItemSerializer(
+            data=[item for item in request.data.get("inventory_type", []) if item.get("name")], many=True
+        )
+        if not items.is_valid():
+            return Response(items.errors, status=400)
+        upsert_room_inventories({
+            (room_id, item["name"]): item["quantity"]
+            for item in items.validated_data
+        })
         return Response({"message": "Room inventories updated successfully"}, status=200)
 
 # ---------------- Bulk POST inventories ----------------
-class BulkInventoryCreateView(APIView):
+class BulkInventoryCreateView(OwnerScopedMixin, APIView):
     def post(self, request, *args, **kwargs):
         building_id = request.data.get("building_id")
         hostel_id = request.data.get("hostel_id")
@@ -620,108 +586,91 @@ class BulkInventoryCreateView(APIView):
             )
 
         # Verify owner exists
-        try:
-            owner = User.objects.get(pk=owner_id)
-        except User.DoesNotExist:
+        if not User.objects.filter(pk=owner_id).exists():
             return Response(
                 {"error": f"Owner with id {owner_id} not found"}, 
                 status=400
             )
 
         # Verify building exists and belongs to hostel
-        try:
-            building = Building.objects.get(pk=building_id, hostel_id=hostel_id)
-        except Building.DoesNotExist:
+        if not self.scoped(Building.objects.filter(pk=building_id, hostel_id=hostel_id)).exists():
             return Response(
                 {"error": f"Building {building_id} not found in hostel {hostel_id}"}, 
                 status=400
             )
 
-        bulk_inventories = []
-        
+        if any(not room_data.get("room_id") for room_data in rooms_data):
+            return Response(
+                {"error": "room_id is required for each room"}, 
+                status=400
+            )
+
+        # Verify every room is in the specified building with one query
+        room_ids = {str(room_data["room_id"]) for room_data in rooms_data}
+        found = {
+            str(room_id)
+            for room_id in Room.objects.filter(
+                pk__in=room_ids, floor__building__pk=building_id
+            ).values_list("room_id", flat=True)
+        }
         for room_data in rooms_data:
-            room_id = room_data.get("room_id")
-            inventory_items = room_data.get("inventory_items", [])
-            
-            if not room_id:
+            if str(room_data["room_id"]) not in found:
                 return Response(
-                    {"error": "room_id is required for each room"}, 
-                    status=400
-                )
-            
-            try:
-                # Verify room exists in the specified building
-                room = Room.objects.get(
-                    pk=room_id,
-                    floor__building__pk=building_id
-                )
-            except Room.DoesNotExist:
-                return Response(
-                    {"error": f"Room {room_id} not found in building {building_id}"}, 
+                    {"error": f"Room {room_data['room_id']} not found in building {building_id}"}, 
                     status=400
                 )
 
-            # Add inventory items for this room
-            for item in inventory_items:
-                bulk_inventories.append(
-                    Inventory(
-                        owner=owner,  # Use the owner from request
-                        hostel_id=hostel_id,
-                        builiding_id=building_id,
-                        room=room,
-                        floor=room.floor,
-                        inventory_type=item.get("name"),
-                        quantity=item.get("quantity", 0)
-                    )
-                )
+        quantities = {}
+        for room_data in rooms_data:
+            items = InventoryItemSerializer(
+                data=[item for item in room_data.get("inventory_items", []) if item.get("name")], many=True
+            )
+            if not items.is_valid():
+                return Response({"room_id": room_data["room_id"], "inventory_items": items.errors}, status=400)
+            for item in items.validated_data:
+                quantities[(str(room_data["room_id"]), item["name"])] = item["quantity"]
 
-        if not bulk_inventories:
+        if not quantities:
             return Response(
                 {"error": "No inventory items to create"}, 
                 status=400
             )
 
-        inventories = Inventory.objects.bulk_create(bulk_inventories)
+        total_inventories = upsert_room_inventories(quantities)
 
         return Response(
             {
                 "message": "Inventories added successfully",
                 "rooms_processed": len(rooms_data),
-                "total_inventories": len(inventories)
+                "total_inventories": total_inventories
             },
             status=201
         )
 
 
 # ------------------ ANALYTICS API ------------------
-class BedAnalyticsView(APIView):
+class BedAnalyticsView(OwnerScopedMixin, APIView):
     def get(self, request, building_id):
+        # Checked outside the cache, whose entries are shared by every tenant
+        if not self.scoped(Building.objects.filter(building_id=building_id)).exists():
+            return Response({"error": "Building not found"}, status=status.HTTP_404_NOT_FOUND)
+        return cached_report("bed-analytics", building_id, lambda: self._analytics(building_id))
+
+    def _analytics(self, building_id):
         try:
             # Verify building exists
             try:
-                building = Building.objects.get(building_id=building_id)
+                building = self.scoped(Building.objects.all()).get(building_id=building_id)
             except Building.DoesNotExist:
                 return Response(
                     {"error": "Building not found"}, 
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Get beds filtered by building through room relationship
-            beds_in_building = Bed.objects.filter(room__floor__building=building)
-            
-            # Get total bed count for this building
-            total_bed_count = beds_in_building.count()
-            
-            # Get occupied beds count for this building
-            total_occupied = beds_in_building.filter(is_occupied=True).count()
-            
-            # Get available beds count for this building
-            total_available = beds_in_building.filter(is_occupied=False).count()
-            
-            # Verify the math is correct
-            if total_bed_count != (total_occupied + total_available):
-                # If there's a discrepancy, recalculate available beds
-                total_available = total_bed_count - total_occupied
+            # Occupancy counters are maintained on the building itself
+            total_bed_count = building.bed_count
+            total_occupied = building.occupied_beds
+            total_available = building.available_beds
             
             analytics_data = {
                 "building_id": str(building_id),
@@ -739,27 +688,19 @@ class BedAnalyticsView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-# ---------------- Custom Pagination Class ----------------
-class StandardResultsSetPagination(PageNumberPagination):
-    page_size = 10  # default items per page
-    page_size_query_param = 'page_size'  # client can override ?page_size=50
-
 # ---------------- GET student details by building_id ----------------
-class StudentDetailsView(APIView):
+class StudentDetailsView(OwnerScopedMixin, PaginatedListMixin, APIView):
+    # Clients page this listing with ?page=N and show the count
     pagination_class = StandardResultsSetPagination
 
     def get(self, request, building_id):
         search_query = (request.query_params.get("search") or "").strip()
 
         # base queryset: students in the building
-        students_qs = Student.objects.filter(
-            allocated_bed__room__floor__building__building_id=building_id
-        ).select_related(
+        students_qs = self.scoped(Student.objects.filter(building_id=building_id)).select_related(
             # follow single-value relations to avoid extra queries
             "allocated_bed__room__floor__building",
-        ).prefetch_related(
-            # if your Student -> fees or other m2m exist add them here
-        ).distinct()
+        )
 
         # apply search: name, mobile, room number, bed number
         if search_query:
@@ -770,27 +711,18 @@ class StudentDetailsView(APIView):
                 | Q(allocated_bed__bed_number__icontains=search_query)
             )
 
-        # if no rows after filtering, return empty paginated structure
-        if not students_qs.exists():
-            return Response(
-                {"count": 0, "next": None, "previous": None, "results": []},
-                status=status.HTTP_200_OK,
-            )
-
-        # paginate
-        paginator = self.pagination_class()
-        page = paginator.paginate_queryset(students_qs, request)
-
-        serializer = StudentSimpleSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
+        # newest first on student_building_keyset_idx; last payment is only
+        # computed for the rows of the requested page
+        students_qs = with_last_payment(students_qs).order_by("-created_at", "-student_id")
+        return self.paginated_response(students_qs, StudentSimpleSerializer)
 
 # ---------------- GET Inventory details by building_id ----------------
-class InventoryDetailsByBuildingView(APIView):
+class InventoryDetailsByBuildingView(OwnerScopedMixin, APIView):
     def get(self, request, building_id):
         try:
-            building = Building.objects.prefetch_related(
+            building = self.scoped(Building.objects.prefetch_related(
                 'floors__rooms__roominventory_set__inventory'
-            ).get(building_id=building_id)
+            )).get(building_id=building_id)
         except Building.DoesNotExist:
             return Response({"detail": "Building not found."}, status=status.HTTP_404_NOT_FOUND)
 
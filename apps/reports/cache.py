@@ -0,0 +1,116 @@
+"""
+Read-through cache for building-level reports.
+
+Every entry is keyed by report name, building and that building's current
+cache version. Signals bump the version whenever a bed, room, student or fee
+in the building changes, so stale entries are never read again and simply
+expire; no key scanning is needed to invalidate.
+"""
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+REPORT_CACHE_TIMEOUT = getattr(settings, "REPORT_CACHE_TIMEOUT", 60 * 5)
+
+CACHED_REPORTS = (
+    "room-report",
+    "bed-report",
+    "students-report",
+    "bed-analytics",
+)
+
+
+def _version_key(building_id):
+    return f"reports:building:{building_id}:version"
+
+
+def _stat_key(name, outcome):
+    return f"reports:stats:{name}:{outcome}"
+
+
+def building_version(building_id):
+    # Seeded from the clock so an evicted version never falls back to a
+    # number that older entries were stored under.
+    return cache.get_or_set(_version_key(building_id), time.time_ns, timeout=None)
+
+
+def invalidate_building(building_id):
+    """Move a building's reports to a fresh cache version."""
+    key = _version_key(building_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), timeout=None)
+    except Exception:
+        logger.exception("Could not invalidate report cache for building %s", building_id)
+
+
+def schedule_invalidation(building_id):
+    """Invalidate once the surrounding transaction commits."""
+    if building_id:
+        transaction.on_commit(lambda: invalidate_building(building_id))
+
+
+def _record(name, outcome):
+    key = _stat_key(name, outcome)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def cached_report(name, building_id, build, *params):
+    """
+    Return the cached response for this report, or build() it and store it.
+
+    build() must return a Response; only 200 responses are cached. If the
+    cache backend is unreachable the report is built from the database.
+    """
+    try:
+        key = ":".join(
+            ["reports", name, str(building_id), str(building_version(building_id)), *map(str, params)]
+        )
+        data = cache.get(key)
+        _record(name, "misses" if data is None else "hits")
+    except Exception:
+        logger.exception("Report cache unavailable, serving %s from the database", name)
+        return build()
+
+    if data is not None:
+        return Response(data, status=status.HTTP_200_OK)
+
+    response = build()
+    if response.status_code == status.HTTP_200_OK:
+        try:
+            cache.set(key, response.data, REPORT_CACHE_TIMEOUT)
+        except Exception:
+            logger.exception("Could not store %s in the report cache", name)
+    return response
+
+
+def cache_stats():
+    """Hit/miss counters per cached report, plus overall totals."""
+    keys = [_stat_key(name, outcome) for name in CACHED_REPORTS for outcome in ("hits", "misses")]
+    counts = cache.get_many(keys)
+
+    reports = {}
+    for name in CACHED_REPORTS:
+        hits = counts.get(_stat_key(name, "hits"), 0)
+        misses = counts.get(_stat_key(name, "misses"), 0)
+        reports[name] = {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+    return {
+        "hits": sum(report["hits"] for report in reports.values()),
+        "misses": sum(report["misses"] for report in reports.values()),
+        "reports": reports,
+    }
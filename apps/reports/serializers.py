@@ -1,7 +1,9 @@
 from rest_framework import serializers
 from apps.hostelmanagement.models import Floor, Room, Bed, Student
+from apps.hostelmanagement.serializers import AmountField, format_amount
  
 class RoomSerializer(serializers.ModelSerializer):
+    monthly_rent = AmountField(read_only=True)
     total_beds = serializers.SerializerMethodField()
     occupied_beds = serializers.SerializerMethodField()
     available_beds = serializers.SerializerMethodField()
@@ -14,13 +16,13 @@ class RoomSerializer(serializers.ModelSerializer):
         ]
  
     def get_total_beds(self, obj):
-        return obj.beds.count()
+        return obj.bed_count
  
     def get_occupied_beds(self, obj):
-        return obj.beds.filter(is_occupied=True).count()
+        return obj.occupied_beds
  
     def get_available_beds(self, obj):
-        return obj.beds.filter(is_occupied=False).count()
+        return obj.available_beds
  
  
 class FloorSerializer(serializers.ModelSerializer):
@@ -79,7 +81,7 @@ class TotalBedSerializer(serializers.ModelSerializer):
         return "occupied" if obj.is_occupied else "available"
 
     def get_monthly_rent(self, obj):
-        return obj.monthly_rent or obj.room.monthly_rent
+        return format_amount(obj.monthly_rent or obj.room.monthly_rent)
 
 
 class OccupiedBedDetailSerializer(serializers.ModelSerializer):
@@ -101,5 +103,5 @@ class OccupiedBedDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_monthly_rent(self, obj):
-        return obj.monthly_rent or obj.room.monthly_rent
+        return format_amount(obj.monthly_rent or obj.room.monthly_rent)
  
\ No newline at end of file
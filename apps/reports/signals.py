@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.hostelmanagement.models import Bed, Building, Floor, Room, Student
+from apps.hostelmanagement.occupancy import occupancy_changed
+from apps.hostelmanagement.placement import building_id_for_room
+from apps.hostelmanagement.provisioning import building_provisioned
+from apps.roomallocate.models import RoomAllocation
+
+from .cache import schedule_invalidation
+
+
+@receiver(post_save, sender=Building)
+def invalidate_building_reports(sender, instance, **kwargs):
+    schedule_invalidation(instance.building_id)
+
+
+@receiver(post_save, sender=Floor)
+@receiver(post_delete, sender=Floor)
+def invalidate_floor_reports(sender, instance, **kwargs):
+    schedule_invalidation(instance.building_id)
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_room_reports(sender, instance, **kwargs):
+    schedule_invalidation(
+        Floor.objects.filter(pk=instance.floor_id).values_list("building_id", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Bed)
+@receiver(post_delete, sender=Bed)
+def invalidate_bed_reports(sender, instance, **kwargs):
+    schedule_invalidation(instance.building_id)
+
+
+@receiver(post_save, sender=RoomAllocation)
+@receiver(post_delete, sender=RoomAllocation)
+def invalidate_allocation_reports(sender, instance, **kwargs):
+    schedule_invalidation(building_id_for_room(instance.room_id))
+
+
+@receiver(occupancy_changed)
+def invalidate_occupancy_reports(sender, room_id, **kwargs):
+    # Bed claims and releases are queryset updates, which send no Bed signals
+    schedule_invalidation(building_id_for_room(room_id))
+
+
+@receiver(building_provisioned)
+def invalidate_provisioned_reports(sender, building_id, **kwargs):
+    schedule_invalidation(building_id)
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_delete, sender=Student)
+def invalidate_student_reports(sender, instance, **kwargs):
+    schedule_invalidation(instance.building_id)
@@ -1,30 +1,39 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from apps.hostelmanagement.models import Floor,Bed, Student, Building
+from apps.hostelmanagement.models import Bed, Student, Building
+from apps.hostelmanagement.tree import building_tree
+from core.settings.tenancy import OwnerScopedMixin
+from .cache import cache_stats, cached_report
 from .serializers import FloorSerializer, OccupiedBedSerializer, StudentReportSerializer, TotalBedSerializer, OccupiedBedDetailSerializer
  
-class HostelRoomReportView(APIView):
+class HostelRoomReportView(OwnerScopedMixin, APIView):
     """
     Returns floors with room hierarchy for a building
     """
     def get(self, request, building_id, *args, **kwargs):
-        floors = Floor.objects.filter(building_id=building_id).prefetch_related('rooms__beds')
+        # Report cache entries are shared by every tenant, so ownership is checked first
+        if not self.scoped(Building.objects.filter(building_id=building_id)).exists():
+            return Response({'detail': 'Building not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return cached_report("room-report", building_id, lambda: self._report(building_id))
+
+    def _report(self, building_id):
+        floors = building_tree(building_id, beds=False)
         serializer = FloorSerializer(floors, many=True)
         return Response(serializer.data)
    
  
 
-class OccupiedBedReportView(APIView):
+class OccupiedBedReportView(OwnerScopedMixin, APIView):
     """
     Returns all occupied beds for a given building.
     """
     def get(self, request, building_id, *args, **kwargs):
         # Filter beds in the building that are occupied
-        beds = Bed.objects.filter(
+        beds = self.scoped(Bed.objects.filter(
             student__allocated_bed__isnull=False,  # bed has a student
-            room__floor__building_id=building_id
-        ).select_related('room')
+            building_id=building_id
+        )).select_related('room')
         # Map student info to beds
         students = Student.objects.filter(allocated_bed__in=beds).select_related('allocated_bed')
         student_dict = {s.allocated_bed_id: s for s in students}
@@ -38,15 +47,20 @@ class OccupiedBedReportView(APIView):
  
  
  
-class BuildingStudentsReportView(APIView):
+class BuildingStudentsReportView(OwnerScopedMixin, APIView):
     def get(self, request, building_id):
+        if not self.scoped(Building.objects.filter(building_id=building_id)).exists():
+            return Response({'detail': 'Building not found.'}, status=status.HTTP_404_NOT_FOUND)
+        return cached_report("students-report", building_id, lambda: self._report(building_id))
+
+    def _report(self, building_id):
         try:
             building = Building.objects.get(building_id=building_id)
         except Building.DoesNotExist:
             return Response({'detail': 'Building not found.'}, status=status.HTTP_404_NOT_FOUND)
  
         students = Student.objects.filter(
-            allocated_bed__room__floor__building=building
+            building=building
         ).select_related('allocated_bed', 'allocated_bed__room', 'allocated_bed__room__floor', 'allocated_bed__room__floor__building')
  
         serializer = StudentReportSerializer(students, many=True)
@@ -57,7 +71,7 @@ class BuildingStudentsReportView(APIView):
         })
  
 
-class BedReportView(APIView):
+class BedReportView(OwnerScopedMixin, APIView):
     """
     API endpoint to fetch bed information based on type parameter.
     
@@ -88,6 +102,13 @@ class BedReportView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        if not self.scoped(Building.objects.filter(building_id=building_id)).exists():
+            return Response({"error": "Building not found"}, status=status.HTTP_404_NOT_FOUND)
+        return cached_report(
+            "bed-report", building_id, lambda: self._report(building_id, report_type), report_type
+        )
+
+    def _report(self, building_id, report_type):
         # Validate building exists
         try:
             building = Building.objects.get(building_id=building_id)
@@ -111,17 +132,17 @@ class BedReportView(APIView):
     def _get_total_beds(self, building):
         """Fetch all beds in the building with their details"""
         beds = Bed.objects.filter(
-            room__floor__building=building
+            building=building
         ).select_related('room', 'room__floor', 'room__floor__building').order_by(
             'room__floor__floor_number', 'room__room_number', 'bed_number'
         )
         
         serializer = TotalBedSerializer(beds, many=True)
         
-        # Calculate summary statistics
-        total_beds_count = beds.count()
-        occupied_count = beds.filter(is_occupied=True).count()
-        available_count = total_beds_count - occupied_count
+        # Summary statistics come from the building's occupancy counters
+        total_beds_count = building.bed_count
+        occupied_count = building.occupied_beds
+        available_count = building.available_beds
         
         return Response({
             "building_id": str(building.building_id),
@@ -137,7 +158,7 @@ class BedReportView(APIView):
     def _get_occupied_beds(self, building):
         """Fetch all occupied beds with student details"""
         beds = Bed.objects.filter(
-            room__floor__building=building,
+            building=building,
             is_occupied=True
         ).select_related('room', 'room__floor', 'room__floor__building').prefetch_related(
             'allocations__student'
@@ -152,4 +173,12 @@ class BedReportView(APIView):
                 "occupied_beds_count": beds.count()
             },
             "occupied_beds": serializer.data
-        })
\ No newline at end of file
+        })
+
+
+class ReportCacheStatsView(APIView):
+    """
+    Hit/miss counters for the cached building reports.
+    """
+    def get(self, request):
+        return Response(cache_stats(), status=status.HTTP_200_OK)
@@ -0,0 +1,135 @@
+"""
+Single entry point for putting students into beds and taking them out again.
+
+Every view that occupies or frees a bed goes through claim_bed/release_bed,
+which flip Bed.is_occupied with a conditional UPDATE instead of a
+read-check-write, so concurrent front-desk requests cannot both win a bed.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework import status
+from rest_framework.response import Response
+
+from apps.hostelinfo.models import User
+from apps.hostelmanagement.occupancy import BedUnavailableError, claim_bed, release_bed
+
+from .models import RoomAllocation
+
+__all__ = [
+    "AllocationError",
+    "BedUnavailableError",
+    "allocate_bed",
+    "claim_bed",
+    "deallocate_bed",
+    "idempotent",
+    "release_bed",
+]
+
+IDEMPOTENCY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TTL = 30
+
+
+class AllocationError(Exception):
+    """The allocation request is valid but cannot be carried out."""
+
+
+def allocate_bed(student, bed_id, allocated_by=None):
+    """
+    Allocate bed_id to a student user and return the RoomAllocation.
+
+    The student's row is locked for the duration so two requests for the same
+    student cannot each pass the "already allocated" check; the bed itself is
+    claimed by RoomAllocation.save through claim_bed.
+    """
+    with transaction.atomic():
+        User.objects.select_for_update().values_list("pk", flat=True).get(pk=student.pk)
+
+        existing = RoomAllocation.objects.select_related("bed__room").filter(student=student).first()
+        if existing:
+            raise AllocationError(
+                f"Student already allocated to Bed {existing.bed.bed_number} in Room {existing.bed.room.room_number}"
+            )
+
+        allocation = RoomAllocation(student=student, bed_id=bed_id, allocated_by=allocated_by)
+        allocation.save()
+    return allocation
+
+
+def deallocate_bed(allocation):
+    """Remove an allocation and free its bed; returns the refreshed room."""
+    room = allocation.room
+    allocation.delete()
+    return room
+
+
+def _describe(value):
+    # Uploaded files are compared by name and size, anything else by its text
+    if hasattr(value, "read"):
+        return [getattr(value, "name", None), getattr(value, "size", None)]
+    return str(value)
+
+
+def request_fingerprint(request):
+    """Hash of the method, path and parsed body of a request."""
+    data = request.data
+    if hasattr(data, "lists"):
+        data = dict(data.lists())
+    payload = json.dumps([request.method, request.path, data], sort_keys=True, default=_describe)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def idempotent(scope):
+    """
+    Replay the stored response when a client retries with the same Idempotency-Key.
+
+    Keys are scoped to the authenticated principal, so two clients that pick
+    the same key never see each other's responses. The stored response also
+    records a fingerprint of the request, and reusing a key for a different
+    request gets a 422 instead of a replay.
+
+    Only successful responses are stored, for IDEMPOTENCY_TTL seconds. A retry
+    that arrives while the first request is still running gets a 409.
+    Requests without the header are handled as before.
+    """
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get("Idempotency-Key")
+            if not key:
+                return handler(view, request, *args, **kwargs)
+
+            principal = getattr(request.user, "user_id", None) or "anonymous"
+            cache_key = f"idempotency:{scope}:{principal}:{key}"
+            fingerprint = request_fingerprint(request)
+            stored = cache.get(cache_key)
+            if stored is not None:
+                if stored["fingerprint"] != fingerprint:
+                    return Response(
+                        {"error": "This Idempotency-Key was already used for a different request"},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                return Response(stored["data"], status=stored["status"])
+
+            lock_key = f"{cache_key}:lock"
+            if not cache.add(lock_key, 1, timeout=IDEMPOTENCY_LOCK_TTL):
+                return Response(
+                    {"error": "A request with this Idempotency-Key is already in progress"},
+                    status=status.HTTP_409_CONFLICT,
+                )
+            try:
+                response = handler(view, request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    cache.set(
+                        cache_key,
+                        {"data": response.data, "status": response.status_code, "fingerprint": fingerprint},
+                        timeout=IDEMPOTENCY_TTL,
+                    )
+                return response
+            finally:
+                cache.delete(lock_key)
+        return wrapper
+    return decorator
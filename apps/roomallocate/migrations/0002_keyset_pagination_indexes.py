@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelinfo', '0007_keyset_pagination_indexes'),
+        ('hostelmanagement', '0006_keyset_pagination_indexes'),
+        ('roomallocate', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='roomallocation',
+            index=models.Index(fields=['allocated_at', 'allocation_id'], name='allocation_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studentroomissues',
+            index=models.Index(fields=['reported_at', 'issue_id'], name='room_issue_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostelinfo', '0008_hot_filter_indexes'),
+        ('hostelmanagement', '0007_hot_filter_indexes'),
+        ('roomallocate', '0002_keyset_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='studentroomissues',
+            index=models.Index(fields=['student', '-reported_at'], name='room_issue_student_idx'),
+        ),
+    ]
@@ -1,7 +1,9 @@
 import uuid
-from django.db import models
+from django.db import models, transaction
 from apps.hostelinfo.models import User
 from apps.hostelmanagement.models import Bed, Building, Floor, Hostel, Room
+from apps.hostelmanagement.occupancy import claim_bed, release_bed
+from core.settings.tenancy import OwnedQuerySet
 
 class RoomAllocation(models.Model):
     allocation_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -17,36 +19,37 @@ class RoomAllocation(models.Model):
     )
     allocated_at = models.DateTimeField(auto_now_add=True)
 
+    owner_lookup = "room__floor__building__hostel__owner"
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["allocated_at", "allocation_id"], name="allocation_keyset_idx"),
+        ]
+
     def _refresh_room_availability(self, room):
-        # Count occupied beds from Bed rows (defensive) and derive available using total_beds
-        occupied_beds = Bed.objects.filter(room=room, is_occupied=True).count()
-        total = room.total_beds or 0
-        available_beds = max(0, total - occupied_beds)
-        room.is_available = available_beds > 0
-        room.save(update_fields=["is_available"])
+        # Bed signals keep the room's counters and is_available current; just reload them
+        room.refresh_from_db(fields=["bed_count", "occupied_beds", "is_available"])
 
     def save(self, *args, **kwargs):
-        # Mark the bed as occupied (persist first so counts reflect DB)
-        if not self.bed.is_occupied:
-            self.bed.is_occupied = True
-            self.bed.save(update_fields=["is_occupied"])
-        super().save(*args, **kwargs)
-        # Update room availability using total_beds (authoritative)
+        with transaction.atomic():
+            if self._state.adding:
+                # Claim the bed atomically; raises BedUnavailableError if someone else holds it
+                self.bed = claim_bed(self.bed_id)
+                self.room = self.bed.room
+            super().save(*args, **kwargs)
         self._refresh_room_availability(self.room)
 
     def delete(self, *args, **kwargs):
         # Keep references before deletion
         room = self.room
-        bed = self.bed
-
-        # Free the bed
-        if bed.is_occupied:
-            bed.is_occupied = False
-            bed.save(update_fields=["is_occupied"])
 
-        super().delete(*args, **kwargs)
-        # Update room availability after allocation removed
+        with transaction.atomic():
+            release_bed(self.bed_id)
+            result = super().delete(*args, **kwargs)
+        # Reload the room's counters after the bed was freed
         self._refresh_room_availability(room)
+        return result
 
     def __str__(self):
         return f"Allocation {str(self.allocation_id)} for {self.student.full_name}"
@@ -75,6 +78,15 @@ class StudentRoomIssues(models.Model):
         max_length=20, choices=RESOLUTION_STATUS_CHOICES, default="in_progress"
     )
     updated_at = models.DateTimeField(auto_now=True)
+
+    owner_lookup = "room__floor__building__hostel__owner"
+    objects = OwnedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["reported_at", "issue_id"], name="room_issue_keyset_idx"),
+            models.Index(fields=["student", "-reported_at"], name="room_issue_student_idx"),
+        ]
     
     def __str__(self):
         return f"Issue {str(self.issue_id)} by {self.student.full_name} - Status: {self.resolution_status}"
\ No newline at end of file
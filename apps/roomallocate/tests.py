@@ -1 +1,108 @@
-# Create your tests here.
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.hostelinfo.models import User
+from apps.hostelinfo.tokens import issue_tokens
+from apps.hostelmanagement.models import Bed, Building, Hostel, Room
+from apps.hostelmanagement.occupancy import claim_bed
+from apps.roomallocate.allocation import BedUnavailableError, allocate_bed
+from apps.roomallocate.models import RoomAllocation
+
+
+def make_building(owner, floors, rooms_per_floor, beds_per_room):
+    hostel = Hostel.objects.create(owner=owner, hostel_name="Benchmark Hostel")
+    building = Building.objects.create(
+        hostel=hostel, building_name="Block A", total_floors=floors, building_type="boys"
+    )
+    for floor in building.floors.all():
+        for number in range(rooms_per_floor):
+            Room.objects.create(
+                floor=floor,
+                room_number=f"{floor.floor_number}{number:02d}",
+                total_beds=beds_per_room,
+                monthly_rent=5000,
+            )
+    return building
+
+
+def count_queries(client, url, **headers):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, **headers)
+    assert response.status_code == 200
+    return len(queries)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "url",
+    ["/api/buildings/{}/available-beds/", "/api/rooms-reports/{}/"],
+)
+def test_building_tree_query_count_is_constant(client, url):
+    owner = User.objects.create(
+        full_name="Owner", gender="male", phone="+911234567890",
+        email="owner@example.com", password="password", role="owner",
+    )
+    small = make_building(owner, floors=1, rooms_per_floor=1, beds_per_room=1)
+    large = make_building(owner, floors=4, rooms_per_floor=6, beds_per_room=4)
+
+    auth = {"HTTP_AUTHORIZATION": f"Bearer {issue_tokens(owner)['access']}"}
+
+    small_count = count_queries(client, url.format(small.building_id), **auth)
+    large_count = count_queries(client, url.format(large.building_id), **auth)
+
+    assert small_count == large_count
+    assert large_count <= 4
+
+
+def make_user(n, role):
+    return User.objects.create(
+        full_name=f"User {n}", gender="male", phone=f"+9112345678{n:02d}",
+        email=f"user{n}@example.com", password="password", role=role,
+    )
+
+
+@pytest.mark.django_db
+def test_a_bed_is_claimed_only_once():
+    building = make_building(make_user(0, "owner"), floors=1, rooms_per_floor=1, beds_per_room=2)
+    bed = Bed.objects.filter(building=building).first()
+    first, second = make_user(1, "student"), make_user(2, "student")
+
+    allocate_bed(first, bed.pk)
+    with pytest.raises(BedUnavailableError):
+        allocate_bed(second, bed.pk)
+    with pytest.raises(BedUnavailableError):
+        claim_bed(bed.pk)
+
+    room = Room.objects.get(pk=bed.room_id)
+    assert RoomAllocation.objects.filter(bed=bed).count() == 1
+    assert (room.occupied_beds, room.is_available) == (1, True)
+
+
+@pytest.mark.django_db
+def test_idempotency_key_replays_only_for_the_same_client_and_request(client):
+    owner, other_owner = make_user(0, "owner"), make_user(1, "owner")
+    building = make_building(owner, floors=1, rooms_per_floor=1, beds_per_room=2)
+    beds = list(Bed.objects.filter(building=building))
+    student = make_user(2, "student")
+
+    def allocate(user, bed):
+        return client.post(
+            "/api/allocate-bed/",
+            {"bed_id": str(bed.pk), "student_id": str(student.pk)},
+            content_type="application/json",
+            HTTP_AUTHORIZATION=f"Bearer {issue_tokens(user)['access']}",
+            HTTP_IDEMPOTENCY_KEY="retry-1",
+        )
+
+    first = allocate(owner, beds[0])
+    replay = allocate(owner, beds[0])
+    assert (first.status_code, replay.status_code) == (201, 201)
+    assert replay.json() == first.json()
+    assert RoomAllocation.objects.count() == 1
+
+    # Another client's key lives in its own namespace and is really handled
+    assert allocate(other_owner, beds[0]).status_code == 400
+    # The same key for a different request is refused, not replayed
+    assert allocate(owner, beds[1]).status_code == 422
+    assert RoomAllocation.objects.count() == 1
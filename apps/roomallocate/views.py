@@ -1,114 +1,95 @@
-from django.db import transaction
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
-from apps.hostelmanagement.models import Bed, Building, Floor, Room
+from apps.hostelmanagement.models import Bed, Building, Room
 from apps.hostelmanagement.serializers import BedSerializer
+from apps.hostelmanagement.tree import building_tree
+from .allocation import AllocationError, BedUnavailableError, allocate_bed, deallocate_bed, idempotent
 from .models import RoomAllocation, StudentRoomIssues
 from .serializers import RoomAllocationSerializer, AllocateBedSerializer, StudentGetRoomIssuesSerializer, StudentRoomIssuesSerializer
+from core.settings.pagination import PaginatedListMixin
+from core.settings.tenancy import OwnerScopedMixin
 from apps.hostelmanagement.serializers import BedSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.db import transaction
 from apps.hostelmanagement.models import Bed
 
 class AllocateBedView(APIView):
+    @idempotent("allocate-bed")
     def post(self, request):
         serializer = AllocateBedSerializer(data=request.data)
         if serializer.is_valid():
-            with transaction.atomic():
-                bed = serializer.validated_data["bed"]
-                student = serializer.validated_data["student"]
-
-                # Check if bed is already occupied
-                if bed.is_occupied:
-                    return Response(
-                        {"error": f"Bed {bed.bed_number} in Room {bed.room.room_number} is already occupied"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-                # Check if student already has a bed
-                existing_bed = Bed.objects.filter(student=student).first()
-                if existing_bed:
-                    return Response(
-                        {"error": f"Student already allocated to Bed {existing_bed.bed_number} in Room {existing_bed.room.room_number}"},
-                        status=status.HTTP_400_BAD_REQUEST,
-                    )
-
-                # Allocate student to bed
-                bed.student = student
-                bed.save()
-
-                return Response(
-                    {
-                        "message": "Bed allocated successfully",
-                        "bed": {
-                            "bed_id": str(bed.bed_id),
-                            "bed_number": bed.bed_number,
-                            "room_number": bed.room.room_number,
-                            "is_occupied": bed.is_occupied,
-                            "student": {
-                                "id": str(student.user_id),
-                                "name": student.full_name,
-                                "phone": student.phone,
-                            },
-                        },
-                        "room_status": {
-                            "room_number": bed.room.room_number,
-                            "is_available": bed.room.is_available,
-                            "occupied_beds": bed.room.beds.filter(is_occupied=True).count(),
-                            "total_beds": bed.room.total_beds,
+            student = serializer.validated_data["student"]
+            try:
+                allocation = allocate_bed(student, serializer.validated_data["bed_id"])
+            except (AllocationError, BedUnavailableError) as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+            bed = allocation.bed
+            room = allocation.room
+            return Response(
+                {
+                    "message": "Bed allocated successfully",
+                    "bed": {
+                        "bed_id": str(bed.bed_id),
+                        "bed_number": bed.bed_number,
+                        "room_number": room.room_number,
+                        "is_occupied": bed.is_occupied,
+                        "student": {
+                            "id": str(student.user_id),
+                            "name": student.full_name,
+                            "phone": student.phone,
                         },
                     },
-                    status=status.HTTP_201_CREATED,
-                )
+                    "room_status": {
+                        "room_number": room.room_number,
+                        "is_available": room.is_available,
+                        "occupied_beds": room.occupied_beds,
+                        "total_beds": room.total_beds,
+                    },
+                },
+                status=status.HTTP_201_CREATED,
+            )
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class GetAllocatedBedsStudentView(APIView):
+class GetAllocatedBedsStudentView(OwnerScopedMixin, APIView):
     def get(self, request, student_id):
-        beds = Bed.objects.filter(student_id=student_id)
+        beds = self.scoped(Bed.objects.filter(student_id=student_id))
         serializer = BedSerializer(beds, many=True)
         return Response(serializer.data)
 
-class DeallocateBedView(APIView):
+class DeallocateBedView(OwnerScopedMixin, APIView):
     def delete(self, request, allocation_id):
         try:
-            with transaction.atomic():
-                allocation = RoomAllocation.objects.get(allocation_id=allocation_id)
-                bed = allocation.bed
-                room = allocation.room
-
-                # Mark bed as unoccupied
-                bed.is_occupied = False
-                bed.save()
-
-                # Delete allocation
-                allocation.delete()
-
-                return Response(
-                    {
-                        "message": "Bed deallocated successfully",
-                        "room_status": {
-                            "room_number": room.room_number,
-                            "is_available": room.is_available,
-                            "occupied_beds": room.beds.filter(is_occupied=True).count(),
-                            "total_beds": room.total_beds,
-                        },
+            allocation = self.scoped(RoomAllocation.objects.select_related("room")).get(allocation_id=allocation_id)
+            room = deallocate_bed(allocation)
+
+            return Response(
+                {
+                    "message": "Bed deallocated successfully",
+                    "room_status": {
+                        "room_number": room.room_number,
+                        "is_available": room.is_available,
+                        "occupied_beds": room.occupied_beds,
+                        "total_beds": room.total_beds,
                     },
-                    status=status.HTTP_200_OK,
-                )
+                },
+                status=status.HTTP_200_OK,
+            )
 
         except RoomAllocation.DoesNotExist:
             return Response({"error": "Allocation not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
-class AllocationListView(APIView):
+class AllocationListView(OwnerScopedMixin, PaginatedListMixin, APIView):
+    ordering_field = "allocated_at"
+
     def get(self, request):
-        allocations = RoomAllocation.objects.all()
+        allocations = self.scoped(RoomAllocation.objects.select_related("student", "bed", "room", "allocated_by"))
 
         # Filter by hostel
         hostel_id = request.query_params.get("hostel_id")
@@ -125,32 +106,31 @@ class AllocationListView(APIView):
         if room_id:
             allocations = allocations.filter(room__room_id=room_id)
 
-        serializer = RoomAllocationSerializer(allocations, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self.paginated_response(allocations, RoomAllocationSerializer)
 
 
-class AllocationDetailView(APIView):
+class AllocationDetailView(OwnerScopedMixin, APIView):
     def get(self, request, allocation_id):
         try:
-            allocation = RoomAllocation.objects.get(allocation_id=allocation_id)
+            allocation = self.scoped(RoomAllocation.objects.all()).get(allocation_id=allocation_id)
             serializer = RoomAllocationSerializer(allocation)
             return Response(serializer.data, status=status.HTTP_200_OK)
         except RoomAllocation.DoesNotExist:
             return Response({"error": "Allocation not found"}, status=status.HTTP_404_NOT_FOUND)
 
 
-class AvailableBedsView(APIView):
+class AvailableBedsView(OwnerScopedMixin, APIView):
     def get(self, request):  
-        beds = Bed.objects.filter(is_occupied=False)
+        beds = self.scoped(Bed.objects.filter(is_occupied=False))
         # Filter by hostel
         hostel_id = request.query_params.get("hostel_id")
         if hostel_id:
-            beds = beds.filter(room__floor__building__hostel__hostel_id=hostel_id)
+            beds = beds.filter(building__hostel_id=hostel_id)
 
         # Filter by building
         building_id = request.query_params.get("building_id")
         if building_id:
-            beds = beds.filter(room__floor__building__building_id=building_id)
+            beds = beds.filter(building_id=building_id)
 
         # Filter by floor
         floor_id = request.query_params.get("floor_id")
@@ -168,16 +148,16 @@ class AvailableBedsView(APIView):
             status=status.HTTP_200_OK,
         )
 
-class RoomStatusView(APIView):
+class RoomStatusView(OwnerScopedMixin, APIView):
     def get(self, request, room_id):
         try:
             from apps.hostelmanagement.serializers import RoomSerializer
-            room = Room.objects.get(room_id=room_id)
+            room = RoomSerializer.setup_eager_loading(self.scoped(Room.objects.all())).get(room_id=room_id)
             allocations = RoomAllocation.objects.filter(room=room)
             serializer = RoomSerializer(room)
             allocation_serializer = RoomAllocationSerializer(allocations, many=True)
-            # Reliable occupancy numbers:
-            occupied_beds = Bed.objects.filter(room=room, is_occupied=True).count()
+            # Reliable occupancy numbers, from the room's maintained counter:
+            occupied_beds = room.occupied_beds
             total_beds = room.total_beds or 0
             available_beds = max(0, total_beds - occupied_beds)
             is_fully_occupied = available_beds == 0
@@ -202,16 +182,16 @@ class RoomStatusView(APIView):
 
 def ensure_beds_for_room(room):
     existing_beds = Bed.objects.filter(room=room).count()
-    missing_beds = room.total_beds - existing_beds
+    missing_beds = (room.total_beds or 0) - existing_beds
     for i in range(1, missing_beds + 1):
         Bed.objects.create(room=room, bed_number=str(existing_beds + i), is_occupied=False)
 
 
-class AvailableBedsByBuildingView(APIView):
+class AvailableBedsByBuildingView(OwnerScopedMixin, APIView):
     def get(self, request, building_id):
         try:
-            building = Building.objects.get(building_id=building_id)
-            floors = Floor.objects.filter(building=building)
+            building = self.scoped(Building.objects.all()).get(building_id=building_id)
+            floors = building_tree(building.building_id, beds=Bed.objects.filter(is_occupied=False))
 
             result = {
                 "building_id": str(building.building_id),
@@ -226,16 +206,15 @@ class AvailableBedsByBuildingView(APIView):
                     "rooms": [],
                 }
 
-                rooms = Room.objects.filter(floor=floor)
-                for room in rooms:
-                    available_beds = Bed.objects.filter(room=room, is_occupied=False)
+                for room in floor.rooms.all():
+                    available_beds = room.beds.all()
                     bed_serializer = BedSerializer(available_beds, many=True)
 
                     room_data = {
                         "room_id": str(room.room_id),
                         "room_number": room.room_number,
                         "total_beds": room.total_beds,
-                        "available_beds_count": available_beds.count(),
+                        "available_beds_count": len(available_beds),
                         "available_beds": bed_serializer.data,
                     }
                     floor_data["rooms"].append(room_data)
@@ -251,12 +230,12 @@ class AvailableBedsByBuildingView(APIView):
 
 
 
-class StudentRoomIssueListCreateView(APIView):
+class StudentRoomIssueListCreateView(OwnerScopedMixin, PaginatedListMixin, APIView):
+    ordering_field = "reported_at"
+
     def get(self, request):
-        issues = StudentRoomIssues.objects.all().order_by("-reported_at")
-        serializer = StudentGetRoomIssuesSerializer(issues, many=True)
-       
-        return Response(serializer.data)
+        issues = self.scoped(StudentRoomIssues.objects.select_related("room", "student"))
+        return self.paginated_response(issues, StudentGetRoomIssuesSerializer)
 
    
     def post(self, request):
@@ -268,18 +247,18 @@ class StudentRoomIssueListCreateView(APIView):
 
 
 # GET issues by student_id
-class StudentRoomIssueByStudentView(APIView):
+class StudentRoomIssueByStudentView(OwnerScopedMixin, APIView):
     def get(self, request, student_id):
-        issues = StudentRoomIssues.objects.filter(student_id=student_id).order_by("-reported_at")
+        issues = self.scoped(StudentRoomIssues.objects.filter(student_id=student_id)).order_by("-reported_at")
         serializer = StudentGetRoomIssuesSerializer(issues, many=True)
         return Response(serializer.data)
 
 
 # PUT update issue (only by student who created it)
-class StudentRoomIssueUpdateView(APIView):
+class StudentRoomIssueUpdateView(OwnerScopedMixin, APIView):
 
     def put(self, request, issue_id):
-        issue = get_object_or_404(StudentRoomIssues, issue_id=issue_id)
+        issue = get_object_or_404(self.scoped(StudentRoomIssues.objects.all()), issue_id=issue_id)
         student_id = request.data.get("student")
 
         if str(issue.student_id) != str(student_id):
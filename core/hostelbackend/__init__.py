@@ -0,0 +1,4 @@
+# Load the Celery app with Django so tasks bind to it
+from core.settings.celery import app as celery_app
+
+__all__ = ("celery_app",)
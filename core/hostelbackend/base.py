@@ -85,8 +85,10 @@ CORS_ALLOW_ALL_ORIGINS = True
 # Application definition
 
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": [],
+    "DEFAULT_AUTHENTICATION_CLASSES": ["apps.hostelinfo.authentication.SignedTokenAuthentication"],
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
+    "DEFAULT_PAGINATION_CLASS": "core.settings.pagination.KeysetPagination",
+    "PAGE_SIZE": 50,
 }
 
 INSTALLED_APPS = [
@@ -112,11 +114,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    # Session, CSRF, auth and messages are skipped for /api/ (see core/settings/middleware.py)
+    "core.settings.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
-    "django.contrib.messages.middleware.MessageMiddleware",
+    "core.settings.middleware.CsrfViewMiddleware",
+    "core.settings.middleware.AuthenticationMiddleware",
+    "core.settings.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
@@ -161,6 +164,23 @@ WSGI_APPLICATION = "core.hostelbackend.wsgi.application"
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
+# PASSWORD_HASHER_PROFILE picks the hasher for new and upgraded passwords
+# (argon2, bcrypt or pbkdf2; bcrypt needs the bcrypt package). The rest stay
+# listed so existing hashes still verify and are re-hashed on login
+PASSWORD_HASHER_PROFILE = env("PASSWORD_HASHER_PROFILE", default="argon2")
+PASSWORD_HASHER_PROFILES = {
+    "argon2": "core.settings.hashers.BoundedArgon2PasswordHasher",
+    "bcrypt": "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "pbkdf2": "core.settings.hashers.BoundedPBKDF2PasswordHasher",
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]] + [
+    hasher for profile, hasher in PASSWORD_HASHER_PROFILES.items() if profile != PASSWORD_HASHER_PROFILE
+] + ["django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher"]
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 19 * 1024
+ARGON2_PARALLELISM = 1
+PBKDF2_ITERATIONS = 600000
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         "NAME": "django.contrib.auth.password_validation.UserAttributeSimilarityValidator",
@@ -283,3 +303,86 @@ CACHES = {
         }
     }
 }
+
+# Seconds a cached subscription snapshot stays valid; saving a subscription drops it
+SUBSCRIPTION_CACHE_TIMEOUT = 60 * 60
+
+# Seconds a cached building report stays valid; signals invalidate it sooner on writes
+REPORT_CACHE_TIMEOUT = 60 * 5
+
+# Password-reset OTPs live in the cache so every worker sees them
+OTP_STORE_BACKEND = "apps.hostelinfo.otp.CacheOTPStore"
+OTP_TTL = 60
+OTP_RESEND_INTERVAL = 60
+OTP_MAX_ATTEMPTS = 5
+# Attempts are counted per email over this window, across reissued codes
+OTP_ATTEMPT_WINDOW = 900
+
+# Outbound mail is queued and sent by `manage.py send_queued_mail --loop`
+MAIL_QUEUE_BATCH_SIZE = 50
+MAIL_QUEUE_MAX_ATTEMPTS = 5
+MAIL_QUEUE_BACKOFF = 30
+MAIL_QUEUE_MAX_BACKOFF = 60 * 60
+# Seconds a claimed batch is hidden from other workers while it is being sent
+MAIL_QUEUE_CLAIM_TIMEOUT = 5 * 60
+
+# Receipts and Aadhaar images are uploaded to Cloudinary inside the request.
+# CLOUDINARY_STAGED_UPLOADS=true stages them on local disk for the Celery worker
+# (or `manage.py push_staged_uploads --loop`) instead; only turn it on where that
+# worker shares UPLOAD_STAGING_ROOT with the web processes
+CLOUDINARY_STAGED_UPLOADS = env.bool("CLOUDINARY_STAGED_UPLOADS", default=False)
+CLOUDINARY_REMOTE = "core.settings.cloudinary_storage.CloudinaryRemote"
+CLOUDINARY_METADATA_TIMEOUT = 60 * 60 * 24
+UPLOAD_STAGING_ROOT = os.environ.get("UPLOAD_STAGING_ROOT", os.path.join(BASE_DIR, "upload_staging"))
+UPLOAD_QUEUE_BATCH_SIZE = 20
+UPLOAD_QUEUE_MAX_ATTEMPTS = 5
+UPLOAD_QUEUE_BACKOFF = 30
+UPLOAD_QUEUE_MAX_BACKOFF = 60 * 60
+# Seconds a claimed upload is hidden from other workers while it is pushed
+UPLOAD_QUEUE_CLAIM_TIMEOUT = 10 * 60
+
+# Document images are checked while they stream in and spooled to disk once a
+# request is over FILE_UPLOAD_MAX_MEMORY_SIZE
+FILE_UPLOAD_HANDLERS = [
+    "core.settings.upload_handlers.DocumentUploadHandler",
+    "django.core.files.uploadhandler.MemoryFileUploadHandler",
+    "django.core.files.uploadhandler.TemporaryFileUploadHandler",
+]
+FILE_UPLOAD_MAX_MEMORY_SIZE = 1024 * 1024
+DOCUMENT_UPLOAD_MAX_SIZE = 5 * 1024 * 1024
+# push_staged_uploads shrinks larger images to fit this many pixels a side; None keeps them as sent
+UPLOAD_DOWNSCALE_MAX_DIMENSION = 2048
+# Longest side, in pixels, of the derivatives generated for each uploaded image
+CLOUDINARY_DERIVATIVE_SIZES = {"thumbnail": 200, "preview": 800}
+
+# Celery runs slow side effects (mail, uploads, fee and expense rollups) off the request
+# thread; see core/settings/celery.py. Eager mode runs tasks inline, for tests
+CELERY_BROKER_URL = env("CELERY_BROKER_URL", default="redis://redis:6379/0")
+CELERY_RESULT_BACKEND = env("CELERY_RESULT_BACKEND", default="redis://redis:6379/2")
+CELERY_RESULT_EXPIRES = 60 * 60
+CELERY_TASK_ALWAYS_EAGER = env.bool("CELERY_TASK_ALWAYS_EAGER", default=False)
+CELERY_TASK_EAGER_PROPAGATES = True
+CELERY_TASK_ACKS_LATE = True
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_TIME_LIMIT = 5 * 60
+CELERY_TIMEZONE = TIME_ZONE
+# On where a Celery worker with beat runs beside the web service (docker-compose.dev.yml).
+# Off, enqueued tasks run in the web process after commit, so mail still goes out
+TASK_WORKER_ENABLED = env.bool("TASK_WORKER_ENABLED", default=False)
+# Sweeps that catch queued work whose on-commit kick was lost or is backing off
+CELERY_BEAT_SCHEDULE = {
+    "send-queued-mail": {"task": "apps.hostelinfo.tasks.send_queued_mail_task", "schedule": 60.0},
+    "push-staged-uploads": {"task": "apps.hostelinfo.tasks.push_staged_uploads_task", "schedule": 60.0},
+}
+# Most batches one queue task run sends before leaving the rest to the next sweep
+QUEUE_TASK_MAX_BATCHES = 20
+
+# Signed API tokens (apps/hostelinfo/tokens.py); lifetimes in seconds. The
+# revocation list lives in this cache
+ACCESS_TOKEN_LIFETIME = 15 * 60
+REFRESH_TOKEN_LIFETIME = 14 * 24 * 60 * 60
+AUTH_TOKEN_CACHE = "default"
+API_PATH_PREFIX = "/api/"
+# List endpoints only return the token owner's rows (core/settings/tenancy.py)
+# and nothing to requests without a token; False shows every owner's rows to them
+OWNER_SCOPING_REQUIRED = env.bool("OWNER_SCOPING_REQUIRED", default=True)
@@ -1,2 +1,61 @@
-from core.env import env
+"""
+Celery app for work that should not hold up a request.
 
+Each app keeps its tasks in tasks.py, found by autodiscover_tasks(), and
+configuration comes from the CELERY_* settings in base.py. With
+CELERY_TASK_ALWAYS_EAGER on (tests, local runs without Redis) tasks run
+inline in the calling process.
+
+Run a worker, with the periodic sweeps, using:
+
+    celery -A core.settings.celery worker -B -l info
+
+and set TASK_WORKER_ENABLED wherever one runs. Deployments without a worker
+(the production compose file and Cloud Run) leave it off, and tasks then run
+in the web process once the request's transaction commits.
+"""
+import logging
+import os
+
+from celery import Celery
+from django.conf import settings
+from django.db import transaction
+
+# base.py holds the CELERY_* settings; deployments point this at their own module
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.hostelbackend.base")
+
+logger = logging.getLogger(__name__)
+
+app = Celery("hostelbackend")
+app.config_from_object("django.conf:settings", namespace="CELERY")
+app.autodiscover_tasks()
+
+
+def enqueue_on_commit(task, *args, **kwargs):
+    """
+    Send task once the surrounding transaction commits.
+
+    Without TASK_WORKER_ENABLED nothing would consume the broker, so the task
+    is run inline instead. The same happens when the broker cannot be
+    reached: only mail and staged uploads have a periodic sweep to fall back
+    on, and the fee and expense rollup refreshes would otherwise be lost.
+    """
+    def send():
+        if not getattr(settings, "TASK_WORKER_ENABLED", False):
+            run_inline(task, args, kwargs)
+            return
+        try:
+            task.apply_async(args=args, kwargs=kwargs)
+        except Exception as e:
+            logger.warning("Could not enqueue %s, running it inline: %s", task.name, e)
+            run_inline(task, args, kwargs)
+
+    transaction.on_commit(send)
+
+
+def run_inline(task, args=(), kwargs=None):
+    """Run task in this process; a failure is logged, not raised to the caller."""
+    try:
+        task.apply(args=args, kwargs=kwargs or {}, throw=True)
+    except Exception:
+        logger.exception("Running %s inline failed", task.name)
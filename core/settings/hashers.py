@@ -0,0 +1,23 @@
+"""
+Password hashers with a cost we choose.
+
+Django's defaults are tuned for a lone login form: PBKDF2 runs a million
+SHA-256 rounds and Argon2 asks for 100MB per hash. During a login storm on
+a small pod that is all the CPU or memory there is. These subclasses take
+their cost from settings instead; because Django re-hashes any password
+whose parameters differ from the current ones, changing a setting upgrades
+stored hashes as users log in.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+
+
+class BoundedArgon2PasswordHasher(Argon2PasswordHasher):
+    # OWASP's minimum Argon2id configuration by default: 19MiB, 2 passes
+    time_cost = getattr(settings, "ARGON2_TIME_COST", 2)
+    memory_cost = getattr(settings, "ARGON2_MEMORY_COST", 19 * 1024)
+    parallelism = getattr(settings, "ARGON2_PARALLELISM", 1)
+
+
+class BoundedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = getattr(settings, "PBKDF2_ITERATIONS", 600000)
@@ -0,0 +1,52 @@
+"""
+Django middleware that stays out of the way of API requests.
+
+The API authenticates with signed tokens (see SignedTokenAuthentication),
+so /api/ requests have no use for sessions, the CSRF cookie, request.user
+from the session or flash messages. Each class here is the stock Django
+middleware with its hooks short-circuited for paths under API_PATH_PREFIX;
+the admin and the API docs still get the full behaviour.
+"""
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as messages_middleware
+from django.contrib.sessions import middleware as sessions_middleware
+from django.middleware import csrf
+
+API_PATH_PREFIX = getattr(settings, "API_PATH_PREFIX", "/api/")
+
+
+def is_api_request(request):
+    return request.path_info.startswith(API_PATH_PREFIX)
+
+
+def skip_for_api(middleware_class):
+    """Subclass middleware_class so that its hooks do nothing for API requests."""
+    def wrap(hook):
+        if hook == "process_response":
+            def method(self, request, response):
+                if is_api_request(request):
+                    return response
+                return getattr(super(cls, self), hook)(request, response)
+        else:
+            def method(self, request, *args, **kwargs):
+                if is_api_request(request):
+                    return None
+                return getattr(super(cls, self), hook)(request, *args, **kwargs)
+        method.__name__ = hook
+        return method
+
+    hooks = ("process_request", "process_view", "process_response", "process_exception")
+    cls = type(
+        middleware_class.__name__,
+        (middleware_class,),
+        {hook: wrap(hook) for hook in hooks if hasattr(middleware_class, hook)},
+    )
+    cls.__module__ = __name__
+    return cls
+
+
+SessionMiddleware = skip_for_api(sessions_middleware.SessionMiddleware)
+CsrfViewMiddleware = skip_for_api(csrf.CsrfViewMiddleware)
+AuthenticationMiddleware = skip_for_api(auth_middleware.AuthenticationMiddleware)
+MessageMiddleware = skip_for_api(messages_middleware.MessageMiddleware)
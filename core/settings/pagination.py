@@ -0,0 +1,155 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Pages are ordered newest first on (created_at, pk) and each page starts
+where the previous one ended instead of at an OFFSET. The cursor filter is
+
+    created_at <= v AND (created_at < v OR (created_at = v AND pk < k))
+
+The OR alone cannot bound an index scan, but the leading conjunct can: the
+database seeks straight to v on the (..., created_at, pk) indexes and the OR
+only settles ties. A deep page therefore costs the same as the first one,
+and rows inserted while a client pages through a list never shift it.
+There is no total count, as counting is the expensive part on large lists.
+
+Listings that have always answered ?page=N with a count keep doing so
+through StandardResultsSetPagination.
+"""
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE or 50
+    # Clients may ask for ?page_size=N, but never for more than this
+    max_page_size = 200
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    # Views can page on another timestamp by setting ordering_field
+    ordering_field = "created_at"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.field = getattr(view, "ordering_field", self.ordering_field)
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor["reverse"])
+
+        # A "previous" cursor walks back towards newer rows; the page is
+        # flipped into the usual newest-first order below.
+        if reverse:
+            queryset = queryset.order_by(self.field, "pk")
+            lookup, bound = "gt", "gte"
+        else:
+            queryset = queryset.order_by(f"-{self.field}", "-pk")
+            lookup, bound = "lt", "lte"
+        if cursor:
+            queryset = queryset.filter(
+                Q(**{f"{self.field}__{bound}": cursor["value"]}),
+                Q(**{f"{self.field}__{lookup}": cursor["value"]})
+                | Q(**{self.field: cursor["value"], f"pk__{lookup}": cursor["pk"]}),
+            )
+
+        rows = list(queryset[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        self.page = rows[: self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            tokens = parse.parse_qs(b64decode(encoded.encode("ascii")).decode("ascii"), strict_parsing=True)
+            return {
+                "value": model._meta.get_field(self.field).to_python(tokens["v"][0]),
+                "pk": model._meta.pk.to_python(tokens["k"][0]),
+                "reverse": tokens.get("r", ["0"])[0] == "1",
+            }
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance, reverse=False):
+        value = getattr(instance, self.field)
+        tokens = {"v": value.isoformat(), "k": str(instance.pk)}
+        if reverse:
+            tokens["r"] = "1"
+        encoded = b64encode(parse.urlencode(tokens).encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class StandardResultsSetPagination(PageNumberPagination):
+    """Numbered pages with a total count, for listings whose clients use ?page=N."""
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = KeysetPagination.max_page_size
+
+
+class PaginatedListMixin:
+    """
+    Paginated list responses for plain APIViews, keyset by default.
+
+    Views that set pagination_class to a page-number paginator must order
+    the queryset themselves.
+    """
+    pagination_class = KeysetPagination
+    ordering_field = KeysetPagination.ordering_field
+
+    def paginated_response(self, queryset, serializer_class, **kwargs):
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        serializer = serializer_class(page, many=True, **kwargs)
+        return paginator.get_paginated_response(serializer.data)
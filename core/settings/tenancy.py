@@ -0,0 +1,36 @@
+"""
+Owner scoping for multi-tenant querysets.
+
+Every hostel belongs to one owner, and so does everything under it. A model
+opts in by declaring owner_lookup, the ORM path from it to the owning User
+(e.g. "hostel__owner"), and using OwnedQuerySet.as_manager(). Each path
+starts from a column with an index (an FK, or the denormalized building on
+beds and students), so a scoped listing only reads one owner's rows.
+
+Views mix in OwnerScopedMixin and wrap their querysets in self.scoped(),
+which filters by the owner in the request's token: an owner's own id, or for
+a warden or worker the owner their User.owner links them to. Staff accounts
+not linked to an owner, and requests without a token, see nothing. OWNER_SCOPING_REQUIRED = False leaves them unscoped instead,
+for local setups whose clients do not send tokens yet; never in production.
+"""
+from django.conf import settings
+from django.db import models
+
+
+class OwnedQuerySet(models.QuerySet):
+    def for_owner(self, owner_id):
+        return self.filter(**{self.model.owner_lookup: owner_id})
+
+    def visible_to(self, user):
+        if getattr(user, "is_authenticated", False):
+            owner_id = getattr(user, "owner_id", None)
+            return self.none() if owner_id is None else self.for_owner(owner_id)
+        if getattr(settings, "OWNER_SCOPING_REQUIRED", True):
+            return self.none()
+        return self
+
+
+class OwnerScopedMixin:
+    def scoped(self, queryset):
+        """Limit queryset to rows owned by the authenticated principal."""
+        return queryset.visible_to(self.request.user)
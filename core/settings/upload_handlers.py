@@ -0,0 +1,75 @@
+"""
+Upload handler that rejects bad document images while they stream in.
+
+DocumentUploadHandler sits in front of Django's memory and temporary-file
+handlers (see FILE_UPLOAD_HANDLERS). It never stores anything itself: it
+checks the request size before the body is read, sniffs the image type
+from the first bytes of each document field and counts bytes as they
+arrive, raising DocumentRejectedError (a 400 from DRF's multipart parser)
+as soon as an upload is over DOCUMENT_UPLOAD_MAX_SIZE (5MB, the same limit
+the serializers enforce) or not an image. Accepted files are written to
+disk by TemporaryFileUploadHandler once the request is larger than
+FILE_UPLOAD_MAX_MEMORY_SIZE, so a worker only ever holds one chunk of them.
+"""
+from django.conf import settings
+from django.core.files.uploadhandler import FileUploadHandler
+from django.http.multipartparser import MultiPartParserError
+
+DOCUMENT_UPLOAD_FIELDS = getattr(settings, "DOCUMENT_UPLOAD_FIELDS", ("receipt", "reciept", "aadhar_image"))
+DOCUMENT_UPLOAD_MAX_SIZE = getattr(settings, "DOCUMENT_UPLOAD_MAX_SIZE", 5 * 1024 * 1024)
+
+# Leading bytes of the formats we accept, and the content type they imply
+IMAGE_SIGNATURES = [
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+]
+SNIFF_LENGTH = 8
+
+
+class DocumentRejectedError(MultiPartParserError):
+    pass
+
+
+def sniff_image_type(head):
+    for signature, content_type in IMAGE_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+class DocumentUploadHandler(FileUploadHandler):
+    def handle_raw_input(self, input_data, meta, content_length, boundary, encoding=None):
+        # A body larger than the limit cannot hold an acceptable document;
+        # refuse it before reading a single byte
+        if content_length > DOCUMENT_UPLOAD_MAX_SIZE + 64 * 1024:
+            raise DocumentRejectedError(self._too_large())
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.checking = field_name in DOCUMENT_UPLOAD_FIELDS
+        self.head = b""
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.checking:
+            return raw_data
+        if start + len(raw_data) > DOCUMENT_UPLOAD_MAX_SIZE:
+            raise DocumentRejectedError(self._too_large())
+        if len(self.head) < SNIFF_LENGTH:
+            self.head += raw_data[:SNIFF_LENGTH]
+            if len(self.head) >= SNIFF_LENGTH:
+                self._check_type()
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.checking and len(self.head) < SNIFF_LENGTH:
+            # Shorter than any signature; still make sure it is not junk
+            self._check_type()
+
+    def _check_type(self):
+        if sniff_image_type(self.head) is None:
+            raise DocumentRejectedError(f"{self.field_name}: only JPEG, PNG, and GIF images are allowed")
+
+    def _too_large(self):
+        return f"File size cannot exceed {DOCUMENT_UPLOAD_MAX_SIZE // (1024 * 1024)}MB"